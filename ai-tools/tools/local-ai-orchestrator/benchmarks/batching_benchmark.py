@@ -0,0 +1,155 @@
+"""
+Micro-Batching Benchmark for Local AI Orchestrator
+Sweeps batch windows and client concurrency through the real OllamaProvider against a stub Ollama and prints the throughput/latency curve
+
+The stub runs in its own uvicorn process and models an Ollama node: every
+/api/generate call pays a serialized scheduling overhead, then decodes in one of
+num_parallel slots. OllamaProvider.generate_batch still sends one HTTP request per
+prompt, so a batch pays that overhead once per prompt; the sweep shows what the
+window costs in latency and whether it changes throughput for a given node shape.
+Tune the costs to match a measured Ollama node before drawing conclusions.
+
+Usage:
+    python benchmarks/batching_benchmark.py --requests 400 --windows 0,5,10,20 --concurrency 1,8,32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.config import AIProviderConfig, CacheConfig, ServiceConfig
+from src.orchestrator import AIOrchestrator, AIRequest, OllamaProvider
+
+# Minimal Ollama stand-in, served from this module by a separate uvicorn process
+STUB_OVERHEAD = float(os.getenv("STUB_OVERHEAD_MS", "10")) / 1000
+STUB_DECODE = float(os.getenv("STUB_DECODE_MS", "20")) / 1000
+stub_scheduler = asyncio.Lock()
+stub_slots = asyncio.Semaphore(int(os.getenv("STUB_NUM_PARALLEL", "4")))
+stub_app = FastAPI()
+
+@stub_app.get("/api/tags")
+async def stub_tags():
+    return {"models": [{"name": "phi3:latest"}]}
+
+@stub_app.post("/api/generate")
+async def stub_generate():
+    async with stub_scheduler:
+        await asyncio.sleep(STUB_OVERHEAD)
+    async with stub_slots:
+        await asyncio.sleep(STUB_DECODE)
+    return {"response": "ok", "done": True, "eval_count": 1}
+
+def start_stub(port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.batching_benchmark:stub_app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT,
+        env=env
+    )
+
+async def wait_until_up(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+async def run_scenario(window_ms: float, concurrency: int, total: int, args: argparse.Namespace) -> dict:
+    """Drive a closed loop of clients through the orchestrator and measure latency"""
+    orchestrator = AIOrchestrator(
+        service_config=ServiceConfig(
+            max_concurrent_requests=1024,
+            max_queue_depth=total,
+            queue_timeout=600,
+            batch_window_ms=window_ms,
+            max_batch_size=args.max_batch_size
+        ),
+        cache_config=CacheConfig(enabled=False)
+    )
+    orchestrator.providers["ollama"] = OllamaProvider(AIProviderConfig(
+        name="ollama",
+        endpoint=f"http://127.0.0.1:{args.stub_port}",
+        max_concurrent=1024,
+        num_parallel=args.num_parallel
+    ))
+    
+    counter = iter(range(total))
+    latencies: List[float] = []
+    
+    async def client() -> None:
+        for index in counter:
+            # Unique prompts so request coalescing does not hide the batching effect
+            request = AIRequest(prompt=f"summarise document {index}", model="phi3", provider="ollama")
+            start = time.perf_counter()
+            await orchestrator.generate_response(request)
+            latencies.append(time.perf_counter() - start)
+    
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await orchestrator.close()
+    
+    latencies.sort()
+    return {
+        "window_ms": window_ms,
+        "concurrency": concurrency,
+        "throughput": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000
+    }
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-batching throughput/latency benchmark")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--windows", default="0,5,10,20", help="Comma-separated batch windows in ms (0 disables batching)")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated client concurrency levels")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--num-parallel", type=int, default=4)
+    parser.add_argument("--overhead-ms", type=float, default=10.0)
+    parser.add_argument("--decode-ms", type=float, default=20.0)
+    parser.add_argument("--stub-port", type=int, default=18435)
+    args = parser.parse_args()
+    
+    env = dict(
+        os.environ,
+        STUB_OVERHEAD_MS=str(args.overhead_ms),
+        STUB_DECODE_MS=str(args.decode_ms),
+        STUB_NUM_PARALLEL=str(args.num_parallel)
+    )
+    stub = start_stub(args.stub_port, env)
+    try:
+        await wait_until_up(f"http://127.0.0.1:{args.stub_port}/api/tags")
+        
+        print(f"{'window_ms':>10} {'clients':>8} {'req/s':>10} {'p50_ms':>10} {'p95_ms':>10}")
+        for concurrency in [int(value) for value in args.concurrency.split(",")]:
+            for window_ms in [float(value) for value in args.windows.split(",")]:
+                result = await run_scenario(window_ms, concurrency, args.requests, args)
+                print(
+                    f"{result['window_ms']:>10.1f} {result['concurrency']:>8} {result['throughput']:>10.1f} "
+                    f"{result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f}"
+                )
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Serialization Benchmark for Local AI Orchestrator
+Times the old and new encoding paths for typical AIResponse, health and log payloads
+
+Each row encodes the same payload to the bytes that go on the wire, so the
+columns compare like with like: the old stdlib path (json.dumps over .dict() or
+jsonable_encoder, as FastAPI's JSONResponse does), pydantic-core's
+model_dump_json, and the orjson path now used by ORJSONResponse and the log handler.
+
+Usage:
+    python benchmarks/serialization_benchmark.py --iterations 20000 --response-chars 2000
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.orchestrator import AIResponse, AI_MODELS, ModelStatus
+from src.serialization import dumps
+
+def build_payloads(response_chars: int):
+    response = AIResponse(
+        response="Your appointment is confirmed for Friday at 3pm with Thandi. " * (response_chars // 60),
+        model="llama2",
+        provider="ollama",
+        tokens_used=512,
+        processing_time=1.234,
+        timestamp=datetime.now(),
+        request_id="6f1c2d3e-4b5a-6978-8a9b-0c1d2e3f4a5b",
+        cached=False
+    )
+    health = {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "providers": {
+            "ollama": {"status": "online", "models": 4, "available": 3},
+            "gemini": {"status": "online", "models": 1, "available": 1}
+        },
+        "total_models": 5,
+        "available_models": 4
+    }
+    statuses = [
+        ModelStatus(model=name, provider=provider, status="online", available=True, last_used=datetime.now())
+        for provider, models in AI_MODELS.items()
+        for name in models
+    ]
+    log_record = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "level": "info",
+        "logger": "src.orchestrator",
+        "message": "AI response generated",
+        "module": "orchestrator",
+        "function": "generate_response",
+        "line": 1234,
+        "request_id": response.request_id,
+        "model": "llama2",
+        "processing_time": 1.234
+    }
+    return response, health, statuses, log_record
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Orchestrator serialization benchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--response-chars", type=int, default=2000, help="Length of the generated text in AIResponse")
+    args = parser.parse_args()
+    
+    response, health, statuses, log_record = build_payloads(args.response_chars)
+    
+    cases = [
+        ("AIResponse", {
+            "json.dumps(jsonable_encoder)": lambda: json.dumps(jsonable_encoder(response)).encode(),
+            "model_dump_json": lambda: response.model_dump_json().encode(),
+            "orjson": lambda: dumps(response.model_dump())
+        }),
+        ("health", {
+            "json.dumps(jsonable_encoder)": lambda: json.dumps(jsonable_encoder(health)).encode(),
+            "orjson": lambda: dumps(health)
+        }),
+        ("model statuses", {
+            "json.dumps(jsonable_encoder)": lambda: json.dumps({"models": [jsonable_encoder(s) for s in statuses]}).encode(),
+            "orjson": lambda: dumps({"models": [s.model_dump(mode="json") for s in statuses]})
+        }),
+        ("log record", {
+            "json.dumps x2": lambda: (json.dumps(log_record, default=str), json.dumps(log_record, default=str)),
+            "orjson x1": lambda: dumps(log_record)
+        })
+    ]
+    
+    print(f"{'payload':<16} {'encoder':<30} {'us/op':>8} {'speedup':>8}")
+    for payload, encoders in cases:
+        baseline = None
+        for name, encode in encoders.items():
+            per_op = min(timeit.repeat(encode, number=args.iterations, repeat=3)) / args.iterations * 1e6
+            baseline = baseline or per_op
+            print(f"{payload:<16} {name:<30} {per_op:>8.2f} {baseline / per_op:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Worker Scaling Benchmark for Local AI Orchestrator
+Runs the orchestrator with 1 and N uvicorn workers against a stub Ollama and prints throughput and latency
+
+The stub answers instantly, so the numbers measure the orchestrator's own per-request
+CPU work (request parsing, validation, routing and response serialization) and show
+how much of it extra workers can absorb. Expect real deployments to be bounded by
+Ollama long before this ceiling.
+
+Usage:
+    python benchmarks/workers_benchmark.py --workers 1,4 --requests 2000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Minimal Ollama stand-in, served from this module by a separate uvicorn process
+stub_app = FastAPI()
+
+@stub_app.get("/api/tags")
+async def stub_tags():
+    return {"models": [{"name": "phi3:latest"}, {"name": "llama2:latest"}]}
+
+@stub_app.get("/api/ps")
+async def stub_ps():
+    return {"models": []}
+
+@stub_app.post("/api/generate")
+async def stub_generate():
+    return {"response": "The appointment is confirmed for Friday at 3pm. " * 20, "done": True, "eval_count": 200}
+
+def start_server(app: str, port: int, workers: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT,
+        env=env
+    )
+
+async def wait_until_up(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+async def drive(url: str, total: int, concurrency: int, context_chars: int) -> dict:
+    """Closed-loop load: each client sends its next request as soon as the previous one returns"""
+    body = {
+        "prompt": "Summarise the booking history for this client.",
+        "context": "Previous visit: haircut and colour, paid by card. " * (context_chars // 50),
+        "model": "phi3",
+        "provider": "ollama",
+        "temperature": 0.7
+    }
+    counter = iter(range(total))
+    latencies: List[float] = []
+    errors = 0
+    
+    async with httpx.AsyncClient(timeout=60.0, limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker() -> None:
+            nonlocal errors
+            for _ in counter:
+                start = time.perf_counter()
+                response = await client.post(url, json=body)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+        
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        "throughput": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "errors": errors
+    }
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Orchestrator worker scaling benchmark")
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 2}", help="Comma-separated worker counts")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--context-chars", type=int, default=4000, help="Context size per request, to load JSON/Pydantic work")
+    parser.add_argument("--port", type=int, default=18004)
+    parser.add_argument("--stub-port", type=int, default=18434)
+    args = parser.parse_args()
+    
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(ROOT),
+        OLLAMA_ENDPOINT=f"http://127.0.0.1:{args.stub_port}",
+        # Isolate orchestrator overhead from features that would short-circuit or throttle requests
+        ENABLE_RATE_LIMITING="false",
+        ENABLE_CACHING="false",
+        ENABLE_MODEL_WARMUP="false",
+        ENABLE_MODEL_SCHEDULER="false",
+        MAX_CONCURRENT_REQUESTS="1024",
+        MAX_QUEUE_DEPTH=str(args.requests),
+        LOG_LEVEL="warning"
+    )
+    
+    stub = start_server("benchmarks.workers_benchmark:stub_app", args.stub_port, 1, env)
+    try:
+        await wait_until_up(f"http://127.0.0.1:{args.stub_port}/api/tags")
+        
+        print(f"{'workers':>8} {'req/s':>10} {'p50_ms':>10} {'p95_ms':>10} {'errors':>8}")
+        for workers in [int(value) for value in args.workers.split(",")]:
+            server = start_server("src.orchestrator:app", args.port, workers, env)
+            try:
+                await wait_until_up(f"http://127.0.0.1:{args.port}/health")
+                # Warm every worker's connection pool and registry before measuring
+                await drive(f"http://127.0.0.1:{args.port}/generate", workers * 20, workers * 4, args.context_chars)
+                result = await drive(f"http://127.0.0.1:{args.port}/generate", args.requests, args.concurrency, args.context_chars)
+            finally:
+                server.terminate()
+                server.wait()
+            
+            print(f"{workers:>8} {result['throughput']:>10.1f} {result['p50_ms']:>10.1f} "
+                  f"{result['p95_ms']:>10.1f} {result['errors']:>8}")
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+"""
+Gunicorn Configuration for Local AI Orchestrator
+Runs the FastAPI app on uvicorn workers, one per CPU by default
+
+Usage:
+    gunicorn -c gunicorn.conf.py src.orchestrator:app
+"""
+
+import os
+
+from src.config import resolve_worker_count
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8004')}"
+workers = resolve_worker_count(os.getenv("WORKERS", "auto"))
+
+# Workers are forked from this process, so prometheus_client must see the directory before it is imported here
+if workers > 1:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/local-ai-orchestrator-metrics")
+
+from src.workers import mark_worker_dead, prepare_multiprocess_metrics
+
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Generation requests can legitimately run for minutes
+timeout = int(os.getenv("OLLAMA_TIMEOUT", "300")) + 30
+graceful_timeout = 30
+keepalive = 5
+
+loglevel = os.getenv("LOG_LEVEL", "info")
+accesslog = "-"
+
+def on_starting(server):
+    """Reset the metrics directory before any worker imports prometheus_client"""
+    prepare_multiprocess_metrics(server.cfg.workers)
+
+def child_exit(server, worker):
+    mark_worker_dead(worker.pid)
@@ -0,0 +1,178 @@
+"""
+Admission Control for Local AI Orchestrator
+Per-model concurrency limits with priority queueing and fast load shedding
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Tuple, Any
+
+import structlog
+from prometheus_client import Counter, Histogram, Gauge
+
+# Setup structured logging for admission module
+logger = structlog.get_logger(__name__)
+
+# Prometheus metrics
+ADMISSION_QUEUE_WAIT = Histogram(
+    'ai_admission_queue_wait_seconds',
+    'Time requests wait for an admission slot',
+    ['model', 'provider', 'priority'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+ADMISSION_REJECTIONS = Counter('ai_admission_rejections_total', 'Requests rejected by admission control', ['model', 'provider', 'reason'])
+ADMISSION_QUEUE_DEPTH = Gauge('ai_admission_queue_depth', 'Requests waiting for an admission slot', ['model', 'provider'])
+
+# Lower values are served first
+PRIORITY_LEVELS = {"high": 0, "normal": 1, "low": 2}
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted"""
+    
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class PrioritySemaphore:
+    """Counting semaphore that grants free slots to the highest-priority waiter first"""
+    
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.active = 0
+        self.queued = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+    
+    async def acquire(self, priority: int) -> None:
+        """Wait for a slot; equal priorities are served first-come first-served"""
+        if self.active < self.limit and not self.queued:
+            self.active += 1
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self.queued += 1
+        
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as the waiter gave up
+                self.release()
+            else:
+                future.cancel()
+                self.queued -= 1
+            raise
+    
+    def release(self) -> None:
+        """Return a slot and hand it to the next waiter"""
+        self.active = max(0, self.active - 1)
+        self._wake()
+    
+    def resize(self, limit: int) -> None:
+        """Change the slot count in place, waking waiters if it grew"""
+        self.limit = max(1, limit)
+        self._wake()
+    
+    def _wake(self) -> None:
+        while self._waiters and self.active < self.limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.active += 1
+            self.queued -= 1
+            future.set_result(True)
+
+class AdmissionController:
+    """Admits requests through per-model and global priority semaphores"""
+    
+    def __init__(self, global_limit: int, max_queue_depth: int, queue_timeout: float):
+        self.global_semaphore = PrioritySemaphore(global_limit)
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self.model_semaphores: Dict[Tuple[str, str], PrioritySemaphore] = {}
+        self.logger = logger.bind(component="admission_controller")
+    
+    def _model_semaphore(self, provider: str, model: str, limit: int) -> PrioritySemaphore:
+        key = (provider, model)
+        semaphore = self.model_semaphores.get(key)
+        if semaphore is None:
+            semaphore = self.model_semaphores[key] = PrioritySemaphore(limit)
+        return semaphore
+    
+    def _reject(self, provider: str, model: str, reason: str, message: str, status_code: int) -> AdmissionRejected:
+        ADMISSION_REJECTIONS.labels(model=model, provider=provider, reason=reason).inc()
+        self.logger.warning("Request rejected by admission control", model=model, provider=provider, reason=reason)
+        return AdmissionRejected(message, status_code=status_code, retry_after=max(1, int(self.queue_timeout / 10)))
+    
+    async def _acquire(self, semaphore: PrioritySemaphore, provider: str, model: str, priority: int, deadline: float) -> None:
+        if semaphore.active >= semaphore.limit and semaphore.queued >= self.max_queue_depth:
+            raise self._reject(provider, model, "queue_full", f"Admission queue full for {provider}/{model}", 429)
+        
+        try:
+            await asyncio.wait_for(semaphore.acquire(priority), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise self._reject(provider, model, "queue_timeout", f"Timed out waiting for {provider}/{model}", 503)
+    
+    @asynccontextmanager
+    async def admit(self, provider: str, model: str, priority: str, limit: int):
+        """Hold a model slot and a global slot for the duration of the block"""
+        priority = priority if priority in PRIORITY_LEVELS else "normal"
+        level = PRIORITY_LEVELS[priority]
+        model_semaphore = self._model_semaphore(provider, model, limit)
+        start_time = time.monotonic()
+        deadline = start_time + self.queue_timeout
+        
+        depth = ADMISSION_QUEUE_DEPTH.labels(model=model, provider=provider)
+        depth.inc()
+        try:
+            await self._acquire(model_semaphore, provider, model, level, deadline)
+            try:
+                await self._acquire(self.global_semaphore, provider, model, level, deadline)
+            except BaseException:
+                model_semaphore.release()
+                raise
+        finally:
+            depth.dec()
+        
+        ADMISSION_QUEUE_WAIT.labels(model=model, provider=provider, priority=priority).observe(time.monotonic() - start_time)
+        
+        try:
+            yield
+        finally:
+            self.global_semaphore.release()
+            model_semaphore.release()
+    
+    def resize(self, global_limit: int, max_queue_depth: int, queue_timeout: float) -> None:
+        """Apply new limits in place; requests already queued keep their place"""
+        self.global_semaphore.resize(global_limit)
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+    
+    def resize_provider(self, provider: str, limit: int) -> None:
+        """Resize the per-model semaphores already created for a provider"""
+        for (name, _), semaphore in self.model_semaphores.items():
+            if name == provider:
+                semaphore.resize(limit)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get current slot usage and queue depths"""
+        return {
+            "global": {
+                "active": self.global_semaphore.active,
+                "queued": self.global_semaphore.queued,
+                "limit": self.global_semaphore.limit
+            },
+            "models": {
+                f"{provider}/{model}": {
+                    "active": semaphore.active,
+                    "queued": semaphore.queued,
+                    "limit": semaphore.limit
+                }
+                for (provider, model), semaphore in self.model_semaphores.items()
+            }
+        }
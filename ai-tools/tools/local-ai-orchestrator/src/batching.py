@@ -0,0 +1,111 @@
+"""
+Micro-Batching for Local AI Orchestrator
+Groups same-model requests arriving within a short window into a single provider dispatch
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+import structlog
+from prometheus_client import Histogram
+
+# Setup structured logging for batching module
+logger = structlog.get_logger(__name__)
+
+# Prometheus metrics
+BATCH_SIZE = Histogram(
+    'ai_batch_size',
+    'Requests dispatched per micro-batch',
+    ['model', 'provider'],
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+BATCH_WAIT = Histogram(
+    'ai_batch_wait_seconds',
+    'Time requests wait for their micro-batch to be dispatched',
+    ['model', 'provider'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1)
+)
+
+# (request, future, enqueued_at)
+PendingItem = Tuple[Any, asyncio.Future, float]
+
+class MicroBatcher:
+    """Collects requests per (provider, model) and dispatches them together"""
+    
+    def __init__(self, window_ms: float, max_batch_size: int):
+        self.window = window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self.logger = logger.bind(component="micro_batcher")
+        
+        self._pending: Dict[Tuple[str, str], List[PendingItem]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_requests = 0
+    
+    async def submit(self, provider: Any, request: Any) -> Any:
+        """Queue a request for the next batch to its model and wait for its response"""
+        loop = asyncio.get_running_loop()
+        key = (provider.name, request.model)
+        future = loop.create_future()
+        
+        batch = self._pending.setdefault(key, [])
+        batch.append((request, future, time.monotonic()))
+        
+        if len(batch) >= self.max_batch_size:
+            self._flush(key, provider)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key, provider)
+        
+        return await future
+    
+    def _flush(self, key: Tuple[str, str], provider: Any) -> None:
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        
+        # Callers that gave up while waiting are dropped before dispatch
+        batch = [item for item in self._pending.pop(key, []) if not item[1].done()]
+        if not batch:
+            return
+        
+        task = asyncio.create_task(self._dispatch(provider, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _dispatch(self, provider: Any, batch: List[PendingItem]) -> None:
+        model = batch[0][0].model
+        now = time.monotonic()
+        
+        self.batches += 1
+        self.batched_requests += len(batch)
+        BATCH_SIZE.labels(model=model, provider=provider.name).observe(len(batch))
+        for _, _, enqueued_at in batch:
+            BATCH_WAIT.labels(model=model, provider=provider.name).observe(now - enqueued_at)
+        
+        try:
+            results = await provider.generate_batch([request for request, _, _ in batch])
+        except Exception as e:
+            self.logger.error("Batch dispatch failed", model=model, provider=provider.name, size=len(batch), error=str(e))
+            results = [e] * len(batch)
+        
+        for (_, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, asyncio.CancelledError):
+                future.cancel()
+            elif isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get batching configuration and observed batch sizes"""
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "pending": sum(len(batch) for batch in self._pending.values()),
+            "batches": self.batches,
+            "average_batch_size": self.batched_requests / self.batches if self.batches else 0.0
+        }
@@ -0,0 +1,275 @@
+"""
+Response Cache for Local AI Orchestrator
+Byte-bounded LRU/TTL memory cache with an optional byte-bounded SQLite tier that survives restarts
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Any, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge
+
+# Setup structured logging for cache module
+logger = structlog.get_logger(__name__)
+
+# Prometheus metrics
+CACHE_LOOKUPS = Counter('ai_response_cache_lookups_total', 'Response cache lookups', ['tier', 'result'])
+CACHE_EVICTIONS = Counter('ai_response_cache_evictions_total', 'Response cache evictions', ['reason'])
+CACHE_BYTES = Gauge('ai_response_cache_bytes', 'Bytes held in the in-memory response cache')
+CACHE_DISK_BYTES = Gauge('ai_response_cache_disk_bytes', 'Bytes held in the SQLite response cache')
+
+def make_cache_key(**fields: Any) -> str:
+    """Build a stable hash from request fields"""
+    encoded = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """Tiered response cache: in-process LRU bounded by bytes, then optional shared state and SQLite"""
+    
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        sqlite_path: Optional[str] = None,
+        shared: Optional[Any] = None,
+        sqlite_max_bytes: int = 512 * 1024 * 1024,
+        sweep_interval: float = 60.0
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = sqlite_path or None
+        self.sqlite_max_bytes = sqlite_max_bytes
+        # Expired rows are deleted at least every sweep_interval seconds while the cache is written
+        self.sweep_interval = sweep_interval
+        self.shared = shared
+        self.logger = logger.bind(component="response_cache")
+        
+        # key -> (value, size, expires_at)
+        self._entries: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        # Running estimate of the disk tier's size, re-read from SQLite on every sweep
+        self._disk_bytes = 0
+        self._last_sweep = time.monotonic()
+    
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a cached value, promoting disk hits into memory"""
+        value = self._get_memory(key)
+        if value is not None:
+            self.hits += 1
+            CACHE_LOOKUPS.labels(tier="memory", result="hit").inc()
+            return value
+        
+        # Another worker may already have generated this response
+        if self.shared:
+            try:
+                value = await self.shared.get(f"cache:{key}")
+            except Exception as e:
+                self.logger.error("Response cache shared read failed", error=str(e))
+                value = None
+            
+            if value is not None:
+                self._set_memory(key, value, self.ttl_seconds)
+                self.hits += 1
+                CACHE_LOOKUPS.labels(tier="shared", result="hit").inc()
+                return value
+        
+        if self.sqlite_path:
+            try:
+                row = await asyncio.to_thread(self._db_get, key)
+            except Exception as e:
+                self.logger.error("Response cache disk read failed", error=str(e))
+                row = None
+            
+            if row is not None:
+                value, remaining_ttl = row
+                self._set_memory(key, value, remaining_ttl)
+                self.hits += 1
+                CACHE_LOOKUPS.labels(tier="sqlite", result="hit").inc()
+                return value
+        
+        self.misses += 1
+        CACHE_LOOKUPS.labels(tier="sqlite" if self.sqlite_path else "shared" if self.shared else "memory", result="miss").inc()
+        return None
+    
+    async def set(self, key: str, value: str) -> None:
+        """Store a value in memory and, when configured, on disk"""
+        self._set_memory(key, value, self.ttl_seconds)
+        
+        if self.shared:
+            try:
+                await self.shared.set(f"cache:{key}", value, self.ttl_seconds)
+            except Exception as e:
+                self.logger.error("Response cache shared write failed", error=str(e))
+        
+        if self.sqlite_path:
+            try:
+                await asyncio.to_thread(self._db_set, key, value, time.time() + self.ttl_seconds)
+            except Exception as e:
+                self.logger.error("Response cache disk write failed", error=str(e))
+    
+    def _get_memory(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        value, size, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key, "ttl")
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def _set_memory(self, key: str, value: str, ttl: float) -> None:
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        
+        self._entries[key] = (value, size, time.monotonic() + ttl)
+        self._bytes += size
+        
+        # Evict least recently used entries until back under the byte budget
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest, "size")
+        
+        CACHE_BYTES.set(self._bytes)
+    
+    def _remove(self, key: str, reason: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        self.evictions += 1
+        CACHE_EVICTIONS.labels(reason=reason).inc()
+        CACHE_BYTES.set(self._bytes)
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            Path(self.sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "size INTEGER NOT NULL DEFAULT 0, last_used REAL NOT NULL DEFAULT 0)"
+            )
+            
+            # Caches written before the disk tier was bounded lack the size and recency columns
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(responses)")}
+            if "size" not in columns:
+                self._db.execute("ALTER TABLE responses ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                self._db.execute("UPDATE responses SET size = length(CAST(key AS BLOB)) + length(CAST(value AS BLOB))")
+            if "last_used" not in columns:
+                self._db.execute("ALTER TABLE responses ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            
+            # Drop entries that expired while the service was down
+            self._sweep(self._db)
+        return self._db
+    
+    def _sweep(self, db: sqlite3.Connection) -> None:
+        """Delete expired rows and resynchronise the size estimate; called with the lock held"""
+        expired = db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+        if expired:
+            CACHE_EVICTIONS.labels(reason="ttl").inc(expired)
+        db.commit()
+        
+        self._disk_bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._last_sweep = time.monotonic()
+        CACHE_DISK_BYTES.set(self._disk_bytes)
+    
+    def _evict_disk(self, db: sqlite3.Connection) -> None:
+        """Delete least recently used rows until the disk tier is back under its byte budget"""
+        excess = self._disk_bytes - self.sqlite_max_bytes
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if excess <= 0:
+                break
+            victims.append((key,))
+            excess -= size
+        
+        db.executemany("DELETE FROM responses WHERE key = ?", victims)
+        db.commit()
+        self._disk_bytes = self.sqlite_max_bytes + min(0, excess)
+        self.evictions += len(victims)
+        CACHE_EVICTIONS.labels(reason="disk_size").inc(len(victims))
+        CACHE_DISK_BYTES.set(self._disk_bytes)
+    
+    def _db_get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._db_lock:
+            db = self._connect()
+            row = db.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            
+            value, expires_at = row
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                db.commit()
+                CACHE_EVICTIONS.labels(reason="ttl").inc()
+                return None
+            
+            db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            return value, remaining
+    
+    def _db_set(self, key: str, value: str, expires_at: float) -> None:
+        size = len(key.encode("utf-8")) + len(value.encode("utf-8"))
+        if size > self.sqlite_max_bytes:
+            return
+        
+        with self._db_lock:
+            db = self._connect()
+            previous = db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, value, expires_at, size, time.time())
+            )
+            db.commit()
+            self._disk_bytes += size - (previous[0] if previous else 0)
+            
+            # Other workers may write the same file, so check against the real size before evicting
+            if self._disk_bytes > self.sqlite_max_bytes or time.monotonic() - self._last_sweep >= self.sweep_interval:
+                self._sweep(db)
+            if self._disk_bytes > self.sqlite_max_bytes:
+                self._evict_disk(db)
+    
+    def close(self) -> None:
+        """Close the disk tier"""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get cache occupancy and hit statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "sqlite_path": self.sqlite_path,
+            "sqlite_bytes": self._disk_bytes,
+            "sqlite_max_bytes": self.sqlite_max_bytes,
+            "shared": type(self.shared).__name__ if self.shared else None
+        }
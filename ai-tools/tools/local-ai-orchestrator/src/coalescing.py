@@ -0,0 +1,213 @@
+"""
+Request Coalescing for Local AI Orchestrator
+Single-flight execution so identical in-flight generations share one upstream call
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import structlog
+from prometheus_client import Counter
+
+# Setup structured logging for coalescing module
+logger = structlog.get_logger(__name__)
+
+# Prometheus metrics
+COALESCED_REQUESTS = Counter('ai_coalesced_requests_total', 'Requests that joined an identical in-flight call', ['kind'])
+
+@dataclass
+class _Call:
+    """An in-flight upstream call and the number of callers waiting on it"""
+    task: asyncio.Task
+    waiters: int = 0
+
+class SlowSubscriberError(Exception):
+    """Raised to a stream subscriber that fell too far behind the others and was dropped"""
+
+class StreamFanout:
+    """Shares one upstream stream between subscribers, each reading through a bounded buffer"""
+    
+    def __init__(self, source: AsyncIterator[Any], buffer_size: int = 64, history_size: int = 256,
+                 lag_timeout: float = 10.0):
+        self._source = source
+        self._buffer_size = buffer_size
+        self._history_size = history_size
+        self._lag_timeout = lag_timeout
+        # _items[0] is item number _base; items before the slowest subscriber are trimmed once
+        # the stream outgrows its history
+        self._items: List[Any] = []
+        self._base = 0
+        self._produced = 0
+        self._positions: Dict[int, int] = {}
+        self._dropped: Set[int] = set()
+        self._next_id = 0
+        # Set by a subscriber waiting on the next item, cleared once the pump has read it
+        self._demand = False
+        self._error: Optional[BaseException] = None
+        self._done = False
+        lock = asyncio.Lock()
+        self._readable = asyncio.Condition(lock)
+        self._writable = asyncio.Condition(lock)
+        self._task = asyncio.create_task(self._pump())
+    
+    @property
+    def done(self) -> bool:
+        return self._done
+    
+    @property
+    def joinable(self) -> bool:
+        """Whether a late subscriber can still be replayed the stream from its start"""
+        return not self._done and self._produced <= self._history_size
+    
+    def _lagging(self) -> bool:
+        return self._produced - min(self._positions.values(), default=self._produced) >= self._buffer_size
+    
+    def _trim(self) -> None:
+        if self._produced <= self._history_size:
+            return
+        keep_from = min(self._positions.values(), default=self._produced)
+        del self._items[:keep_from - self._base]
+        self._base = keep_from
+    
+    def _drop_slowest(self) -> None:
+        slowest = min(self._positions.values())
+        for subscriber, position in list(self._positions.items()):
+            if position == slowest:
+                del self._positions[subscriber]
+                self._dropped.add(subscriber)
+        self._trim()
+        logger.warning("Dropped slow stream subscribers", lag=self._produced - slowest)
+        self._readable.notify_all()
+    
+    async def _pump(self) -> None:
+        """Read the next upstream item only once a subscriber is waiting for it"""
+        try:
+            while True:
+                async with self._writable:
+                    # Hold the upstream while the slowest subscriber is a full buffer behind
+                    while not self._demand or self._lagging():
+                        if not self._demand:
+                            await self._writable.wait()
+                            continue
+                        try:
+                            await asyncio.wait_for(self._writable.wait(), self._lag_timeout)
+                        except asyncio.TimeoutError:
+                            self._drop_slowest()
+                
+                item = await self._source.__anext__()
+                
+                async with self._readable:
+                    self._items.append(item)
+                    self._produced += 1
+                    self._demand = False
+                    self._trim()
+                    self._readable.notify_all()
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            self._error = e
+        finally:
+            aclose = getattr(self._source, "aclose", None)
+            if aclose:
+                await aclose()
+            async with self._readable:
+                self._done = True
+                self._readable.notify_all()
+    
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """Yield every item from the start of the upstream stream"""
+        subscriber = self._next_id
+        self._next_id += 1
+        self._positions[subscriber] = 0
+        
+        try:
+            while True:
+                async with self._readable:
+                    while True:
+                        if subscriber in self._dropped:
+                            raise SlowSubscriberError("Stream subscriber fell too far behind")
+                        
+                        position = self._positions[subscriber]
+                        if position < self._produced:
+                            item = self._items[position - self._base]
+                            self._positions[subscriber] = position + 1
+                            self._trim()
+                            self._writable.notify()
+                            break
+                        if self._done:
+                            if self._error is not None:
+                                raise self._error
+                            return
+                        
+                        self._demand = True
+                        self._writable.notify()
+                        await self._readable.wait()
+                
+                yield item
+        finally:
+            self._dropped.discard(subscriber)
+            if self._positions.pop(subscriber, None) is not None and self._positions:
+                async with self._writable:
+                    self._trim()
+                    self._writable.notify()
+            # Stop the upstream call once nobody is listening
+            if not self._positions and not self._task.done():
+                self._task.cancel()
+
+class SingleFlight:
+    """Collapses concurrent identical calls into one shared upstream call"""
+    
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, StreamFanout] = {}
+        self.logger = logger.bind(component="single_flight")
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run fn once per key at a time; returns the result and whether it was shared"""
+        call = self._calls.get(key)
+        shared = call is not None
+        
+        if call is None:
+            call = self._calls[key] = _Call(task=asyncio.create_task(fn()))
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+        else:
+            COALESCED_REQUESTS.labels(kind="response").inc()
+        
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), shared
+        finally:
+            call.waiters -= 1
+            # Only reached with the task pending when every waiter was cancelled
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+    
+    def _finish(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark the exception as retrieved; waiters re-raise it themselves
+        if not call.task.cancelled():
+            call.task.exception()
+    
+    def stream(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Subscribe to the in-flight stream for key, starting it if needed"""
+        fanout = self._streams.get(key)
+        
+        # Streams that have outgrown their replay history start a fresh upstream call
+        if fanout is None or not fanout.joinable:
+            fanout = self._streams[key] = StreamFanout(factory())
+            fanout._task.add_done_callback(
+                lambda task: self._streams.pop(key, None) if self._streams.get(key) is fanout else None
+            )
+        else:
+            COALESCED_REQUESTS.labels(kind="stream").inc()
+        
+        return fanout.subscribe()
+    
+    def get_status(self) -> Dict[str, int]:
+        """Get the number of distinct in-flight calls"""
+        return {
+            "responses": len(self._calls),
+            "streams": len(self._streams)
+        }
@@ -4,18 +4,53 @@ Robust configuration handling with error recovery and validation
 """
 
 import os
+import ipaddress
 import json
 import logging
-from typing import Dict, Any, Optional, List
+import asyncio
+import threading
+from types import MappingProxyType
+from typing import Callable, Dict, Any, Mapping, Optional, List, Tuple
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, replace
 from functools import lru_cache
 import structlog
 
 # Setup structured logging for config module
 logger = structlog.get_logger(__name__)
 
-@dataclass
+def resolve_worker_count(value: str) -> int:
+    """Parse a worker count; "auto" (or 0) uses one worker per CPU available to this process"""
+    if value.strip().lower() not in ("auto", "0", ""):
+        return max(1, int(value))
+    
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return max(1, cpus)
+
+def parse_failover_chains(value: str) -> Dict[str, List[str]]:
+    """Parse "strategy=model,model;strategy=model" into failover chains"""
+    chains = {}
+    for entry in value.split(";"):
+        if "=" not in entry:
+            continue
+        strategy, models = entry.split("=", 1)
+        chains[strategy.strip()] = [model.strip() for model in models.split(",") if model.strip()]
+    return chains
+
+def parse_node_memory(value: str) -> Dict[str, float]:
+    """Parse "url=gb,url=gb" into per-node memory"""
+    memory = {}
+    for entry in value.split(","):
+        if "=" not in entry:
+            continue
+        url, memory_gb = entry.rsplit("=", 1)
+        memory[url.strip().rstrip("/")] = float(memory_gb)
+    return memory
+
+@dataclass(frozen=True)
 class AIProviderConfig:
     """Configuration for AI providers"""
     name: str
@@ -27,9 +62,15 @@ class AIProviderConfig:
     enabled: bool = True
     priority: int = 1
     max_concurrent: int = 5
+    num_parallel: int = 4
+    keep_alive: str = "5m"
+    session_cache_size: int = 1000
+    session_ttl: int = 1800
+    endpoints: List[str] = field(default_factory=list)
+    session_affinity: bool = True
     health_check_interval: int = 30
 
-@dataclass
+@dataclass(frozen=True)
 class ModelConfig:
     """Configuration for AI models"""
     name: str
@@ -42,8 +83,12 @@ class ModelConfig:
     enabled: bool = True
     priority: int = 1
     cost_per_token: float = 0.0
+    
+    def __post_init__(self):
+        # JSON has no tuples; normalise so a saved and re-read config compares equal
+        object.__setattr__(self, "temperature_range", tuple(self.temperature_range))
 
-@dataclass
+@dataclass(frozen=True)
 class ServiceConfig:
     """Main service configuration"""
     environment: str = "production"
@@ -57,11 +102,39 @@ class ServiceConfig:
     rate_limit_per_hour: int = 1000
     request_timeout: int = 300
     max_concurrent_requests: int = 10
+    max_queue_depth: int = 100
+    queue_timeout: int = 30
+    batch_window_ms: float = 0.0
+    max_batch_size: int = 16
+    max_batch_items: int = 10000
+    failover_chains: Dict[str, List[str]] = field(default_factory=dict)
+    hedge_requests: bool = False
+    hedge_min_delay_ms: float = 250.0
+    warmup_enabled: bool = True
+    warmup_interval: int = 300
+    warmup_timeout: int = 30
+    warmup_memory_budget_gb: float = 0.0
+    warmup_ready_priority: int = 1
+    scheduler_enabled: bool = True
+    host_memory_gb: float = 0.0
+    node_memory_gb: Dict[str, float] = field(default_factory=dict)
+    host_memory_reserve_gb: float = 2.0
+    model_traffic_half_life: int = 600
+    rate_limit_enabled: bool = True
+    rate_limit_burst: int = 10
+    rate_limit_max_keys: int = 100000
+    rate_limit_redis_url: str = ""
+    trusted_proxies: List[str] = field(default_factory=list)
+    shared_state_url: str = ""
     health_check_interval: int = 30
+    health_liveness_interval: int = 5
+    health_check_timeout: int = 10
+    config_reload_enabled: bool = True
+    config_reload_interval: float = 2.0
     secret_key: str = ""
     allowed_hosts: List[str] = field(default_factory=lambda: ["localhost", "127.0.0.1"])
 
-@dataclass
+@dataclass(frozen=True)
 class MonitoringConfig:
     """Monitoring and observability configuration"""
     sentry_dsn: str = ""
@@ -72,7 +145,7 @@ class MonitoringConfig:
     health_endpoint_enabled: bool = True
     detailed_metrics: bool = True
 
-@dataclass
+@dataclass(frozen=True)
 class SecurityConfig:
     """Security configuration"""
     enable_auth: bool = False
@@ -83,6 +156,41 @@ class SecurityConfig:
     api_key_required: bool = False
     allowed_ip_ranges: List[str] = field(default_factory=list)
 
+@dataclass(frozen=True)
+class CacheConfig:
+    """Response cache configuration"""
+    enabled: bool = True
+    max_bytes: int = 64 * 1024 * 1024  # 64MB
+    ttl_seconds: int = 3600
+    max_temperature: float = 0.05
+    sqlite_path: str = ""
+    sqlite_max_bytes: int = 512 * 1024 * 1024  # 512MB
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """One immutable generation of the configuration; reloads replace it whole"""
+    service: ServiceConfig
+    providers: Mapping[str, AIProviderConfig]
+    models: Mapping[str, ModelConfig]
+    monitoring: MonitoringConfig
+    security: SecurityConfig
+    cache: CacheConfig
+    version: int = field(default=0, compare=False)
+    source: str = field(default="defaults", compare=False)
+    
+    def changed_sections(self, other: "ConfigSnapshot") -> List[str]:
+        """Names of the sections that differ from other"""
+        return [
+            section.name for section in fields(self)
+            if section.compare and getattr(self, section.name) != getattr(other, section.name)
+        ]
+
+ConfigSubscriber = Callable[[ConfigSnapshot, ConfigSnapshot], None]
+
+def changed_fields(old: Any, new: Any) -> List[str]:
+    """Dataclass fields whose values differ between two versions of a config section"""
+    return [item.name for item in fields(new) if getattr(old, item.name) != getattr(new, item.name)]
+
 class ConfigManager:
     """Robust configuration manager with error recovery"""
     
@@ -94,12 +202,10 @@ class ConfigManager:
         # Ensure config directory exists
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
-        # Initialize configuration
-        self._service_config = None
-        self._provider_configs = {}
-        self._model_configs = {}
-        self._monitoring_config = None
-        self._security_config = None
+        # Readers take the current snapshot with a single attribute read; reloads swap in a new one
+        self._snapshot: ConfigSnapshot = None
+        self._swap_lock = threading.Lock()
+        self._subscribers: List[ConfigSubscriber] = []
         
         # Load configuration with error recovery
         self._load_configuration()
@@ -108,71 +214,113 @@ class ConfigManager:
         """Load configuration with comprehensive error handling"""
         try:
             if self.config_file.exists():
-                with open(self.config_file, 'r') as f:
-                    config_data = json.load(f)
-                
-                self._load_from_dict(config_data)
+                self._snapshot = self._read_file()
                 self.logger.info("Configuration loaded from file", config_file=str(self.config_file))
             else:
                 self.logger.info("Configuration file not found, using defaults")
-                self._load_defaults()
+                self._snapshot = self._load_defaults()
                 
         except json.JSONDecodeError as e:
             self.logger.error("Invalid JSON in configuration file", error=str(e))
-            self._load_defaults()
+            self._snapshot = self._load_defaults()
             
         except Exception as e:
             self.logger.error("Failed to load configuration", error=str(e))
-            self._load_defaults()
+            self._snapshot = self._load_defaults()
     
-    def _load_from_dict(self, config_data: Dict[str, Any]) -> None:
-        """Load configuration from dictionary"""
-        try:
-            # Service configuration
-            service_data = config_data.get("service", {})
-            self._service_config = ServiceConfig(**service_data)
-            
-            # Provider configurations
-            provider_data = config_data.get("providers", {})
-            for name, data in provider_data.items():
-                self._provider_configs[name] = AIProviderConfig(name=name, **data)
-            
-            # Model configurations
-            model_data = config_data.get("models", {})
-            for name, data in model_data.items():
-                self._model_configs[name] = ModelConfig(name=name, **data)
-            
-            # Monitoring configuration
-            monitoring_data = config_data.get("monitoring", {})
-            self._monitoring_config = MonitoringConfig(**monitoring_data)
-            
-            # Security configuration
-            security_data = config_data.get("security", {})
-            self._security_config = SecurityConfig(**security_data)
-            
-        except Exception as e:
-            self.logger.error("Failed to parse configuration data", error=str(e))
-            self._load_defaults()
+    def _read_file(self, version: int = 0) -> ConfigSnapshot:
+        """Parse the configuration file into a snapshot; raises if it is unreadable or malformed"""
+        with open(self.config_file, 'r') as f:
+            config_data = json.load(f)
+        
+        return self._load_from_dict(config_data, version=version)
     
-    def _load_defaults(self) -> None:
+    def _load_from_dict(self, config_data: Dict[str, Any], version: int = 0) -> ConfigSnapshot:
+        """Load configuration from dictionary, layered over the environment defaults"""
+        # Sections and fields the file leaves out keep their defaults, so a file can tune a single limit
+        defaults = self._load_defaults()
+        
+        # Service configuration
+        service = replace(defaults.service, **config_data.get("service", {}))
+        
+        # Provider configurations
+        providers = dict(defaults.providers)
+        for name, data in config_data.get("providers", {}).items():
+            providers[name] = replace(providers[name], **data) if name in providers else AIProviderConfig(name=name, **data)
+        
+        # Model configurations
+        models = dict(defaults.models)
+        for name, data in config_data.get("models", {}).items():
+            models[name] = replace(models[name], **data) if name in models else ModelConfig(name=name, **data)
+        
+        return ConfigSnapshot(
+            service=service,
+            providers=MappingProxyType(providers),
+            models=MappingProxyType(models),
+            monitoring=replace(defaults.monitoring, **config_data.get("monitoring", {})),
+            security=replace(defaults.security, **config_data.get("security", {})),
+            cache=replace(defaults.cache, **config_data.get("cache", {})),
+            version=version,
+            source=str(self.config_file)
+        )
+    
+    def _load_defaults(self) -> ConfigSnapshot:
         """Load default configuration with robust fallbacks"""
         try:
             # Default service configuration
-            self._service_config = ServiceConfig(
+            service = ServiceConfig(
                 environment=os.getenv("ENVIRONMENT", "production"),
                 port=int(os.getenv("PORT", "8004")),
                 host=os.getenv("HOST", "0.0.0.0"),
+                workers=resolve_worker_count(os.getenv("WORKERS", "1")),
                 log_level=os.getenv("LOG_LEVEL", "info"),
                 cors_origins=os.getenv("CORS_ORIGINS", "*").split(","),
+                max_concurrent_requests=int(os.getenv("MAX_CONCURRENT_REQUESTS", "10")),
+                max_queue_depth=int(os.getenv("MAX_QUEUE_DEPTH", "100")),
+                queue_timeout=int(os.getenv("QUEUE_TIMEOUT", "30")),
+                batch_window_ms=float(os.getenv("BATCH_WINDOW_MS", "0")),
+                max_batch_size=int(os.getenv("MAX_BATCH_SIZE", "16")),
+                max_batch_items=int(os.getenv("MAX_BATCH_ITEMS", "10000")),
+                failover_chains=parse_failover_chains(os.getenv("FAILOVER_CHAINS", "")),
+                hedge_requests=os.getenv("HEDGE_REQUESTS", "false").lower() == "true",
+                hedge_min_delay_ms=float(os.getenv("HEDGE_MIN_DELAY_MS", "250")),
+                warmup_enabled=os.getenv("ENABLE_MODEL_WARMUP", "true").lower() == "true",
+                warmup_interval=int(os.getenv("MODEL_WARMUP_INTERVAL", "300")),
+                warmup_timeout=int(os.getenv("MODEL_WARMUP_TIMEOUT", "30")),
+                warmup_memory_budget_gb=float(os.getenv("MODEL_WARMUP_MEMORY_BUDGET_GB", "0")),
+                warmup_ready_priority=int(os.getenv("MODEL_WARMUP_READY_PRIORITY", "1")),
+                scheduler_enabled=os.getenv("ENABLE_MODEL_SCHEDULER", "true").lower() == "true",
+                host_memory_gb=float(os.getenv("HOST_MEMORY_GB", "0")),
+                node_memory_gb=parse_node_memory(os.getenv("OLLAMA_NODE_MEMORY_GB", "")),
+                host_memory_reserve_gb=float(os.getenv("HOST_MEMORY_RESERVE_GB", "2")),
+                model_traffic_half_life=int(os.getenv("MODEL_TRAFFIC_HALF_LIFE", "600")),
+                rate_limit_enabled=os.getenv("ENABLE_RATE_LIMITING", "true").lower() == "true",
+                rate_limit_burst=int(os.getenv("RATE_LIMIT_BURST", "10")),
+                rate_limit_max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000")),
+                rate_limit_redis_url=os.getenv("RATE_LIMIT_REDIS_URL", ""),
+                trusted_proxies=[entry.strip() for entry in os.getenv("TRUSTED_PROXIES", "").split(",") if entry.strip()],
+                shared_state_url=os.getenv("SHARED_STATE_URL", ""),
+                health_check_interval=int(os.getenv("HEALTH_CHECK_INTERVAL", "30")),
+                health_liveness_interval=int(os.getenv("HEALTH_LIVENESS_INTERVAL", "5")),
+                health_check_timeout=int(os.getenv("HEALTH_CHECK_TIMEOUT", "10")),
+                config_reload_enabled=os.getenv("CONFIG_RELOAD_ENABLED", "true").lower() == "true",
+                config_reload_interval=float(os.getenv("CONFIG_RELOAD_INTERVAL", "2")),
                 secret_key=os.getenv("SECRET_KEY", "default-secret-key-change-in-production")
             )
             
             # Default provider configurations
-            self._provider_configs = {
+            providers = {
                 "ollama": AIProviderConfig(
                     name="ollama",
                     endpoint=os.getenv("OLLAMA_ENDPOINT", "http://ollama:11434"),
+                    endpoints=[url.strip() for url in os.getenv("OLLAMA_ENDPOINTS", "").split(",") if url.strip()],
+                    session_affinity=os.getenv("OLLAMA_SESSION_AFFINITY", "true").lower() == "true",
+                    rate_limit_per_minute=int(os.getenv("OLLAMA_RATE_LIMIT_PER_MINUTE", os.getenv("RATE_LIMIT_PER_MINUTE", "60"))),
                     timeout=int(os.getenv("OLLAMA_TIMEOUT", "300")),
+                    num_parallel=int(os.getenv("OLLAMA_NUM_PARALLEL", "4")),
+                    keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+                    session_cache_size=int(os.getenv("OLLAMA_SESSION_CACHE_SIZE", "1000")),
+                    session_ttl=int(os.getenv("OLLAMA_SESSION_TTL", "1800")),
                     enabled=True,
                     priority=1
                 ),
@@ -180,13 +328,15 @@ class ConfigManager:
                     name="gemini",
                     endpoint="https://generativelanguage.googleapis.com/v1beta",
                     timeout=int(os.getenv("GEMINI_TIMEOUT", "60")),
+                    num_parallel=int(os.getenv("GEMINI_NUM_PARALLEL", "16")),
+                    rate_limit_per_minute=int(os.getenv("GEMINI_RATE_LIMIT_PER_MINUTE", os.getenv("RATE_LIMIT_PER_MINUTE", "60"))),
                     enabled=bool(os.getenv("GOOGLE_API_KEY")),
                     priority=2
                 )
             }
             
             # Default model configurations
-            self._model_configs = {
+            models = {
                 "llama2": ModelConfig(
                     name="llama2",
                     provider="ollama",
@@ -218,49 +368,130 @@ class ConfigManager:
             }
             
             # Default monitoring configuration
-            self._monitoring_config = MonitoringConfig(
+            monitoring = MonitoringConfig(
                 sentry_dsn=os.getenv("SENTRY_DSN", ""),
                 sentry_environment=os.getenv("ENVIRONMENT", "production"),
                 prometheus_port=int(os.getenv("PROMETHEUS_PORT", "9090"))
             )
             
             # Default security configuration
-            self._security_config = SecurityConfig(
+            security = SecurityConfig(
                 enable_rate_limiting=os.getenv("ENABLE_RATE_LIMITING", "true").lower() == "true",
                 enable_cors=os.getenv("ENABLE_CORS", "true").lower() == "true"
             )
             
+            # Default cache configuration
+            cache = CacheConfig(
+                enabled=os.getenv("ENABLE_CACHING", "true").lower() == "true",
+                max_bytes=int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+                ttl_seconds=int(os.getenv("CACHE_TTL_SECONDS", "3600")),
+                sqlite_path=os.getenv("CACHE_SQLITE_PATH", ""),
+                sqlite_max_bytes=int(os.getenv("CACHE_SQLITE_MAX_BYTES", str(512 * 1024 * 1024)))
+            )
+            
             self.logger.info("Default configuration loaded")
             
+            return ConfigSnapshot(
+                service=service,
+                providers=MappingProxyType(providers),
+                models=MappingProxyType(models),
+                monitoring=monitoring,
+                security=security,
+                cache=cache
+            )
+            
         except Exception as e:
             self.logger.error("Failed to load default configuration", error=str(e))
             # Use minimal fallback configuration
-            self._service_config = ServiceConfig()
-            self._provider_configs = {}
-            self._model_configs = {}
-            self._monitoring_config = MonitoringConfig()
-            self._security_config = SecurityConfig()
+            return ConfigSnapshot(
+                service=ServiceConfig(),
+                providers=MappingProxyType({}),
+                models=MappingProxyType({}),
+                monitoring=MonitoringConfig(),
+                security=SecurityConfig(),
+                cache=CacheConfig()
+            )
+    
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """The configuration currently in effect"""
+        return self._snapshot
+    
+    def subscribe(self, callback: ConfigSubscriber) -> Callable[[], None]:
+        """Call callback(previous, current) after every applied change; returns an unsubscribe function"""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback) if callback in self._subscribers else None
+    
+    def _swap(self, candidate: ConfigSnapshot) -> Optional[Tuple[ConfigSnapshot, ConfigSnapshot]]:
+        """Atomically replace the current snapshot unless candidate is identical; returns (previous, current)"""
+        with self._swap_lock:
+            previous = self._snapshot
+            if candidate == previous:
+                return None
+            self._snapshot = replace(candidate, version=previous.version + 1)
+            return previous, self._snapshot
+    
+    def _notify(self, previous: ConfigSnapshot, current: ConfigSnapshot) -> None:
+        """Tell subscribers about a swap; one failing subscriber does not stop the others"""
+        for callback in list(self._subscribers):
+            try:
+                callback(previous, current)
+            except Exception as e:
+                self.logger.error("Configuration subscriber failed", subscriber=getattr(callback, "__qualname__", repr(callback)), error=str(e))
+    
+    def apply(self, candidate: ConfigSnapshot) -> Dict[str, Any]:
+        """Validate candidate and, if valid, swap it in and notify subscribers"""
+        validation_results = self.validate_configuration(candidate)
+        if not validation_results["valid"]:
+            self.logger.error("Configuration change rejected", source=candidate.source, errors=validation_results["errors"])
+            return {"applied": False, "version": self._snapshot.version, **validation_results}
+        
+        swapped = self._swap(candidate)
+        if swapped is None:
+            return {"applied": False, "version": self._snapshot.version, "changed": [], **validation_results}
+        
+        previous, current = swapped
+        changed = current.changed_sections(previous)
+        self.logger.info("Configuration reloaded", version=current.version, source=current.source, changed=changed)
+        self._notify(previous, current)
+        return {"applied": True, "version": current.version, "changed": changed, **validation_results}
+    
+    def reload(self) -> Dict[str, Any]:
+        """Re-read the configuration file and apply it; the running configuration stays on any error"""
+        try:
+            candidate = self._read_file() if self.config_file.exists() else self._load_defaults()
+        except Exception as e:
+            self.logger.error("Configuration reload failed, keeping current configuration", error=str(e))
+            return {"applied": False, "version": self._snapshot.version, "valid": False, "errors": [str(e)], "warnings": [], "recommendations": []}
+        
+        return self.apply(candidate)
     
     def save_configuration(self) -> bool:
         """Save current configuration to file with error handling"""
         try:
+            snapshot = self._snapshot
             config_data = {
-                "service": self._service_config.__dict__,
-                "providers": {name: config.__dict__ for name, config in self._provider_configs.items()},
-                "models": {name: config.__dict__ for name, config in self._model_configs.items()},
-                "monitoring": self._monitoring_config.__dict__,
-                "security": self._security_config.__dict__
+                "service": snapshot.service.__dict__,
+                "providers": {name: config.__dict__ for name, config in snapshot.providers.items()},
+                "models": {name: config.__dict__ for name, config in snapshot.models.items()},
+                "monitoring": snapshot.monitoring.__dict__,
+                "security": snapshot.security.__dict__,
+                "cache": snapshot.cache.__dict__
             }
             
+            # Write beside the file first so a watcher never reads a half-written configuration
+            staging_file = self.config_file.with_suffix(".json.tmp")
+            with open(staging_file, 'w') as f:
+                json.dump(config_data, f, indent=2)
+            
             # Create backup of existing configuration
             if self.config_file.exists():
                 backup_file = self.config_file.with_suffix(".json.backup")
-                self.config_file.rename(backup_file)
+                self.config_file.replace(backup_file)
                 self.logger.info("Configuration backed up", backup_file=str(backup_file))
             
             # Write new configuration
-            with open(self.config_file, 'w') as f:
-                json.dump(config_data, f, indent=2)
+            staging_file.replace(self.config_file)
             
             self.logger.info("Configuration saved", config_file=str(self.config_file))
             return True
@@ -272,37 +503,32 @@ class ConfigManager:
     @property
     def service(self) -> ServiceConfig:
         """Get service configuration with error recovery"""
-        if self._service_config is None:
-            self._load_configuration()
-        return self._service_config
+        return self._snapshot.service
     
     @property
-    def providers(self) -> Dict[str, AIProviderConfig]:
+    def providers(self) -> Mapping[str, AIProviderConfig]:
         """Get provider configurations with error recovery"""
-        if not self._provider_configs:
-            self._load_configuration()
-        return self._provider_configs
+        return self._snapshot.providers
     
     @property
-    def models(self) -> Dict[str, ModelConfig]:
+    def models(self) -> Mapping[str, ModelConfig]:
         """Get model configurations with error recovery"""
-        if not self._model_configs:
-            self._load_configuration()
-        return self._model_configs
+        return self._snapshot.models
     
     @property
     def monitoring(self) -> MonitoringConfig:
         """Get monitoring configuration with error recovery"""
-        if self._monitoring_config is None:
-            self._load_configuration()
-        return self._monitoring_config
+        return self._snapshot.monitoring
     
     @property
     def security(self) -> SecurityConfig:
         """Get security configuration with error recovery"""
-        if self._security_config is None:
-            self._load_configuration()
-        return self._security_config
+        return self._snapshot.security
+    
+    @property
+    def cache(self) -> CacheConfig:
+        """Get cache configuration with error recovery"""
+        return self._snapshot.cache
     
     def get_provider_config(self, provider_name: str) -> Optional[AIProviderConfig]:
         """Get specific provider configuration with error handling"""
@@ -326,7 +552,8 @@ class ConfigManager:
             if not isinstance(config, AIProviderConfig):
                 raise ValueError("Invalid provider configuration")
             
-            self._provider_configs[provider_name] = config
+            snapshot = self._snapshot
+            self.apply(replace(snapshot, providers=MappingProxyType({**snapshot.providers, provider_name: config})))
             self.logger.info("Provider configuration updated", provider=provider_name)
             return self.save_configuration()
             
@@ -340,7 +567,8 @@ class ConfigManager:
             if not isinstance(config, ModelConfig):
                 raise ValueError("Invalid model configuration")
             
-            self._model_configs[model_name] = config
+            snapshot = self._snapshot
+            self.apply(replace(snapshot, models=MappingProxyType({**snapshot.models, model_name: config})))
             self.logger.info("Model configuration updated", model=model_name)
             return self.save_configuration()
             
@@ -348,8 +576,9 @@ class ConfigManager:
             self.logger.error("Failed to update model config", model=model_name, error=str(e))
             return False
     
-    def validate_configuration(self) -> Dict[str, Any]:
-        """Validate current configuration and return validation results"""
+    def validate_configuration(self, snapshot: Optional[ConfigSnapshot] = None) -> Dict[str, Any]:
+        """Validate a configuration snapshot (the current one by default) and return validation results"""
+        snapshot = snapshot or self._snapshot
         validation_results = {
             "valid": True,
             "errors": [],
@@ -359,25 +588,46 @@ class ConfigManager:
         
         try:
             # Validate service configuration
-            if self._service_config:
-                if not self._service_config.secret_key or self._service_config.secret_key == "default-secret-key-change-in-production":
-                    validation_results["warnings"].append("Using default secret key - change in production")
-                
-                if self._service_config.environment == "production" and not self._service_config.allowed_hosts:
-                    validation_results["errors"].append("No allowed hosts configured for production")
+            service = snapshot.service
+            if not service.secret_key or service.secret_key == "default-secret-key-change-in-production":
+                validation_results["warnings"].append("Using default secret key - change in production")
+            
+            if service.environment == "production" and not service.allowed_hosts:
+                validation_results["errors"].append("No allowed hosts configured for production")
+            
+            # Limits that are tuned at runtime must stay usable
+            for name in ("max_concurrent_requests", "request_timeout", "queue_timeout", "rate_limit_burst"):
+                if getattr(service, name) < 1:
+                    validation_results["errors"].append(f"service.{name} must be at least 1")
+            if service.max_queue_depth < 0:
+                validation_results["errors"].append("service.max_queue_depth must not be negative")
+            
+            for entry in service.trusted_proxies:
+                try:
+                    ipaddress.ip_network(entry, strict=False)
+                except ValueError:
+                    validation_results["errors"].append(f"service.trusted_proxies: {entry!r} is not an address or CIDR range")
+            
+            if service.scheduler_enabled and service.host_memory_gb <= 0 and not service.node_memory_gb:
+                validation_results["warnings"].append("Model placement disabled: HOST_MEMORY_GB is not set")
             
             # Validate provider configurations
-            enabled_providers = [name for name, config in self._provider_configs.items() if config.enabled]
+            enabled_providers = [name for name, config in snapshot.providers.items() if config.enabled]
             if not enabled_providers:
                 validation_results["errors"].append("No enabled AI providers configured")
             
+            for name, config in snapshot.providers.items():
+                for limit in ("timeout", "max_concurrent", "num_parallel"):
+                    if getattr(config, limit) < 1:
+                        validation_results["errors"].append(f"Provider {name}: {limit} must be at least 1")
+            
             # Validate model configurations
-            enabled_models = [name for name, config in self._model_configs.items() if config.enabled]
+            enabled_models = [name for name, config in snapshot.models.items() if config.enabled]
             if not enabled_models:
                 validation_results["errors"].append("No enabled AI models configured")
             
             # Check for resource requirements
-            for name, config in self._model_configs.items():
+            for name, config in snapshot.models.items():
                 if config.memory_requirement_gb > 8:
                     validation_results["recommendations"].append(f"Model {name} requires high memory ({config.memory_requirement_gb}GB)")
             
@@ -398,7 +648,7 @@ class ConfigManager:
             total_cpu = 0
             enabled_models = []
             
-            for name, config in self._model_configs.items():
+            for name, config in self._snapshot.models.items():
                 if config.enabled:
                     total_memory += config.memory_requirement_gb
                     total_cpu += config.cpu_requirement
@@ -420,6 +670,86 @@ class ConfigManager:
                 "model_count": 0
             }
 
+class ConfigWatcher:
+    """Reloads the configuration file when it changes, via inotify (watchfiles) or by polling its stat"""
+    
+    def __init__(self, manager: ConfigManager, poll_interval: float = 2.0, use_inotify: bool = True):
+        self.manager = manager
+        self.poll_interval = max(0.1, poll_interval)
+        self.use_inotify = use_inotify
+        self.reloads = 0
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.logger = logger.bind(component="config_watcher")
+    
+    def _fingerprint(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self.manager.config_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _reload(self) -> None:
+        self.reloads += 1
+        self.manager.reload()
+    
+    async def _poll(self) -> None:
+        fingerprint = self._fingerprint()
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            current = self._fingerprint()
+            if current != fingerprint and not self._stop.is_set():
+                fingerprint = current
+                self._reload()
+    
+    async def _watch(self, awatch) -> None:
+        # Watch the directory: editors and save_configuration replace the file rather than write in place
+        config_file = self.manager.config_file.resolve()
+        async for changes in awatch(self.manager.config_dir, stop_event=self._stop, debounce=int(self.poll_interval * 1000)):
+            if any(Path(path).resolve() == config_file for _, path in changes):
+                self._reload()
+    
+    async def _run(self) -> None:
+        awatch = None
+        if self.use_inotify:
+            try:
+                # Ships with uvicorn[standard]; polling covers installs without it
+                from watchfiles import awatch
+            except ImportError:
+                self.logger.info("watchfiles not installed, polling the configuration file")
+        
+        try:
+            if awatch is not None:
+                await self._watch(awatch)
+            else:
+                await self._poll()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # e.g. inotify watch limits; fall back rather than stop reloading
+            self.logger.warning("Configuration file watch failed, polling instead", error=str(e))
+            await self._poll()
+    
+    async def start(self) -> None:
+        """Start watching in the background"""
+        if self._task is None:
+            self._stop.clear()
+            self._task = asyncio.create_task(self._run())
+            self.logger.info("Watching configuration file", config_file=str(self.manager.config_file))
+    
+    async def stop(self) -> None:
+        """Stop watching"""
+        if self._task is not None:
+            self._stop.set()
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+            self._task = None
+
 @lru_cache(maxsize=1)
 def get_config_manager() -> ConfigManager:
     """Get singleton config manager instance"""
@@ -433,11 +763,11 @@ def get_service_config() -> ServiceConfig:
     """Get service configuration"""
     return config_manager.service
 
-def get_provider_configs() -> Dict[str, AIProviderConfig]:
+def get_provider_configs() -> Mapping[str, AIProviderConfig]:
     """Get all provider configurations"""
     return config_manager.providers
 
-def get_model_configs() -> Dict[str, ModelConfig]:
+def get_model_configs() -> Mapping[str, ModelConfig]:
     """Get all model configurations"""
     return config_manager.models
 
@@ -449,6 +779,14 @@ def get_security_config() -> SecurityConfig:
     """Get security configuration"""
     return config_manager.security
 
+def get_cache_config() -> CacheConfig:
+    """Get cache configuration"""
+    return config_manager.cache
+
+def get_resource_requirements() -> Dict[str, Any]:
+    """Get total resource requirements of enabled models"""
+    return config_manager.get_resource_requirements()
+
 def validate_current_config() -> Dict[str, Any]:
     """Validate current configuration"""
     return config_manager.validate_configuration()
\ No newline at end of file
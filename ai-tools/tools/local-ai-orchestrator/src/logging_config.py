@@ -5,13 +5,19 @@ Structured logging with error recovery and resilient state management
 
 import logging
 import logging.handlers
-import json
+import random
 import sys
 import os
-from datetime import datetime
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Mapping, Optional, Tuple
 from functools import wraps
+import orjson
 import structlog
 from pythonjsonlogger import jsonlogger
 import asyncio
@@ -19,6 +25,43 @@ import traceback
 from contextlib import contextmanager
 from dataclasses import dataclass, field
 from enum import Enum
+from types import MappingProxyType
+
+# Per-request state lives in context variables, so each asyncio task (and any thread it hands work to)
+# sees only its own request; the request context mapping is built once per request and never mutated
+_NO_REQUEST_CONTEXT: Mapping[str, Any] = MappingProxyType({})
+_correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+_request_context: ContextVar[Mapping[str, Any]] = ContextVar("request_context", default=_NO_REQUEST_CONTEXT)
+
+# Incoming IDs longer than this, or containing control characters, are replaced rather than logged
+_MAX_CORRELATION_ID_LENGTH = 128
+
+def _orjson_dumps(value: Any, **kwargs) -> str:
+    """structlog JSONRenderer serializer; structlog's own fallback is passed as default"""
+    return orjson.dumps(value, default=kwargs.get("default", str), option=orjson.OPT_NON_STR_KEYS).decode()
+
+def _make_json_encoder(name: str) -> Callable[[Dict[str, Any]], str]:
+    """Encoder for JSON log lines: orjson, or msgspec when installed and requested"""
+    if name == "msgspec":
+        try:
+            import msgspec
+            encoder = msgspec.json.Encoder(enc_hook=str)
+            return lambda record: encoder.encode(record).decode()
+        except ImportError:
+            print("msgspec is not installed, encoding log records with orjson", file=sys.stderr)
+    return lambda record: orjson.dumps(record, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+# Attributes every LogRecord carries, plus those Formatters add; anything else came in through `extra`
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse "AI response generated=0.1,Function execution completed=0.01" into event -> keep probability"""
+    rates = {}
+    for entry in value.split(","):
+        if "=" in entry:
+            event, rate = entry.rsplit("=", 1)
+            rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
 
 class LogLevel(Enum):
     """Logging levels"""
@@ -43,6 +86,18 @@ class LogConfig:
     correlation_id_header: str = "X-Correlation-ID"
     request_id_field: str = "request_id"
     user_id_field: str = "user_id"
+    # Background writer: callers only enqueue, a dedicated thread does all disk and console I/O
+    enable_async: bool = True
+    queue_size: int = 10000
+    batch_size: int = 256
+    flush_interval: float = 0.5
+    rotate_interval: float = 0  # seconds; 0 rotates on size only
+    json_encoder: str = "orjson"  # or "msgspec" (optional extra)
+    # Sampling of high-volume events; errors and slow requests are always kept
+    sample_rates: Dict[str, float] = field(default_factory=lambda: parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "")))
+    slow_threshold_seconds: float = field(default_factory=lambda: float(os.getenv("LOG_SLOW_THRESHOLD_SECONDS", "5")))
+    throttle_start: float = 0.5  # queue fill fraction at which info/debug events start being shed
+    min_sample_rate: float = 0.01
 
 class ResilientLogHandler(logging.Handler):
     """Logging handler with error recovery and resilient state management"""
@@ -55,6 +110,17 @@ class ResilientLogHandler(logging.Handler):
         self.last_failure = None
         self.logger = logging.getLogger(self.__class__.__name__)
         
+        # Precomputed per handler so formatting a record does no list building or lowercasing of config
+        self._sensitive_fields = frozenset(name.lower() for name in self.config.sensitive_fields)
+        self._encode_json = _make_json_encoder(self.config.json_encoder)
+        # (millisecond, ISO text) of the last timestamp rendered; records arrive in bursts within one ms
+        self._timestamp_cache: Tuple[int, str] = (-1, "")
+        
+        # The log file stays open between writes; rotation reopens it
+        self._file = None
+        self._file_opened_at = 0.0
+        self._file_lock = threading.Lock()
+        
         # Ensure log directory exists
         if self.config.file_path:
             log_dir = Path(self.config.file_path).parent
@@ -71,10 +137,7 @@ class ResilientLogHandler(logging.Handler):
             formatted_record = self._format_record(record)
             
             # Write to appropriate output
-            if self.config.format == "json":
-                self._write_json_record(formatted_record)
-            else:
-                self._write_plain_record(formatted_record)
+            self.write_records([formatted_record])
             
             # Reset failure count on success
             self.failure_count = 0
@@ -101,7 +164,7 @@ class ResilientLogHandler(logging.Handler):
         if self.config.format == "json":
             # Create structured log entry
             log_entry = {
-                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "timestamp": self._timestamp(record.created) + "Z",
                 "level": record.levelname.lower(),
                 "logger": record.name,
                 "message": record.getMessage(),
@@ -115,60 +178,107 @@ class ResilientLogHandler(logging.Handler):
                 log_entry["exception"] = self._format_exception(record.exc_info)
             
             # Add extra fields
+            sensitive_fields = self._sensitive_fields
             for key, value in record.__dict__.items():
-                if key not in ["name", "msg", "args", "levelname", "levelno", "pathname",
-                              "filename", "module", "lineno", "funcName", "created", "msecs",
-                              "relativeCreated", "thread", "threadName", "processName",
-                              "process", "getMessage", "exc_info", "exc_text", "stack_info"]:
-                    # Sanitize sensitive fields
-                    if key.lower() in [field.lower() for field in self.config.sensitive_fields]:
-                        log_entry[key] = "***REDACTED***"
-                    else:
-                        log_entry[key] = value
+                if key in _RESERVED_ATTRS:
+                    continue
+                # Sanitize sensitive fields
+                log_entry[key] = "***REDACTED***" if key.lower() in sensitive_fields else value
             
             return log_entry
         else:
             # Plain text format
             return {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": self._timestamp(record.created),
                 "level": record.levelname,
                 "logger": record.name,
                 "message": record.getMessage(),
                 "location": f"{record.module}:{record.lineno}"
             }
     
+    def _timestamp(self, created: float) -> str:
+        """UTC ISO timestamp of the record, rendered once per millisecond"""
+        millis = int(created * 1000)
+        cached_millis, text = self._timestamp_cache
+        if millis != cached_millis:
+            text = datetime.fromtimestamp(millis / 1000, tz=timezone.utc).replace(tzinfo=None).isoformat(timespec="milliseconds")
+            # One tuple assignment, so threads formatting concurrently never see a mismatched pair
+            self._timestamp_cache = (millis, text)
+        return text
+    
     def _format_exception(self, exc_info) -> str:
         """Format exception info"""
         return "".join(traceback.format_exception(*exc_info))
     
-    def _write_json_record(self, record: Dict[str, Any]) -> None:
-        """Write JSON formatted record"""
-        if self.config.enable_console and sys.stdout.isatty():
-            print(json.dumps(record, default=str), file=sys.stdout)
+    def _encode_record(self, record: Dict[str, Any]) -> str:
+        """Render a formatted record as one output line"""
+        if self.config.format == "json":
+            return self._encode_json(record)
+        return f"{record['timestamp']} [{record['level'].upper()}] {record['logger']}: {record['message']}"
+    
+    def write_records(self, records: List[Dict[str, Any]]) -> None:
+        """Write formatted records to every destination with one write per destination"""
+        payload = "".join(self._encode_record(record) + "\n" for record in records)
+        
+        # JSON goes to the console only when a human is watching; plain text always does
+        if self.config.enable_console and (self.config.format != "json" or sys.stdout.isatty()):
+            sys.stdout.write(payload)
+            sys.stdout.flush()
         
         if self.config.enable_file and self.config.file_path:
             try:
-                with open(self.config.file_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps(record, default=str) + '\n')
+                with self._file_lock:
+                    self._write_file(payload)
             except Exception:
-                # Fallback to stderr if file write fails
-                print(json.dumps(record, default=str), file=sys.stderr)
+                # Fallback to stderr if file write fails; the file is reopened on the next batch
+                self._close_file()
+                sys.stderr.write(payload)
     
-    def _write_plain_record(self, record: Dict[str, Any]) -> None:
-        """Write plain text formatted record"""
-        formatted = f"{record['timestamp']} [{record['level'].upper()}] {record['logger']}: {record['message']}"
-        
-        if self.config.enable_console:
-            print(formatted, file=sys.stdout)
+    def _write_file(self, payload: str) -> None:
+        """Append to the kept-open log file, rotating first when it is due"""
+        if self._file is None:
+            self._file = open(self.config.file_path, 'a', encoding='utf-8')
+            self._file_opened_at = datetime.now().timestamp()
+        elif self._should_rollover():
+            self._rollover()
         
-        if self.config.enable_file and self.config.file_path:
+        self._file.write(payload)
+        self._file.flush()
+    
+    def _should_rollover(self) -> bool:
+        if self.config.max_file_size and self._file.tell() >= self.config.max_file_size:
+            return True
+        age = datetime.now().timestamp() - self._file_opened_at
+        return bool(self.config.rotate_interval) and age >= self.config.rotate_interval
+    
+    def _rollover(self) -> None:
+        """Shift app.log -> app.log.1 -> ... -> app.log.<backup_count>, dropping the oldest"""
+        self._close_file()
+        path = self.config.file_path
+        if self.config.backup_count > 0:
+            for index in range(self.config.backup_count - 1, 0, -1):
+                source = f"{path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{path}.{index + 1}")
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._file_opened_at = datetime.now().timestamp()
+    
+    def _close_file(self) -> None:
+        if self._file is not None:
             try:
-                with open(self.config.file_path, 'a', encoding='utf-8') as f:
-                    f.write(formatted + '\n')
-            except Exception:
-                print(formatted, file=sys.stderr)
+                self._file.close()
+            finally:
+                self._file = None
+    
+    def close(self) -> None:
+        with self._file_lock:
+            self._close_file()
+        super().close()
     
-    def _handle_log_failure(self, error: Exception, record: logging.LogRecord) -> None:
+    def _handle_log_failure(self, error: Exception, record: Optional[logging.LogRecord]) -> None:
         """Handle logging failures with resilient state management"""
         self.failure_count += 1
         self.last_failure = datetime.now().timestamp()
@@ -177,15 +287,214 @@ class ResilientLogHandler(logging.Handler):
         try:
             fallback_message = f"LOGGING FAILURE #{self.failure_count}: {str(error)}"
             print(f"{datetime.utcnow().isoformat()} CRITICAL logging: {fallback_message}", file=sys.stderr)
-            print(f"Original log: {record.getMessage()}", file=sys.stderr)
+            if record is not None:
+                print(f"Original log: {record.getMessage()}", file=sys.stderr)
         except Exception:
             # If even stderr fails, we're in a bad state
             pass
         
-        # If we've failed too many times, just give up to prevent cascading failures
-        if self.failure_count >= self.max_failures:
-            self.logger.critical("Logging system failure threshold exceeded", 
-                               failures=self.failure_count, error=str(error))
+        # If we've failed too many times, just give up to prevent cascading failures;
+        # reported on stderr since logging through the failing handler would recurse
+        if self.failure_count == self.max_failures:
+            print(f"{datetime.utcnow().isoformat()} CRITICAL logging: failure threshold exceeded, "
+                  f"dropping records for 60s", file=sys.stderr)
+
+class RingBuffer:
+    """Bounded FIFO shared by logging threads and the writer; when full, the oldest entry is dropped"""
+    
+    def __init__(self, maxsize: int, batch_size: int):
+        self.maxsize = max(1, maxsize)
+        self.batch_size = max(1, batch_size)
+        self.dropped = 0
+        self.closed = False
+        self._items: deque = deque()
+        self._in_flight = 0
+        self._condition = threading.Condition()
+    
+    def put_nowait(self, item: Any) -> None:
+        """Enqueue without ever blocking the caller (the QueueHandler contract)"""
+        with self._condition:
+            if len(self._items) >= self.maxsize:
+                # Recent records matter most when diagnosing whatever is flooding the log
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            if len(self._items) >= self.batch_size:
+                self._condition.notify()
+    
+    def get_batch(self, timeout: float) -> List[Any]:
+        """Wait until a full batch is queued, the timeout passes or the buffer closes; then drain up to one batch"""
+        with self._condition:
+            if len(self._items) < self.batch_size and not self.closed:
+                self._condition.wait(timeout)
+            count = min(len(self._items), self.batch_size)
+            batch = [self._items.popleft() for _ in range(count)]
+            self._in_flight += count
+            return batch
+    
+    def task_done(self, count: int) -> None:
+        with self._condition:
+            self._in_flight -= count
+            self._condition.notify_all()
+    
+    def wait_idle(self, timeout: float) -> bool:
+        """Block until everything queued so far has been written"""
+        with self._condition:
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._items and not self._in_flight, timeout)
+    
+    def close(self) -> None:
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+    
+    def __len__(self) -> int:
+        return len(self._items)
+
+class LogSampler:
+    """structlog processor that samples routine events, keeps errors and slow requests, and sheds load when the queue backs up"""
+    
+    # Duration fields on request/timing events, with their factor to seconds
+    DURATION_FIELDS = {"processing_time": 1.0, "execution_time_ms": 0.001}
+    ALWAYS_KEEP_LEVELS = frozenset({"error", "exception", "critical", "fatal"})
+    
+    def __init__(
+        self,
+        sample_rates: Dict[str, float],
+        slow_threshold_seconds: float = 5.0,
+        pressure: Optional[Callable[[], float]] = None,
+        throttle_start: float = 0.5,
+        min_sample_rate: float = 0.01
+    ):
+        self.sample_rates = sample_rates
+        self.slow_threshold_seconds = slow_threshold_seconds
+        self.pressure = pressure
+        self.throttle_start = throttle_start
+        self.min_sample_rate = min_sample_rate
+        # event -> records dropped in total, and since the last kept record of that event
+        self.sampled_out: Dict[str, int] = {}
+        self._pending: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config: LogConfig, pressure: Optional[Callable[[], float]] = None) -> "LogSampler":
+        return cls(
+            config.sample_rates,
+            slow_threshold_seconds=config.slow_threshold_seconds,
+            pressure=pressure,
+            throttle_start=config.throttle_start,
+            min_sample_rate=config.min_sample_rate
+        )
+    
+    def _must_keep(self, method_name: str, event_dict: Dict[str, Any]) -> bool:
+        """Tail sampling: failures and slow requests are the records worth reading"""
+        if method_name in self.ALWAYS_KEEP_LEVELS or "error" in event_dict or event_dict.get("success") is False:
+            return True
+        for key, to_seconds in self.DURATION_FIELDS.items():
+            duration = event_dict.get(key)
+            if isinstance(duration, (int, float)) and duration * to_seconds >= self.slow_threshold_seconds:
+                return True
+        return False
+    
+    def rate_for(self, event: str) -> float:
+        """Keep probability for an event right now, throttled while the handler queue is filling"""
+        rate = self.sample_rates.get(event, 1.0)
+        fill = self.pressure() if self.pressure else 0.0
+        if fill > self.throttle_start:
+            # Scale down linearly from the configured rate at throttle_start to min_sample_rate at a full queue
+            headroom = (1.0 - fill) / (1.0 - self.throttle_start)
+            rate = rate * max(headroom, 0.0)
+        return max(rate, self.min_sample_rate) if rate < 1.0 else 1.0
+    
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        event = str(event_dict.get("event", ""))
+        if self._must_keep(method_name, event_dict):
+            rate = 1.0
+        else:
+            rate = self.rate_for(event)
+            if rate < 1.0 and random.random() >= rate:
+                with self._lock:
+                    self.sampled_out[event] = self.sampled_out.get(event, 0) + 1
+                    self._pending[event] = self._pending.get(event, 0) + 1
+                raise structlog.DropEvent
+        
+        # Kept records carry what was dropped before them, so counting kept + sampled_out stays exact
+        if self._pending.get(event):
+            with self._lock:
+                event_dict["sampled_out"] = self._pending.pop(event, 0)
+        if rate < 1.0:
+            event_dict["sample_rate"] = rate
+        return event_dict
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "sample_rates": self.sample_rates,
+            "slow_threshold_seconds": self.slow_threshold_seconds,
+            "sampled_out": dict(self.sampled_out)
+        }
+
+class BufferedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler over a drop-oldest RingBuffer, drained in batches by a dedicated writer thread"""
+    
+    def __init__(self, config: LogConfig, target: Optional[ResilientLogHandler] = None):
+        super().__init__(RingBuffer(config.queue_size, config.batch_size))
+        self.config = config
+        self.target = target or ResilientLogHandler(config)
+        self._writer = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+        self._writer.start()
+    
+    def prepare(self, record: logging.LogRecord) -> Dict[str, Any]:
+        """Format on the calling thread, so the queued entry no longer references mutable call arguments"""
+        return self.target._format_record(record)
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.target._should_drop_record():
+                return
+            self.enqueue(self.prepare(record))
+        except Exception as e:
+            self.target._handle_log_failure(e, record)
+    
+    def _drain(self) -> None:
+        """Writer thread: the only place log output touches the disk or console"""
+        while True:
+            batch = self.queue.get_batch(self.config.flush_interval)
+            if batch:
+                try:
+                    self.target.write_records(batch)
+                    self.target.failure_count = 0
+                except Exception as e:
+                    self.target._handle_log_failure(e, None)
+                finally:
+                    self.queue.task_done(len(batch))
+            elif self.queue.closed:
+                return
+    
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait for the writer to catch up with everything logged so far"""
+        self.queue.wait_idle(timeout)
+    
+    def close(self) -> None:
+        self.queue.close()
+        self._writer.join(timeout=5.0)
+        self.target.close()
+        super().close()
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self.queue),
+            "capacity": self.queue.maxsize,
+            "dropped_records": self.queue.dropped,
+            "writer_alive": self._writer.is_alive()
+        }
+
+def get_correlation_id() -> Optional[str]:
+    """Correlation ID of the request the caller is running in"""
+    return _correlation_id.get()
+
+def get_request_context() -> Mapping[str, Any]:
+    """Read-only request context of the request the caller is running in"""
+    return _request_context.get()
 
 class CorrelationIdFilter(logging.Filter):
     """Filter to add correlation IDs to log records"""
@@ -193,49 +502,74 @@ class CorrelationIdFilter(logging.Filter):
     def __init__(self, config: LogConfig):
         super().__init__()
         self.config = config
-        self.correlation_id_context = {}
     
     def filter(self, record: logging.LogRecord) -> bool:
         """Add correlation ID to log record"""
-        # Get correlation ID from context variable if available
-        try:
-            correlation_id = getattr(record, 'correlation_id', None)
-            if correlation_id:
-                record.correlation_id = correlation_id
-            else:
-                record.correlation_id = "no-correlation-id"
-        except Exception:
-            record.correlation_id = "error-correlation-id"
+        # An explicit extra= value wins over the request's context
+        if not getattr(record, 'correlation_id', None):
+            record.correlation_id = _correlation_id.get() or "no-correlation-id"
         
         return True
 
 class RequestContextFilter(logging.Filter):
     """Filter to add request context to log records"""
     
+    FIELDS = (
+        ("request_id", "no-request-id"),
+        ("user_id", "no-user-id"),
+        ("endpoint", "no-endpoint"),
+        ("method", "no-method")
+    )
+    
     def __init__(self, config: LogConfig):
         super().__init__()
         self.config = config
     
     def filter(self, record: logging.LogRecord) -> bool:
         """Add request context to log record"""
-        try:
-            # Add request ID if available
-            record.request_id = getattr(record, 'request_id', 'no-request-id')
-            
-            # Add user ID if available
-            record.user_id = getattr(record, 'user_id', 'no-user-id')
-            
-            # Add endpoint info if available
-            record.endpoint = getattr(record, 'endpoint', 'no-endpoint')
-            
-            # Add method info if available
-            record.method = getattr(record, 'method', 'no-method')
-            
-        except Exception:
-            pass
+        context = _request_context.get()
+        for name, default in self.FIELDS:
+            if not getattr(record, name, None):
+                setattr(record, name, context.get(name) or default)
         
         return True
 
+class CorrelationIdMiddleware:
+    """ASGI middleware that scopes a correlation ID and request context to each HTTP and WebSocket connection"""
+    
+    def __init__(self, app, header: str = "X-Correlation-ID"):
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+    
+    def _incoming_id(self, scope) -> Optional[str]:
+        for key, value in scope["headers"]:
+            if key == self.header:
+                correlation_id = value.decode("latin-1")
+                if len(correlation_id) <= _MAX_CORRELATION_ID_LENGTH and correlation_id.isprintable():
+                    return correlation_id
+                return None
+        return None
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        
+        # Each hop gets its own request ID; the correlation ID is propagated from the caller when it sends one
+        request_id = uuid.uuid4().hex
+        correlation_id = self._incoming_id(scope) or request_id
+        header = (self.header, correlation_id.encode("latin-1"))
+        
+        async def send_with_header(message):
+            if message["type"] in ("http.response.start", "websocket.accept"):
+                message["headers"] = [*message.get("headers", ()), header]
+            await send(message)
+        
+        with correlation_context(correlation_id), request_context(
+            request_id, endpoint=scope["path"], method=scope.get("method", "WEBSOCKET")
+        ):
+            await self.app(scope, receive, send_with_header)
+
 class LoggerManager:
     """Comprehensive logger manager with error recovery"""
     
@@ -245,12 +579,8 @@ class LoggerManager:
         self._initialized = False
         self._error_count = 0
         self._max_errors = 5
-        
-        # Correlation ID context
-        self._correlation_context = {}
-        
-        # Request context storage
-        self._request_context = {}
+        self.handler: Optional[logging.Handler] = None
+        self.sampler = LogSampler.from_config(self.config, pressure=self._queue_pressure)
     
     def initialize(self) -> None:
         """Initialize logging system with comprehensive error handling"""
@@ -265,17 +595,17 @@ class LoggerManager:
             # Clear existing handlers
             root_logger.handlers.clear()
             
-            # Add our resilient handler
+            # Add our resilient handler, behind a queue so callers never wait on I/O
             handler = ResilientLogHandler(self.config)
+            if self.config.enable_async:
+                handler = BufferedQueueHandler(self.config, handler)
+            self.handler = handler
             root_logger.addHandler(handler)
             
-            # Add correlation ID filter
-            correlation_filter = CorrelationIdFilter(self.config)
-            root_logger.addFilter(correlation_filter)
-            
-            # Add request context filter
-            request_filter = RequestContextFilter(self.config)
-            root_logger.addFilter(request_filter)
+            # Context filters sit on the handler rather than the root logger so they also see records
+            # propagated from module loggers; they run in the logging thread, where the request's context is set
+            handler.addFilter(CorrelationIdFilter(self.config))
+            handler.addFilter(RequestContextFilter(self.config))
             
             # Configure structlog if enabled
             if self.config.enable_structured:
@@ -296,6 +626,9 @@ class LoggerManager:
             structlog.configure(
                 processors=[
                     structlog.stdlib.filter_by_level,
+                    # Sample before the remaining processors spend time on a record that may be dropped
+                    self.sampler,
+                    structlog.contextvars.merge_contextvars,
                     structlog.stdlib.add_logger_name,
                     structlog.stdlib.add_log_level,
                     structlog.stdlib.PositionalArgumentsFormatter(),
@@ -303,7 +636,7 @@ class LoggerManager:
                     structlog.processors.StackInfoRenderer(),
                     structlog.processors.format_exc_info,
                     structlog.processors.UnicodeDecoder(),
-                    structlog.processors.JSONRenderer() if self.config.format == "json"
+                    structlog.processors.JSONRenderer(serializer=_orjson_dumps) if self.config.format == "json"
                     else structlog.dev.ConsoleRenderer()
                 ],
                 context_class=dict,
@@ -313,6 +646,12 @@ class LoggerManager:
         except Exception as e:
             self.logger.warning("Failed to configure structlog", error=str(e))
     
+    def _queue_pressure(self) -> float:
+        """Fraction of the log queue in use; 0 when writing synchronously"""
+        if isinstance(self.handler, BufferedQueueHandler):
+            return len(self.handler.queue) / self.handler.queue.maxsize
+        return 0.0
+    
     def _configure_logger_levels(self) -> None:
         """Configure specific logger levels"""
         # Set specific logger levels for better observability
@@ -362,16 +701,14 @@ class LoggerManager:
     @contextmanager
     def correlation_context(self, correlation_id: str):
         """Context manager for correlation ID"""
-        old_correlation_id = self._correlation_context.get('current')
-        self._correlation_context['current'] = correlation_id
+        token = _correlation_id.set(correlation_id)
+        bound = structlog.contextvars.bind_contextvars(correlation_id=correlation_id)
         
         try:
             yield
         finally:
-            if old_correlation_id:
-                self._correlation_context['current'] = old_correlation_id
-            else:
-                self._correlation_context.pop('current', None)
+            structlog.contextvars.reset_contextvars(**bound)
+            _correlation_id.reset(token)
     
     @contextmanager
     def request_context(self, request_id: str, user_id: str = None, endpoint: str = None, method: str = None):
@@ -383,24 +720,22 @@ class LoggerManager:
             'method': method
         }
         
-        old_context = self._request_context.get('current', {}).copy()
-        self._request_context['current'] = context
+        token = _request_context.set(MappingProxyType(context))
+        bound = structlog.contextvars.bind_contextvars(**{k: v for k, v in context.items() if v is not None})
         
         try:
             yield
         finally:
-            if old_context:
-                self._request_context['current'] = old_context
-            else:
-                self._request_context.pop('current', None)
+            structlog.contextvars.reset_contextvars(**bound)
+            _request_context.reset(token)
     
     def get_current_correlation_id(self) -> Optional[str]:
         """Get current correlation ID"""
-        return self._correlation_context.get('current')
+        return _correlation_id.get()
     
-    def get_current_request_context(self) -> Dict[str, Any]:
+    def get_current_request_context(self) -> Mapping[str, Any]:
         """Get current request context"""
-        return self._request_context.get('current', {})
+        return _request_context.get()
     
     def log_structured(self, level: str, message: str, **kwargs) -> None:
         """Log structured message with error handling"""
@@ -432,7 +767,7 @@ class LoggerManager:
                 "error_type": type(error).__name__,
                 "error_message": str(error),
                 "correlation_id": self.get_current_correlation_id(),
-                "request_context": self.get_current_request_context(),
+                "request_context": dict(self.get_current_request_context()),
             }
             
             if context:
@@ -462,8 +797,10 @@ class LoggerManager:
                 "enable_console": self.config.enable_console,
                 "enable_file": self.config.enable_file
             },
-            "correlation_context_active": bool(self._correlation_context),
-            "request_context_active": bool(self._request_context)
+            "correlation_context_active": _correlation_id.get() is not None,
+            "request_context_active": bool(_request_context.get()),
+            "queue": self.handler.get_status() if isinstance(self.handler, BufferedQueueHandler) else None,
+            "sampling": self.sampler.get_status()
         }
 
 # Global logger manager instance
@@ -481,6 +818,7 @@ def initialize_logging(config: LogConfig = None) -> None:
     manager = get_logger_manager()
     if config:
         manager.config = config
+        manager.sampler = LogSampler.from_config(config, pressure=manager._queue_pressure)
     manager.initialize()
 
 def get_logger(name: str) -> structlog.BoundLogger:
@@ -498,12 +836,14 @@ def log_error_with_context(error: Exception, context: Dict[str, Any] = None) ->
 @contextmanager
 def correlation_context(correlation_id: str):
     """Context manager for correlation ID"""
-    yield get_logger_manager().correlation_context(correlation_id)
+    with get_logger_manager().correlation_context(correlation_id):
+        yield
 
 @contextmanager
 def request_context(request_id: str, user_id: str = None, endpoint: str = None, method: str = None):
     """Context manager for request context"""
-    yield get_logger_manager().request_context(request_id, user_id, endpoint, method)
+    with get_logger_manager().request_context(request_id, user_id, endpoint, method):
+        yield
 
 def log_execution_time(func):
     """Decorator to log function execution time"""
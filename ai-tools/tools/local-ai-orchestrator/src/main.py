@@ -15,14 +15,13 @@ import structlog
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import CONTENT_TYPE_LATEST
 
 # Import local modules with error handling
 try:
-    from .config import get_config_manager, get_service_config, validate_current_config
-    from .health import health_checker_context, get_service_health, is_service_ready
-    from .logging_config import initialize_logging, get_logger, log_error_with_context
+    from .config import ConfigWatcher, get_config_manager, get_service_config, validate_current_config
+    from .health import health_checker_context, is_service_alive, is_service_ready
+    from .logging_config import CorrelationIdMiddleware, initialize_logging, get_logger, get_logger_manager, log_error_with_context
     from .orchestrator import (
         app as orchestrator_app,
         AIOrchestrator,
@@ -30,12 +29,14 @@ try:
         AIResponse,
         ModelStatus
     )
+    from .serialization import ORJSONResponse
+    from .workers import prepare_multiprocess_metrics, render_metrics
 except ImportError as e:
     # Fallback for direct execution
     try:
-        from config import get_config_manager, get_service_config, validate_current_config
-        from health import health_checker_context, get_service_health, is_service_ready
-        from logging_config import initialize_logging, get_logger, log_error_with_context
+        from config import ConfigWatcher, get_config_manager, get_service_config, validate_current_config
+        from health import health_checker_context, is_service_alive, is_service_ready
+        from logging_config import CorrelationIdMiddleware, initialize_logging, get_logger, get_logger_manager, log_error_with_context
         from orchestrator import (
             app as orchestrator_app,
             AIOrchestrator,
@@ -43,6 +44,8 @@ except ImportError as e:
             AIResponse,
             ModelStatus
         )
+        from serialization import ORJSONResponse
+        from workers import prepare_multiprocess_metrics, render_metrics
     except ImportError as fallback_e:
         print(f"CRITICAL: Failed to import required modules: {e}, {fallback_e}")
         sys.exit(1)
@@ -57,7 +60,9 @@ app_state = {
     "shutdown": False,
     "start_time": None,
     "health_checker": None,
-    "orchestrator": None
+    "orchestrator": None,
+    "config_watcher": None,
+    "config_unsubscribe": None
 }
 
 @asynccontextmanager
@@ -80,14 +85,29 @@ async def lifespan(app: FastAPI):
                         warnings=validation_results["warnings"])
             raise RuntimeError("Invalid configuration")
         
-        # Initialize health checker
-        async with health_checker_context(config_manager.config) as health_checker:
+        # Initialize health checker; its checks run in the background from here on
+        health_config = {
+            "secret_key": service_config.secret_key,
+            "google_api_key": os.getenv("GOOGLE_API_KEY", ""),
+            "ollama_endpoint": config_manager.providers["ollama"].endpoint,
+            "liveness_interval": service_config.health_liveness_interval,
+            "dependency_interval": service_config.health_check_interval,
+            "check_timeout": service_config.health_check_timeout
+        }
+        async with health_checker_context(health_config) as health_checker:
             app_state["health_checker"] = health_checker
             
             # Initialize AI orchestrator
             orchestrator = AIOrchestrator()
+            await orchestrator.start()
             app_state["orchestrator"] = orchestrator
             
+            # Validated edits to the config file are swapped in and applied without a restart
+            app_state["config_unsubscribe"] = config_manager.subscribe(orchestrator.apply_config)
+            if service_config.config_reload_enabled:
+                app_state["config_watcher"] = ConfigWatcher(config_manager, poll_interval=service_config.config_reload_interval)
+                await app_state["config_watcher"].start()
+            
             # Store start time
             app_state["start_time"] = time.time()
             app_state["initialized"] = True
@@ -109,11 +129,21 @@ async def lifespan(app: FastAPI):
         
         try:
             # Perform cleanup
+            if app_state["config_watcher"]:
+                await app_state["config_watcher"].stop()
+                app_state["config_watcher"] = None
+            
+            # Detach from the process-wide config manager so it does not keep this orchestrator alive
+            if app_state["config_unsubscribe"]:
+                app_state["config_unsubscribe"]()
+                app_state["config_unsubscribe"] = None
+            
             if app_state["health_checker"]:
                 logger.info("Cleaning up health checker")
             
             if app_state["orchestrator"]:
                 logger.info("Cleaning up orchestrator")
+                await app_state["orchestrator"].close()
             
             logger.info("Application shutdown completed")
             
@@ -127,6 +157,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -149,11 +180,14 @@ async def cors_middleware(request: Request, call_next):
         
     except Exception as e:
         logger.error("CORS middleware error", error=str(e))
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"detail": "CORS processing failed"}
         )
 
+# Outermost, so every log line a request produces (including CORS failures) carries its correlation ID
+app.add_middleware(CorrelationIdMiddleware, header=get_logger_manager().config.correlation_id_header)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -182,23 +216,29 @@ async def health_check():
     """Comprehensive health check endpoint"""
     try:
         if not app_state["initialized"]:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={"status": "not_initialized", "error": "Service not ready"}
             )
         
-        # Get health from health checker
+        # Serve the snapshot the background checks last published; probes never trigger checks
         if app_state["health_checker"]:
-            health = await get_service_health()
+            health = app_state["health_checker"].snapshot()
+            if health is None:
+                return ORJSONResponse(
+                    status_code=503,
+                    content={"status": "pending", "error": "First health checks still running"}
+                )
             status_code = 200 if health.status.value in ["healthy", "degraded"] else 503
             
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status_code,
                 content={
                     "status": health.status.value,
                     "timestamp": health.timestamp.isoformat(),
                     "uptime_seconds": health.uptime_seconds,
                     "version": health.version,
+                    "duration_ms": health.duration_ms,
                     "checks": [
                         {
                             "name": check.name,
@@ -213,14 +253,14 @@ async def health_check():
                 }
             )
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={"status": "health_checker_not_available"}
             )
             
     except Exception as e:
         logger.error("Health check failed", error=str(e))
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"status": "error", "error": str(e)}
         )
@@ -230,7 +270,7 @@ async def readiness_check():
     """Readiness check for Kubernetes/Docker health checks"""
     try:
         if not app_state["initialized"]:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={"ready": False, "reason": "Service not initialized"}
             )
@@ -238,20 +278,30 @@ async def readiness_check():
         # Quick readiness check
         ready = await is_service_ready()
         
+        # Cold priority models would stall the first requests routed here
+        warmer = app_state["orchestrator"].warmer if app_state["orchestrator"] else None
+        if ready and warmer and not warmer.ready:
+            return ORJSONResponse(
+                status_code=503,
+                content={"ready": False, "reason": "Models warming up", "waiting_for": [
+                    name for name in warmer.required if name not in warmer.resident
+                ]}
+            )
+        
         if ready:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=200,
                 content={"ready": True, "timestamp": time.time()}
             )
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={"ready": False, "reason": "Service not ready"}
             )
             
     except Exception as e:
         logger.error("Readiness check failed", error=str(e))
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"ready": False, "error": str(e)}
         )
@@ -261,19 +311,25 @@ async def liveness_check():
     """Liveness check for Kubernetes/Docker health checks"""
     try:
         if app_state["shutdown"]:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={"alive": False, "reason": "Service shutting down"}
             )
         
-        return JSONResponse(
+        if not await is_service_alive():
+            return ORJSONResponse(
+                status_code=503,
+                content={"alive": False, "reason": "Health check scheduler stalled"}
+            )
+        
+        return ORJSONResponse(
             status_code=200,
             content={"alive": True, "timestamp": time.time()}
         )
         
     except Exception as e:
         logger.error("Liveness check failed", error=str(e))
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"alive": False, "error": str(e)}
         )
@@ -284,7 +340,7 @@ async def service_status():
     """Detailed service status endpoint"""
     try:
         if not app_state["initialized"]:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={"status": "not_initialized"}
             )
@@ -310,18 +366,31 @@ async def service_status():
                 ],
                 "orchestrator": {
                     "providers": list(orchestrator.providers.keys()),
-                    "strategies": list(orchestrator.strategies.keys())
+                    "strategies": list(orchestrator.strategies.keys()),
+                    "model_registry": orchestrator.registry.describe(),
+                    "model_stats": orchestrator.stats.snapshot(),
+                    "admission": orchestrator.admission.get_status(),
+                    "response_cache": orchestrator.cache.get_status() if orchestrator.cache else None,
+                    "in_flight": orchestrator.inflight.get_status(),
+                    "batching": orchestrator.batcher.get_status() if orchestrator.batcher else None,
+                    "circuit_breakers": {key: breaker.state for key, breaker in orchestrator.breakers.items()},
+                    "token_budget": orchestrator.token_budget.get_status(),
+                    "ollama_sessions": orchestrator.providers["ollama"].sessions.get_status(),
+                    "ollama_backends": orchestrator.providers["ollama"].pool.get_status(),
+                    "warmup": orchestrator.warmer.get_status() if orchestrator.warmer else None,
+                    "placement": orchestrator.scheduler.get_status() if orchestrator.scheduler else None,
+                    "rate_limits": orchestrator.rate_limiter.get_status() if orchestrator.rate_limiter else None
                 }
             }
         else:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={"status": "orchestrator_not_available"}
             )
             
     except Exception as e:
         logger.error("Status check failed", error=str(e))
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"status": "error", "error": str(e)}
         )
@@ -332,17 +401,31 @@ async def metrics():
     """Prometheus metrics endpoint"""
     try:
         return Response(
-            generate_latest(),
+            render_metrics(),
             media_type=CONTENT_TYPE_LATEST,
             headers={"Cache-Control": "no-store"}
         )
     except Exception as e:
         logger.error("Metrics generation failed", error=str(e))
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": "Failed to generate metrics"}
         )
 
+# Configuration reload endpoint, for when file watching is disabled or an immediate reload is wanted
+@app.post("/config/reload")
+async def reload_config():
+    """Re-read the configuration file and apply it if it validates"""
+    try:
+        result = get_config_manager().reload()
+        return ORJSONResponse(status_code=200 if result["valid"] else 422, content=result)
+    except Exception as e:
+        logger.error("Configuration reload failed", error=str(e))
+        return ORJSONResponse(
+            status_code=500,
+            content={"applied": False, "error": str(e)}
+        )
+
 # Configuration validation endpoint
 @app.get("/config/validate")
 async def validate_config():
@@ -352,7 +435,7 @@ async def validate_config():
         return validation_results
     except Exception as e:
         logger.error("Configuration validation failed", error=str(e))
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"valid": False, "error": str(e)}
         )
@@ -369,7 +452,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         detail=exc.detail
     )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": {
@@ -399,7 +482,7 @@ async def general_exception_handler(request: Request, exc: Exception):
         "method": request.method
     })
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": {
@@ -437,8 +520,7 @@ async def run_with_graceful_shutdown():
         log_level=config.log_level.lower(),
         access_log=True,
         loop="auto",
-        reload=False,  # Disable reload in production
-        workers=1 if config.environment == "production" else 1
+        reload=False  # Disable reload in production
     )
     
     server = uvicorn.Server(server_config)
@@ -463,6 +545,25 @@ async def run_with_graceful_shutdown():
         
         logger.info("Server shutdown complete")
 
+def run_workers(config) -> None:
+    """Run a pool of worker processes; uvicorn supervises them and forwards shutdown signals"""
+    # Must happen before the workers start so each one writes metrics to the shared directory
+    prepare_multiprocess_metrics(config.workers)
+    
+    if not config.shared_state_url:
+        logger.warning("Running multiple workers without SHARED_STATE_URL; caches, rate limits and model registry are per worker",
+                      workers=config.workers)
+    
+    logger.info("Starting worker pool", host=config.host, port=config.port, workers=config.workers)
+    uvicorn.run(
+        "src.main:app",
+        host=config.host,
+        port=config.port,
+        workers=config.workers,
+        log_level=config.log_level.lower(),
+        access_log=True
+    )
+
 def main():
     """Main entry point"""
     try:
@@ -470,7 +571,11 @@ def main():
         os.environ.setdefault("PYTHONPATH", str(Path(__file__).parent.parent))
         
         # Run application
-        asyncio.run(run_with_graceful_shutdown())
+        config = get_service_config()
+        if config.workers > 1:
+            run_workers(config)
+        else:
+            asyncio.run(run_with_graceful_shutdown())
         
     except KeyboardInterrupt:
         logger.info("Application interrupted by user")
@@ -4,22 +4,24 @@ Hybrid AI orchestration service with Ollama and Gemini 2 Flash integration
 """
 
 import asyncio
+import ipaddress
 import json
 import logging
+import math
 import os
 import time
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional, Union, Any, AsyncGenerator
+from typing import Dict, List, Optional, Set, Tuple, Union, Any, AsyncGenerator
 from pathlib import Path
 
 import httpx
 import structlog
-from fastapi import FastAPI, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse, JSONResponse, Response
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Histogram, Gauge, CONTENT_TYPE_LATEST
 import sentry_sdk
 from sentry_sdk.integrations.fastapi import FastApiIntegration
 from sentry_sdk.integrations.logging import LoggingIntegration
@@ -27,6 +29,54 @@ import uvicorn
 from contextlib import asynccontextmanager
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+try:
+    from .admission import AdmissionController, AdmissionRejected
+    from .batching import MicroBatcher
+    from .cache import ResponseCache, make_cache_key
+    from .coalescing import SingleFlight
+    from .config import (
+        AIProviderConfig, CacheConfig, ConfigSnapshot, ConfigWatcher, ModelConfig, ServiceConfig,
+        changed_fields, get_cache_config, get_config_manager, get_model_configs, get_provider_configs,
+        get_service_config
+    )
+    from .health import CircuitBreaker, CircuitBreakerOpenError
+    from .logging_config import CorrelationIdMiddleware, LogConfig, LogSampler
+    from .placement import PlacementRejected, ResourceScheduler
+    from .pool import BackendPool, NoBackendAvailable
+    from .ratelimit import GCRARateLimiter, LocalGCRAStore, RedisGCRAStore, SharedGCRAStore
+    from .registry import ModelRegistry
+    from .routing import ModelStatsTracker
+    from .serialization import ORJSONResponse, dumps, dumps_text, loads, model_bytes, model_response
+    from .sessions import SessionContextStore
+    from .shared_state import open_shared_state
+    from .tokens import TokenBudget, TokenBudgetExceeded, TokenBudgeter
+    from .warmup import ModelWarmer
+    from .workers import render_metrics
+except ImportError:
+    # Fallback for direct execution
+    from admission import AdmissionController, AdmissionRejected
+    from batching import MicroBatcher
+    from cache import ResponseCache, make_cache_key
+    from coalescing import SingleFlight
+    from config import (
+        AIProviderConfig, CacheConfig, ConfigSnapshot, ConfigWatcher, ModelConfig, ServiceConfig,
+        changed_fields, get_cache_config, get_config_manager, get_model_configs, get_provider_configs,
+        get_service_config
+    )
+    from health import CircuitBreaker, CircuitBreakerOpenError
+    from logging_config import CorrelationIdMiddleware, LogConfig, LogSampler
+    from placement import PlacementRejected, ResourceScheduler
+    from pool import BackendPool, NoBackendAvailable
+    from ratelimit import GCRARateLimiter, LocalGCRAStore, RedisGCRAStore, SharedGCRAStore
+    from registry import ModelRegistry
+    from routing import ModelStatsTracker
+    from serialization import ORJSONResponse, dumps, dumps_text, loads, model_bytes, model_response
+    from sessions import SessionContextStore
+    from shared_state import open_shared_state
+    from tokens import TokenBudget, TokenBudgetExceeded, TokenBudgeter
+    from warmup import ModelWarmer
+    from workers import render_metrics
+
 # Initialize Sentry for error tracking
 sentry_sdk.init(
     dsn=os.getenv("SENTRY_DSN", ""),
@@ -48,24 +98,31 @@ AI_PROCESSING_TIME = Histogram('ai_processing_seconds', 'Time spent processing A
 AI_ERRORS = Counter('ai_errors_total', 'Total AI errors', ['model', 'provider', 'error_type'])
 MODEL_USAGE = Gauge('ai_model_usage_active', 'Active model usage count', ['model', 'provider'])
 ACTIVE_CONNECTIONS = Gauge('active_websocket_connections', 'Active WebSocket connections')
+AI_TIME_TO_FIRST_TOKEN = Histogram('ai_time_to_first_token_seconds', 'Time until the first streamed token', ['model', 'provider'])
+AI_FAILOVERS = Counter('ai_failovers_total', 'Requests moved to the next model in a failover chain', ['from_model', 'to_model'])
+AI_CONTEXT_TRUNCATIONS = Counter('ai_context_truncations_total', 'Requests whose context was trimmed to fit the model window', ['model', 'provider'])
+AI_HEDGED_REQUESTS = Counter('ai_hedged_requests_total', 'Hedge requests fired after the primary exceeded its p95 latency', ['model', 'provider'])
 
-# Setup structured logging
-structlog.configure(
-    processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
-    ],
-    context_class=dict,
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    cache_logger_on_first_use=True,
-)
+# Setup structured logging, unless an entry point (main.py) has configured it already
+if not structlog.is_configured():
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            LogSampler.from_config(LogConfig()),
+            structlog.contextvars.merge_contextvars,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.processors.JSONRenderer()
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        cache_logger_on_first_use=True,
+    )
 
 logger = structlog.get_logger()
 
@@ -137,6 +194,9 @@ AI_MODELS = {
     }
 }
 
+# Output length assumed for routing when a request does not set max_tokens
+ESTIMATED_OUTPUT_TOKENS = 256
+
 class AIRequest(BaseModel):
     prompt: str
     model: str = Field(..., description="AI model to use")
@@ -147,6 +207,9 @@ class AIRequest(BaseModel):
     system_prompt: Optional[str] = None
     context: Optional[str] = None
     priority: str = Field(default="normal", description="Priority: low, normal, high")
+    strategy: Optional[str] = Field(default=None, description="Selection strategy whose failover chain applies")
+    session_id: Optional[str] = Field(default=None, description="Conversation ID; Ollama turns reuse the previous turn's context")
+    keep_alive: Optional[Union[str, int]] = Field(default=None, description="How long Ollama keeps the model loaded, e.g. '30m' or -1")
 
 class AIResponse(BaseModel):
     response: str
@@ -157,6 +220,25 @@ class AIResponse(BaseModel):
     timestamp: datetime
     request_id: str
     confidence_score: Optional[float] = None
+    cached: bool = False
+    prompt_tokens: Optional[int] = None
+    context_tokens_dropped: int = 0
+
+class AIStreamChunk(BaseModel):
+    request_id: str
+    model: str
+    provider: str
+    delta: str
+    done: bool = False
+    tokens_used: int = 0
+    processing_time: float = 0.0
+
+class AIBatchItemResult(BaseModel):
+    index: int
+    request_id: str
+    response: Optional[AIResponse] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
 
 class ModelStatus(BaseModel):
     model: str
@@ -171,67 +253,285 @@ class ModelStatus(BaseModel):
 class AIProvider:
     """Base class for AI providers"""
     
-    def __init__(self, name: str):
+    # Whether the pooled client negotiates HTTP/2 with the upstream
+    http2: bool = False
+    
+    def __init__(self, name: str, config: AIProviderConfig):
         self.name = name
+        self.config = config
         self.logger = logger.bind(provider=name)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._closing: Set[asyncio.Task] = set()
+        # Shared by every batch so concurrent batches together stay within num_parallel
+        self._batch_slots = asyncio.Semaphore(max(1, config.num_parallel))
+    
+    @property
+    def max_concurrent(self) -> int:
+        """Requests per model this provider can serve at once"""
+        return self.config.max_concurrent
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        """Create a pooled HTTP client sized from the provider configuration"""
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(float(self.config.timeout)),
+            limits=httpx.Limits(
+                max_connections=self.max_concurrent,
+                max_keepalive_connections=self.max_concurrent,
+                keepalive_expiry=float(self.config.timeout)
+            ),
+            http2=self.http2
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Long-lived pooled client, created lazily if start() was not called"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+    
+    def reconfigure(self, config: AIProviderConfig) -> None:
+        """Adopt new settings in place, replacing the pooled client only if its size or timeout changed"""
+        sizing = (self.config.timeout, self.max_concurrent)
+        previous = self.config
+        self._apply_endpoints(config)
+        self.config = config
+        if config.num_parallel != previous.num_parallel:
+            self._batch_slots = asyncio.Semaphore(max(1, config.num_parallel))
+        
+        if self._client is not None and (config.timeout, self.max_concurrent) != sizing:
+            retired, self._client = self._client, self._create_client()
+            # Requests already in flight finish on the old pool; close it once none of them can still be running
+            asyncio.get_running_loop().call_later(float(previous.timeout), self._close_retired, retired)
+        
+        self.logger.info("Provider reconfigured", max_connections=self.max_concurrent, timeout=config.timeout)
+    
+    def _apply_endpoints(self, config: AIProviderConfig) -> None:
+        """Hook for providers that route across several backends"""
+    
+    def _close_retired(self, client: httpx.AsyncClient) -> None:
+        task = asyncio.ensure_future(client.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    async def start(self) -> None:
+        """Open the provider connection pool"""
+        self._client = self._create_client()
+        self.logger.info(
+            "Provider connection pool opened",
+            max_connections=self.max_concurrent,
+            timeout=self.config.timeout,
+            http2=self.http2
+        )
+    
+    async def close(self) -> None:
+        """Close the provider connection pool"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            self.logger.info("Provider connection pool closed")
+        self._client = None
     
     async def generate(self, request: AIRequest) -> AIResponse:
         raise NotImplementedError
     
+    async def generate_batch(self, requests: List[AIRequest]) -> List[Union[AIResponse, BaseException]]:
+        """Generate a micro-batch, keeping up to num_parallel requests in flight; failures are returned per item"""
+        # Neither Ollama nor Gemini has a batch endpoint, so each prompt is still its own upstream call
+        slots = self._batch_slots
+        
+        async def run(request: AIRequest) -> AIResponse:
+            async with slots:
+                return await self.generate(request)
+        
+        return await asyncio.gather(*(run(request) for request in requests), return_exceptions=True)
+    
+    async def generate_stream(self, request: AIRequest) -> AsyncGenerator[AIStreamChunk, None]:
+        """Stream response chunks; providers without native streaming emit a single chunk"""
+        response = await self.generate(request)
+        yield AIStreamChunk(
+            request_id=response.request_id,
+            model=response.model,
+            provider=response.provider,
+            delta=response.response,
+            done=True,
+            tokens_used=response.tokens_used,
+            processing_time=response.processing_time
+        )
+    
     async def get_status(self) -> ModelStatus:
         raise NotImplementedError
+    
+    async def check_backends(self) -> None:
+        """Refresh this worker's routing state; providers with a single endpoint have none"""
 
 class OllamaProvider(AIProvider):
     """Ollama local AI provider"""
     
-    def __init__(self):
-        super().__init__("ollama")
-        self.base_url = "http://ollama:11434"
+    def __init__(self, config: Optional[AIProviderConfig] = None):
+        super().__init__("ollama", config or AIProviderConfig(
+            name="ollama",
+            endpoint="http://ollama:11434",
+            timeout=300
+        ))
+        
+        # Ollama nodes, each health-checked and circuit-broken independently
+        self.pool = BackendPool(self.config.endpoints or [self.config.endpoint])
+        
+        # Context tokens per conversation, so follow-up turns send only the new text
+        self.sessions = SessionContextStore(self.config.session_cache_size, self.config.session_ttl)
+        
+        # Set by the orchestrator when model placement is enabled
+        self.scheduler: Optional[ResourceScheduler] = None
+    
+    @property
+    def base_url(self) -> str:
+        """URL of the first configured backend"""
+        return self.pool.backends[0].url
+    
+    @property
+    def max_concurrent(self) -> int:
+        # Each node serves its own share, so capacity grows with the pool
+        return self.config.max_concurrent * len(self.pool.backends)
+    
+    def _apply_endpoints(self, config: AIProviderConfig) -> None:
+        urls = config.endpoints or [config.endpoint]
+        # Rebuilding the ring resets per-node breakers, so only do it when the node list changed
+        if urls != (self.config.endpoints or [self.config.endpoint]):
+            self.pool.set_urls(urls)
+    
+    @asynccontextmanager
+    async def _backend(self, request: AIRequest):
+        """Route a request to a node, pinning sessions to one node so its context stays warm"""
+        session_id = request.session_id if self.config.session_affinity else None
+        try:
+            async with self.pool.acquire(session_id) as backend:
+                if self.scheduler is None:
+                    yield backend
+                else:
+                    # Make memory for the model on this node and pin it resident until the request ends
+                    async with self.scheduler.placement(backend.url, request.model):
+                        yield backend
+        except NoBackendAvailable as e:
+            AI_ERRORS.labels(model=request.model, provider="ollama", error_type="no_backend").inc()
+            raise HTTPException(status_code=503, detail=str(e))
+        except PlacementRejected as e:
+            # 503 lets failover move the request to a model that fits
+            AI_ERRORS.labels(model=request.model, provider="ollama", error_type="placement_rejected").inc()
+            raise HTTPException(status_code=503, detail=str(e))
+    
+    async def _each_backend(self, call) -> List[Any]:
+        """Run a call against every available node; fails only when no node succeeds"""
+        backends = self.pool.available() or self.pool.backends
+        results = await asyncio.gather(*(call(backend.url) for backend in backends), return_exceptions=True)
+        
+        successes = [result for result in results if not isinstance(result, BaseException)]
+        if not successes:
+            raise results[0]
+        return successes
+    
+    def _build_payload(self, request: AIRequest, stream: bool) -> Dict[str, Any]:
+        """Build the Ollama /api/generate payload"""
+        # Prepare the prompt
+        full_prompt = request.prompt
+        if request.context:
+            full_prompt = f"Context:\n{request.context}\n\n{full_prompt}"
+        
+        # A continuing session already holds the system prompt and earlier turns in its context
+        session_context = self.sessions.get(request.session_id, request.model) if request.session_id else None
+        if session_context:
+            full_prompt = f"Human: {full_prompt}\n\nAssistant:"
+        elif request.system_prompt:
+            full_prompt = f"System: {request.system_prompt}\n\nHuman: {full_prompt}\n\nAssistant:"
+        
+        payload = {
+            "model": request.model,
+            "prompt": full_prompt,
+            "stream": stream,
+            "keep_alive": request.keep_alive if request.keep_alive is not None else self.config.keep_alive,
+            "options": {
+                "temperature": request.temperature,
+                "num_predict": request.max_tokens or AI_MODELS["ollama"][request.model]["max_tokens"]
+            }
+        }
+        if session_context:
+            payload["context"] = session_context
+        return payload
+    
+    @staticmethod
+    def base_model_name(name: str) -> str:
+        """Strip the tag Ollama appends to model names, e.g. phi3:latest -> phi3"""
+        return name.split(":", 1)[0]
+    
+    async def _set_keep_alive(self, url: str, model: str, keep_alive: Union[str, int]) -> None:
+        response = await self.client.post(f"{url}/api/generate", json={"model": model, "keep_alive": keep_alive})
+        response.raise_for_status()
+    
+    async def preload(self, model: str) -> None:
+        """Load a model into memory on every node with an empty-prompt generation"""
+        await self._each_backend(lambda url: self._set_keep_alive(url, model, self.config.keep_alive))
+    
+    async def _running_models(self, url: str) -> List[Dict[str, Any]]:
+        response = await self.client.get(f"{url}/api/ps", timeout=10.0)
+        response.raise_for_status()
+        return response.json().get("models", [])
+    
+    async def running_models(self, url: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Models currently loaded in one node's memory, or merged across nodes (largest reported size wins)"""
+        if url:
+            return await self._running_models(url)
+        
+        merged: Dict[str, Dict[str, Any]] = {}
+        for models in await self._each_backend(self._running_models):
+            for info in models:
+                if info.get("size", 0) >= merged.get(info["name"], {}).get("size", 0):
+                    merged[info["name"]] = info
+        return list(merged.values())
+    
+    async def unload(self, model: str, url: Optional[str] = None) -> None:
+        """Release a model's memory on one node, or every node, rather than waiting for keep_alive to lapse"""
+        if url:
+            await self._set_keep_alive(url, model, 0)
+        else:
+            await self._each_backend(lambda url: self._set_keep_alive(url, model, 0))
+    
+    def _remember_context(self, request: AIRequest, result: Dict[str, Any]) -> None:
+        """Store the context Ollama returns with a final response for the session's next turn"""
+        if request.session_id and result.get("context"):
+            self.sessions.set(request.session_id, request.model, result["context"])
     
     async def generate(self, request: AIRequest) -> AIResponse:
         start_time = time.time()
         request_id = str(uuid.uuid4())
         
         try:
-            # Prepare the prompt
-            full_prompt = request.prompt
-            if request.system_prompt:
-                full_prompt = f"System: {request.system_prompt}\n\nHuman: {full_prompt}\n\nAssistant:"
-            
             # Ollama API request
-            payload = {
-                "model": request.model,
-                "prompt": full_prompt,
-                "stream": request.stream,
-                "options": {
-                    "temperature": request.temperature,
-                    "num_predict": request.max_tokens or AI_MODELS["ollama"][request.model]["max_tokens"]
-                }
-            }
+            payload = self._build_payload(request, stream=request.stream)
             
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
+            async with self._backend(request) as backend:
+                response = await self.client.post(
+                    f"{backend.url}/api/generate",
                     json=payload
                 )
                 response.raise_for_status()
+            
+            if request.stream:
+                return await self._handle_streaming_response(response, request, start_time, request_id)
+            else:
+                result = loads(response.content)
+                processing_time = time.time() - start_time
+                self._remember_context(request, result)
                 
-                if request.stream:
-                    return await self._handle_streaming_response(response, request, start_time, request_id)
-                else:
-                    result = response.json()
-                    processing_time = time.time() - start_time
-                    
-                    return AIResponse(
-                        response=result.get("response", ""),
-                        model=request.model,
-                        provider="ollama",
-                        tokens_used=result.get("eval_count", 0),
-                        processing_time=processing_time,
-                        timestamp=datetime.now(),
-                        request_id=request_id
-                    )
-                    
+                return AIResponse(
+                    response=result.get("response", ""),
+                    model=request.model,
+                    provider="ollama",
+                    tokens_used=result.get("eval_count", 0),
+                    processing_time=processing_time,
+                    timestamp=datetime.now(),
+                    request_id=request_id
+                )
+                
+        except HTTPException:
+            raise
         except Exception as e:
             self.logger.error("Ollama generation failed", error=str(e), request_id=request_id)
             AI_ERRORS.labels(model=request.model, provider="ollama", error_type="generation_failed").inc()
@@ -245,11 +545,13 @@ class OllamaProvider(AIProvider):
         async for line in response.aiter_lines():
             if line:
                 try:
-                    data = json.loads(line)
+                    data = loads(line)
                     if "response" in data:
                         content += data["response"]
                     if "eval_count" in data:
                         token_count = data["eval_count"]
+                    if data.get("done"):
+                        self._remember_context(request, data)
                 except json.JSONDecodeError:
                     continue
         
@@ -265,42 +567,129 @@ class OllamaProvider(AIProvider):
             request_id=request_id
         )
     
-    async def get_status(self) -> List[ModelStatus]:
-        """Get status of all Ollama models"""
+    async def generate_stream(self, request: AIRequest) -> AsyncGenerator[AIStreamChunk, None]:
+        """Relay Ollama NDJSON chunks as they arrive"""
+        start_time = time.time()
+        request_id = str(uuid.uuid4())
+        
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
+            payload = self._build_payload(request, stream=True)
+            
+            async with self._backend(request) as backend, \
+                    self.client.stream("POST", f"{backend.url}/api/generate", json=payload) as response:
                 response.raise_for_status()
-                data = response.json()
                 
-                statuses = []
-                for model_info in data.get("models", []):
-                    model_name = model_info["name"]
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        data = loads(line)
+                    except json.JSONDecodeError:
+                        continue
                     
-                    # Check if model is in our config
-                    if model_name in AI_MODELS["ollama"]:
-                        statuses.append(ModelStatus(
-                            model=model_name,
-                            provider="ollama",
-                            status="online",
-                            available=True,
-                            total_requests=0  # Would track this in production
-                        ))
-                
-                return statuses
-                
+                    if data.get("done"):
+                        self._remember_context(request, data)
+                    
+                    yield AIStreamChunk(
+                        request_id=request_id,
+                        model=request.model,
+                        provider="ollama",
+                        delta=data.get("response", ""),
+                        done=data.get("done", False),
+                        tokens_used=data.get("eval_count", 0),
+                        processing_time=time.time() - start_time
+                    )
+                    
+        except HTTPException:
+            raise
         except Exception as e:
-            self.logger.error("Failed to get Ollama status", error=str(e))
-            return []
+            self.logger.error("Ollama streaming failed", error=str(e), request_id=request_id)
+            AI_ERRORS.labels(model=request.model, provider="ollama", error_type="stream_failed").inc()
+            raise HTTPException(status_code=500, detail=f"Ollama streaming failed: {str(e)}")
+    
+    async def _check_backend(self, backend) -> None:
+        """Health-check one node and record the models it serves"""
+        try:
+            response = await self.client.get(f"{backend.url}/api/tags", timeout=10.0)
+            response.raise_for_status()
+            backend.models = [self.base_model_name(info["name"]) for info in response.json().get("models", [])]
+            self.pool.mark_health(backend, True)
+        except Exception as e:
+            self.logger.error("Failed to get Ollama status", backend=backend.url, error=str(e))
+            self.pool.mark_health(backend, False, str(e))
+    
+    async def check_backends(self) -> None:
+        """Health-check every node, updating this worker's pool health and per-node model lists"""
+        await asyncio.gather(*(self._check_backend(backend) for backend in self.pool.backends))
+    
+    async def get_status(self) -> List[ModelStatus]:
+        """Get status of all Ollama models; a model is available while any healthy node serves it"""
+        await self.check_backends()
+        
+        served = {
+            model
+            for backend in self.pool.backends if backend.available
+            for model in backend.models
+        }
+        
+        # Keep config order so strategy tie-breaks stay deterministic
+        return [
+            ModelStatus(
+                model=model_name,
+                provider="ollama",
+                status="online",
+                available=True,
+                total_requests=0  # Would track this in production
+            )
+            for model_name in AI_MODELS["ollama"] if model_name in served
+        ]
 
 class GeminiProvider(AIProvider):
     """Gemini cloud AI provider"""
     
-    def __init__(self):
-        super().__init__("gemini")
+    http2 = True
+    
+    def __init__(self, config: Optional[AIProviderConfig] = None):
+        super().__init__("gemini", config or AIProviderConfig(
+            name="gemini",
+            endpoint="https://generativelanguage.googleapis.com/v1beta",
+            timeout=60,
+            num_parallel=16
+        ))
         self.api_key = os.getenv("GOOGLE_API_KEY")
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
     
+    def _build_payload(self, request: AIRequest) -> Dict[str, Any]:
+        """Build the Gemini generateContent payload"""
+        # Prepare the prompt
+        full_prompt = request.prompt
+        if request.context:
+            full_prompt = f"Context:\n{request.context}\n\n{full_prompt}"
+        if request.system_prompt:
+            full_prompt = f"System: {request.system_prompt}\n\nUser: {full_prompt}"
+        
+        return {
+            "contents": [{
+                "parts": [{"text": full_prompt}]
+            }],
+            "generationConfig": {
+                "temperature": request.temperature,
+                "maxOutputTokens": request.max_tokens or AI_MODELS["gemini"][request.model]["max_tokens"]
+            }
+        }
+    
+    @staticmethod
+    def _extract_text(result: Dict[str, Any]) -> str:
+        """Extract candidate text from a Gemini response payload"""
+        response_text = ""
+        if "candidates" in result and result["candidates"]:
+            candidate = result["candidates"][0]
+            if "content" in candidate and "parts" in candidate["content"]:
+                for part in candidate["content"]["parts"]:
+                    if "text" in part:
+                        response_text += part["text"]
+        return response_text
+    
     async def generate(self, request: AIRequest) -> AIResponse:
         start_time = time.time()
         request_id = str(uuid.uuid4())
@@ -309,63 +698,99 @@ class GeminiProvider(AIProvider):
             raise HTTPException(status_code=500, detail="Google API key not configured")
         
         try:
-            # Prepare the prompt
-            full_prompt = request.prompt
-            if request.system_prompt:
-                full_prompt = f"System: {request.system_prompt}\n\nUser: {full_prompt}"
-            
             # Gemini API request
-            payload = {
-                "contents": [{
-                    "parts": [{"text": full_prompt}]
-                }],
-                "generationConfig": {
-                    "temperature": request.temperature,
-                    "maxOutputTokens": request.max_tokens or AI_MODELS["gemini"][request.model]["max_tokens"]
-                }
-            }
+            payload = self._build_payload(request)
+            
+            response = await self.client.post(
+                f"{self.base_url}/models/{request.model}:generateContent?key={self.api_key}",
+                json=payload,
+                headers={"Content-Type": "application/json"}
+            )
+            response.raise_for_status()
+            
+            result = loads(response.content)
+            processing_time = time.time() - start_time
+            
+            # Extract response text
+            response_text = self._extract_text(result)
+            tokens_used = 0
+            
+            # Get usage metadata
+            if "usageMetadata" in result:
+                tokens_used = result["usageMetadata"].get("totalTokenCount", 0)
+            
+            return AIResponse(
+                response=response_text,
+                model=request.model,
+                provider="gemini",
+                tokens_used=tokens_used,
+                processing_time=processing_time,
+                timestamp=datetime.now(),
+                request_id=request_id
+            )
             
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/models/{request.model}:generateContent?key={self.api_key}",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                
-                result = response.json()
-                processing_time = time.time() - start_time
-                
-                # Extract response text
-                response_text = ""
-                tokens_used = 0
-                
-                if "candidates" in result and result["candidates"]:
-                    candidate = result["candidates"][0]
-                    if "content" in candidate and "parts" in candidate["content"]:
-                        for part in candidate["content"]["parts"]:
-                            if "text" in part:
-                                response_text += part["text"]
-                
-                # Get usage metadata
-                if "usageMetadata" in result:
-                    tokens_used = result["usageMetadata"].get("totalTokenCount", 0)
-                
-                return AIResponse(
-                    response=response_text,
-                    model=request.model,
-                    provider="gemini",
-                    tokens_used=tokens_used,
-                    processing_time=processing_time,
-                    timestamp=datetime.now(),
-                    request_id=request_id
-                )
-                
         except Exception as e:
             self.logger.error("Gemini generation failed", error=str(e), request_id=request_id)
             AI_ERRORS.labels(model=request.model, provider="gemini", error_type="generation_failed").inc()
             raise HTTPException(status_code=500, detail=f"Gemini generation failed: {str(e)}")
     
+    async def generate_stream(self, request: AIRequest) -> AsyncGenerator[AIStreamChunk, None]:
+        """Relay Gemini streamGenerateContent SSE chunks as they arrive"""
+        start_time = time.time()
+        request_id = str(uuid.uuid4())
+        
+        if not self.api_key:
+            raise HTTPException(status_code=500, detail="Google API key not configured")
+        
+        try:
+            payload = self._build_payload(request)
+            tokens_used = 0
+            
+            async with self.client.stream(
+                "POST",
+                f"{self.base_url}/models/{request.model}:streamGenerateContent?alt=sse&key={self.api_key}",
+                json=payload,
+                headers={"Content-Type": "application/json"}
+            ) as response:
+                response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    try:
+                        result = loads(line[len("data:"):])
+                    except json.JSONDecodeError:
+                        continue
+                    
+                    if "usageMetadata" in result:
+                        tokens_used = result["usageMetadata"].get("totalTokenCount", tokens_used)
+                    
+                    delta = self._extract_text(result)
+                    if delta:
+                        yield AIStreamChunk(
+                            request_id=request_id,
+                            model=request.model,
+                            provider="gemini",
+                            delta=delta,
+                            tokens_used=tokens_used,
+                            processing_time=time.time() - start_time
+                        )
+            
+            yield AIStreamChunk(
+                request_id=request_id,
+                model=request.model,
+                provider="gemini",
+                delta="",
+                done=True,
+                tokens_used=tokens_used,
+                processing_time=time.time() - start_time
+            )
+            
+        except Exception as e:
+            self.logger.error("Gemini streaming failed", error=str(e), request_id=request_id)
+            AI_ERRORS.labels(model=request.model, provider="gemini", error_type="stream_failed").inc()
+            raise HTTPException(status_code=500, detail=f"Gemini streaming failed: {str(e)}")
+    
     async def get_status(self) -> List[ModelStatus]:
         """Get status of Gemini models"""
         if not self.api_key:
@@ -390,21 +815,218 @@ class GeminiProvider(AIProvider):
 class AIOrchestrator:
     """Main AI orchestration service"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        provider_configs: Optional[Dict[str, AIProviderConfig]] = None,
+        service_config: Optional[ServiceConfig] = None,
+        cache_config: Optional[CacheConfig] = None,
+        model_configs: Optional[Dict[str, ModelConfig]] = None
+    ):
+        if provider_configs is None:
+            provider_configs = get_provider_configs()
+        if service_config is None:
+            service_config = get_service_config()
+        if cache_config is None:
+            cache_config = get_cache_config()
+        if model_configs is None:
+            model_configs = get_model_configs()
+        
         self.providers = {
-            "ollama": OllamaProvider(),
-            "gemini": GeminiProvider()
+            "ollama": OllamaProvider(provider_configs.get("ollama")),
+            "gemini": GeminiProvider(provider_configs.get("gemini"))
         }
         self.logger = logger.bind(component="ai_orchestrator")
         
+        # State shared by worker processes; None keeps everything in this process
+        self.shared_state = open_shared_state(service_config.shared_state_url)
+        
+        # Cached model availability used by the selection strategies
+        self.registry = ModelRegistry(
+            self.providers,
+            {name: provider.config.health_check_interval for name, provider in self.providers.items()},
+            shared=self.shared_state,
+            status_type=ModelStatus
+        )
+        
+        # Live per-model latency statistics used by adaptive routing
+        self.stats = ModelStatsTracker()
+        
+        # Concurrency limits and priority queueing in front of the providers
+        self.admission = AdmissionController(
+            global_limit=service_config.max_concurrent_requests,
+            max_queue_depth=service_config.max_queue_depth,
+            queue_timeout=service_config.queue_timeout
+        )
+        
+        # Response cache for deterministic (near-zero temperature) requests
+        self.cache_config = cache_config
+        self.cache = ResponseCache(
+            max_bytes=cache_config.max_bytes,
+            ttl_seconds=cache_config.ttl_seconds,
+            sqlite_path=cache_config.sqlite_path,
+            shared=self.shared_state,
+            sqlite_max_bytes=cache_config.sqlite_max_bytes
+        ) if cache_config.enabled else None
+        
+        # Preload priority Ollama models within the memory budget
+        self.warmer = ModelWarmer(
+            self.providers["ollama"],
+            model_configs,
+            memory_budget_gb=service_config.warmup_memory_budget_gb,
+            interval=service_config.warmup_interval,
+            timeout=service_config.warmup_timeout,
+            ready_priority=service_config.warmup_ready_priority
+        ) if service_config.warmup_enabled else None
+        
+        # Keep resident Ollama models within host memory, evicting idle low-traffic ones first
+        memory_requirements = {name: config["memory_requirement_gb"] for name, config in AI_MODELS["ollama"].items()}
+        memory_requirements.update({
+            name: config.memory_requirement_gb
+            for name, config in model_configs.items() if config.provider == "ollama"
+        })
+        self.scheduler = None
+        if service_config.scheduler_enabled and (service_config.host_memory_gb > 0 or service_config.node_memory_gb):
+            self.scheduler = ResourceScheduler(
+                self.providers["ollama"],
+                memory_requirements,
+                host_memory_gb=service_config.host_memory_gb,
+                node_memory_gb=service_config.node_memory_gb,
+                reserve_gb=service_config.host_memory_reserve_gb,
+                half_life=service_config.model_traffic_half_life,
+                refresh_interval=self.providers["ollama"].config.health_check_interval
+            )
+            self.providers["ollama"].scheduler = self.scheduler
+        elif service_config.scheduler_enabled:
+            self.logger.warning("Model placement disabled: set HOST_MEMORY_GB or OLLAMA_NODE_MEMORY_GB to the Ollama nodes' memory")
+        
+        # Never warm more than the scheduler would let stay resident; its capacity is the default budget
+        if self.warmer and self.scheduler:
+            self.warmer.memory_budget_gb = min(self.warmer.memory_budget_gb or self.scheduler.capacity_gb, self.scheduler.capacity_gb)
+        if self.warmer and self.warmer.memory_budget_gb <= 0:
+            self.logger.warning("Model warm-up preloads nothing: set MODEL_WARMUP_MEMORY_BUDGET_GB or HOST_MEMORY_GB")
+        
+        # Prompt token estimates and context trimming against each model's window
+        self.token_budget = TokenBudgeter(AI_MODELS)
+        
+        # Optional micro-batching between admission and the providers
+        self.batcher = MicroBatcher(
+            window_ms=service_config.batch_window_ms,
+            max_batch_size=service_config.max_batch_size
+        ) if service_config.batch_window_ms > 0 else None
+        
+        # Failover chains, hedging and per-model circuit breakers
+        self.failover_chains = service_config.failover_chains
+        self.hedge_requests = service_config.hedge_requests
+        self.hedge_min_delay = service_config.hedge_min_delay_ms / 1000
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        
+        # Bulk requests fan out over at most as many workers as the global admission limit
+        self.batch_concurrency = service_config.max_concurrent_requests
+        self.max_batch_items = service_config.max_batch_items
+        
+        # Single-flight layer shared by concurrent identical requests
+        self.inflight = SingleFlight()
+        
+        # Only these peers may name the client via X-Client-ID or X-Forwarded-For
+        self.trusted_proxies = trusted_networks(service_config.trusted_proxies)
+        
+        # Per-(client, provider, model) limits; Redis or shared state keeps them consistent across workers
+        if service_config.rate_limit_redis_url:
+            rate_limit_store = RedisGCRAStore(service_config.rate_limit_redis_url)
+        elif self.shared_state:
+            rate_limit_store = SharedGCRAStore(self.shared_state)
+        else:
+            rate_limit_store = LocalGCRAStore(service_config.rate_limit_max_keys)
+        self.rate_limiter = GCRARateLimiter(
+            {name: provider.config.rate_limit_per_minute for name, provider in self.providers.items()},
+            burst=service_config.rate_limit_burst,
+            store=rate_limit_store
+        ) if service_config.rate_limit_enabled else None
+        
         # Model selection strategies
         self.strategies = {
             "fastest": self._select_fastest_model,
             "highest_quality": self._select_highest_quality_model,
             "cost_optimized": self._select_cost_optimized_model,
+            "adaptive": self._select_adaptive_model,
             "auto": self._select_auto_model
         }
     
+    async def start(self) -> None:
+        """Open long-lived provider resources"""
+        for provider in self.providers.values():
+            await provider.start()
+        await self.registry.start()
+        if self.scheduler:
+            await self.scheduler.start()
+        if self.warmer:
+            await self.warmer.start()
+    
+    async def close(self) -> None:
+        """Release provider resources"""
+        await self.registry.stop()
+        if self.warmer:
+            await self.warmer.stop()
+        if self.scheduler:
+            await self.scheduler.stop()
+        if self.rate_limiter:
+            await self.rate_limiter.close()
+        if self.cache:
+            self.cache.close()
+        if self.shared_state:
+            await self.shared_state.close()
+        for provider_name, provider in self.providers.items():
+            try:
+                await provider.close()
+            except Exception as e:
+                self.logger.error(f"Failed to close provider {provider_name}", error=str(e))
+    
+    # Service settings apply_config adopts in place; the rest are only read at startup
+    HOT_SERVICE_FIELDS = frozenset({
+        "max_concurrent_requests", "max_queue_depth", "queue_timeout", "rate_limit_burst",
+        "failover_chains", "hedge_requests", "hedge_min_delay_ms", "max_batch_items", "trusted_proxies"
+    })
+    STARTUP_PROVIDER_FIELDS = frozenset({"session_cache_size", "session_ttl", "health_check_interval"})
+    
+    def apply_config(self, previous: ConfigSnapshot, current: ConfigSnapshot) -> None:
+        """Config subscriber: resize limits, pools and rate limits in place without dropping warm state"""
+        service = current.service
+        self.admission.resize(service.max_concurrent_requests, service.max_queue_depth, service.queue_timeout)
+        self.batch_concurrency = service.max_concurrent_requests
+        self.max_batch_items = service.max_batch_items
+        self.failover_chains = service.failover_chains
+        self.hedge_requests = service.hedge_requests
+        self.hedge_min_delay = service.hedge_min_delay_ms / 1000
+        self.trusted_proxies = trusted_networks(service.trusted_proxies)
+        
+        restart_required = [
+            f"service.{name}" for name in changed_fields(previous.service, service)
+            if name not in self.HOT_SERVICE_FIELDS
+        ]
+        for name, provider in self.providers.items():
+            config = current.providers.get(name)
+            if config is None or config == provider.config:
+                continue
+            restart_required.extend(
+                f"providers.{name}.{field}" for field in changed_fields(provider.config, config)
+                if field in self.STARTUP_PROVIDER_FIELDS
+            )
+            provider.reconfigure(config)
+            self.admission.resize_provider(name, provider.max_concurrent)
+        
+        if self.rate_limiter:
+            self.rate_limiter.update_limits(
+                {name: provider.config.rate_limit_per_minute for name, provider in self.providers.items()},
+                service.rate_limit_burst
+            )
+        
+        restart_required.extend(
+            section for section in current.changed_sections(previous) if section not in ("service", "providers")
+        )
+        if restart_required:
+            self.logger.warning("Configuration changes need a restart to take effect", fields=restart_required)
+        self.logger.info("Configuration applied", version=current.version)
+    
     async def generate_response(self, request: AIRequest) -> AIResponse:
         """Generate AI response using specified or optimal model"""
         start_time = time.time()
@@ -414,19 +1036,33 @@ class AIOrchestrator:
         MODEL_USAGE.labels(model=request.model, provider=request.provider).inc()
         
         try:
-            # Get provider
-            provider = self.providers.get(request.provider)
-            if not provider:
-                raise HTTPException(status_code=400, detail=f"Unsupported provider: {request.provider}")
+            self._get_provider(request)
             
-            # Validate model
-            if request.model not in AI_MODELS.get(request.provider, {}):
-                raise HTTPException(status_code=400, detail=f"Model {request.model} not available for provider {request.provider}")
+            # Fit the prompt to the model's window before anything touches the network
+            request, budget = self._fit_to_context(request)
+            token_counts = {
+                "prompt_tokens": budget.prompt_tokens,
+                "context_tokens_dropped": budget.context_tokens_dropped
+            }
             
-            # Generate response
-            response = await provider.generate(request)
+            # Serve deterministic requests from cache without touching the provider
+            cache_key = self._cache_key(request)
+            if cache_key:
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    return AIResponse.model_validate_json(cached).model_copy(update={
+                        "cached": True,
+                        "processing_time": time.time() - start_time,
+                        "timestamp": datetime.now(),
+                        "request_id": str(uuid.uuid4()),
+                        **token_counts
+                    })
+            
+            response, shared = await self._generate_with_failover(request)
+            if shared:
+                token_counts["request_id"] = str(uuid.uuid4())
+            response = response.model_copy(update=token_counts)
             
-            # Update processing time metric
             processing_time = time.time() - start_time
             AI_PROCESSING_TIME.labels(model=request.model, provider=request.provider).observe(processing_time)
             
@@ -435,7 +1071,9 @@ class AIOrchestrator:
                 model=request.model,
                 provider=request.provider,
                 processing_time=processing_time,
-                request_id=response.request_id
+                request_id=response.request_id,
+                served_by=response.model,
+                coalesced=shared
             )
             
             return response
@@ -446,9 +1084,352 @@ class AIOrchestrator:
         finally:
             MODEL_USAGE.labels(model=request.model, provider=request.provider).dec()
     
+    async def generate_stream(self, request: AIRequest) -> AsyncGenerator[AIStreamChunk, None]:
+        """Stream AI response chunks as the provider produces them"""
+        start_time = time.time()
+        first_token = True
+        
+        LOCAL_AI_REQUESTS.labels(model=request.model, provider=request.provider).inc()
+        MODEL_USAGE.labels(model=request.model, provider=request.provider).inc()
+        
+        try:
+            provider = self._get_provider(request)
+            request, _ = self._fit_to_context(request)
+            
+            # Identical concurrent streams are fanned out from one upstream stream
+            stream = self.inflight.stream(
+                self._request_key(request),
+                lambda: self._stream_upstream(request, provider)
+            )
+            async for chunk in stream:
+                if first_token and chunk.delta:
+                    first_token = False
+                    AI_TIME_TO_FIRST_TOKEN.labels(model=request.model, provider=request.provider).observe(time.time() - start_time)
+                yield chunk
+            
+            processing_time = time.time() - start_time
+            AI_PROCESSING_TIME.labels(model=request.model, provider=request.provider).observe(processing_time)
+            
+            self.logger.info(
+                "AI response streamed",
+                model=request.model,
+                provider=request.provider,
+                processing_time=processing_time
+            )
+            
+        except Exception as e:
+            self.logger.error("AI streaming generation failed", error=str(e))
+            raise
+        finally:
+            MODEL_USAGE.labels(model=request.model, provider=request.provider).dec()
+    
+    async def run_batch(self, requests: List[AIRequest], client_id: Optional[str] = None) -> AsyncGenerator[AIBatchItemResult, None]:
+        """Generate a list of requests concurrently, yielding each result as it completes"""
+        results: asyncio.Queue = asyncio.Queue()
+        pending = iter(enumerate(requests))
+        
+        async def worker() -> None:
+            for index, request in pending:
+                results.put_nowait(await self._run_batch_item(index, request, client_id))
+        
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.batch_concurrency, len(requests)))]
+        try:
+            for _ in range(len(requests)):
+                yield await results.get()
+        finally:
+            # Stop scheduling work if the consumer goes away early
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    
+    async def _run_batch_item(self, index: int, request: AIRequest, client_id: Optional[str] = None) -> AIBatchItemResult:
+        """Generate one batch item, reporting failures in the result instead of raising"""
+        request.stream = False
+        try:
+            if request.model == "auto":
+                request = await self.auto_select_model(request)
+            if client_id:
+                await self.check_rate_limit(client_id, request)
+            response = await self.generate_response(request)
+            return AIBatchItemResult(index=index, request_id=response.request_id, response=response)
+        except HTTPException as e:
+            return AIBatchItemResult(index=index, request_id=str(uuid.uuid4()), error=str(e.detail), status_code=e.status_code)
+        except Exception as e:
+            return AIBatchItemResult(index=index, request_id=str(uuid.uuid4()), error=str(e), status_code=500)
+    
+    def _fit_to_context(self, request: AIRequest) -> Tuple[AIRequest, TokenBudget]:
+        """Trim context to the model's window, rejecting prompts that cannot fit at all"""
+        # Ollama prepends a continuing session's stored context tokens, so they count against the window too
+        sessions = self.providers["ollama"].sessions if request.provider == "ollama" and request.session_id else None
+        session_tokens = sessions.token_count(request.session_id, request.model) if sessions else 0
+        
+        try:
+            budget = self.token_budget.fit(
+                request.provider,
+                request.model,
+                request.prompt,
+                system_prompt=request.system_prompt,
+                context=request.context,
+                max_tokens=request.max_tokens,
+                session_tokens=session_tokens
+            )
+        except TokenBudgetExceeded as e:
+            AI_ERRORS.labels(model=request.model, provider=request.provider, error_type="context_overflow").inc()
+            raise HTTPException(status_code=413, detail=str(e))
+        
+        if budget.session_reset:
+            # Ollama would silently drop the front of the context, system prompt first; start the session over instead
+            sessions.reset(request.session_id, request.model)
+            AI_CONTEXT_TRUNCATIONS.labels(model=request.model, provider=request.provider).inc()
+            self.logger.warning(
+                "Session context would overflow model window, starting a fresh session",
+                model=request.model,
+                session_id=request.session_id,
+                session_tokens=session_tokens
+            )
+        
+        if budget.truncated:
+            AI_CONTEXT_TRUNCATIONS.labels(model=request.model, provider=request.provider).inc()
+            self.logger.info(
+                "Context trimmed to fit model window",
+                model=request.model,
+                provider=request.provider,
+                dropped_tokens=budget.context_tokens_dropped
+            )
+            request = request.model_copy(update={"context": budget.context})
+        
+        return request, budget
+    
+    def _breaker(self, provider_name: str, model: str) -> CircuitBreaker:
+        """Circuit breaker guarding one provider/model pair"""
+        key = f"{provider_name}/{model}"
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker()
+        return breaker
+    
+    def _failover_candidates(self, request: AIRequest) -> List[AIRequest]:
+        """The request followed by its failover chain, skipping models whose circuit is open"""
+        chain = self.failover_chains.get(request.strategy or "default") or self.failover_chains.get("default", [])
+        candidates = [request]
+        
+        for model in chain:
+            provider_name = next((name for name, models in AI_MODELS.items() if model in models), None)
+            if provider_name is None or any(candidate.model == model for candidate in candidates):
+                continue
+            
+            # Fallbacks with a smaller window get their own trim, or are skipped if the prompt cannot fit
+            try:
+                candidate, _ = self._fit_to_context(request.model_copy(update={"model": model, "provider": provider_name}))
+            except HTTPException:
+                continue
+            candidates.append(candidate)
+        
+        return [
+            candidate for candidate in candidates
+            if self._breaker(candidate.provider, candidate.model).allows_request
+        ]
+    
+    @staticmethod
+    def _can_fail_over(error: BaseException) -> bool:
+        """Client errors are final; provider failures, overload and open circuits are not"""
+        if isinstance(error, HTTPException):
+            return error.status_code >= 500 or error.status_code == 429
+        return True
+    
+    async def _generate_attempt(self, request: AIRequest) -> Tuple[AIResponse, bool]:
+        """One attempt against a single model; identical concurrent attempts share an upstream call"""
+        provider = self.providers[request.provider]
+        cache_key = self._cache_key(request)
+        return await self.inflight.do(
+            self._request_key(request),
+            lambda: self._generate_upstream(request, provider, cache_key)
+        )
+    
+    async def _generate_with_failover(self, request: AIRequest) -> Tuple[AIResponse, bool]:
+        """Try the request's failover chain in order, hedging slow primaries when enabled"""
+        candidates = self._failover_candidates(request)
+        if not candidates:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Circuit open for {request.provider}/{request.model} and every failover model"
+            )
+        
+        attempts: Dict[asyncio.Task, AIRequest] = {}
+        last_error: Optional[BaseException] = None
+        hedged = False
+        
+        def launch() -> AIRequest:
+            candidate = candidates.pop(0)
+            attempts[asyncio.create_task(self._generate_attempt(candidate))] = candidate
+            return candidate
+        
+        primary = launch()
+        try:
+            while attempts:
+                # Hedge once: fire the next model if the primary outlives its p95 latency
+                timeout = None
+                if self.hedge_requests and not hedged and candidates:
+                    timeout = self._hedge_delay(primary)
+                
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    hedge = launch()
+                    AI_HEDGED_REQUESTS.labels(model=hedge.model, provider=hedge.provider).inc()
+                    self.logger.info("Hedging slow request", primary=primary.model, hedge=hedge.model, delay=timeout)
+                    continue
+                
+                for task in done:
+                    candidate = attempts.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    
+                    last_error = task.exception()
+                    if not self._can_fail_over(last_error):
+                        raise last_error
+                    self.logger.warning("Model attempt failed", model=candidate.model, provider=candidate.provider, error=str(last_error))
+                
+                if not attempts and candidates:
+                    next_candidate = launch()
+                    AI_FAILOVERS.labels(from_model=candidate.model, to_model=next_candidate.model).inc()
+            
+            raise last_error
+        finally:
+            # Cancel the losing side of a hedge; single-flight stops its upstream call if unshared
+            for task in attempts:
+                task.cancel()
+    
+    def _hedge_delay(self, request: AIRequest) -> Optional[float]:
+        """Seconds to wait before hedging, or None until the model's p95 latency is known"""
+        p95 = self.stats.latency_percentile(request.provider, request.model)
+        if p95 is None:
+            return None
+        return max(p95, self.hedge_min_delay)
+    
+    async def _generate_upstream(self, request: AIRequest, provider: AIProvider, cache_key: Optional[str]) -> AIResponse:
+        """Admit and dispatch a request to its provider, caching the result when allowed"""
+        start_time = time.time()
+        breaker = self._breaker(request.provider, request.model)
+        
+        try:
+            async with self.admission.admit(request.provider, request.model, request.priority, provider.max_concurrent):
+                self.stats.begin(request.provider, request.model)
+                try:
+                    if self.batcher:
+                        response = await breaker.call(self.batcher.submit, provider, request)
+                    else:
+                        response = await breaker.call(provider.generate, request)
+                except CircuitBreakerOpenError as e:
+                    self.stats.complete(request.provider, request.model, time.time() - start_time, 0, success=False)
+                    raise HTTPException(status_code=503, detail=f"{request.provider}/{request.model}: {e}")
+                except asyncio.CancelledError:
+                    self.stats.abandon(request.provider, request.model)
+                    raise
+                except Exception:
+                    self.stats.complete(request.provider, request.model, time.time() - start_time, 0, success=False)
+                    raise
+        except AdmissionRejected as e:
+            raise self._admission_error(e)
+        
+        self.stats.complete(request.provider, request.model, time.time() - start_time, response.tokens_used, success=True)
+        
+        if cache_key:
+            await self.cache.set(cache_key, response.model_dump_json())
+        
+        return response
+    
+    async def _stream_upstream(self, request: AIRequest, provider: AIProvider) -> AsyncGenerator[AIStreamChunk, None]:
+        """Admit and stream a request from its provider"""
+        start_time = time.time()
+        
+        try:
+            async with self.admission.admit(request.provider, request.model, request.priority, provider.max_concurrent):
+                self.stats.begin(request.provider, request.model)
+                tokens_used = 0
+                failed = False
+                abandoned = False
+                try:
+                    async for chunk in provider.generate_stream(request):
+                        tokens_used = chunk.tokens_used or tokens_used
+                        yield chunk
+                except (asyncio.CancelledError, GeneratorExit):
+                    abandoned = True
+                    raise
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    if abandoned:
+                        self.stats.abandon(request.provider, request.model)
+                    else:
+                        self.stats.complete(request.provider, request.model, time.time() - start_time, tokens_used, success=not failed)
+        except AdmissionRejected as e:
+            raise self._admission_error(e)
+    
+    def _request_key(self, request: AIRequest) -> str:
+        """Key identifying requests that would produce the same generation"""
+        return make_cache_key(
+            provider=request.provider,
+            model=request.model,
+            session_id=request.session_id,
+            system_prompt=request.system_prompt,
+            context=request.context,
+            prompt=request.prompt,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens
+        )
+    
+    def _cache_key(self, request: AIRequest) -> Optional[str]:
+        """Cache key for deterministic requests, or None when the request is not cacheable"""
+        if not self.cache or request.stream or request.session_id or request.temperature > self.cache_config.max_temperature:
+            return None
+        
+        return self._request_key(request)
+    
+    async def check_rate_limit(self, client_id: str, request: AIRequest) -> None:
+        """Charge a request to its client's limit for the resolved model, raising 429 when exhausted"""
+        if not self.rate_limiter:
+            return
+        
+        decision = await self.rate_limiter.check(client_id, request.provider, request.model)
+        if not decision.allowed:
+            AI_ERRORS.labels(model=request.model, provider=request.provider, error_type="rate_limited").inc()
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded for {request.provider}/{request.model}",
+                headers={
+                    "Retry-After": str(max(1, math.ceil(decision.retry_after))),
+                    "X-RateLimit-Limit": str(decision.limit),
+                    "X-RateLimit-Remaining": str(decision.remaining)
+                }
+            )
+    
+    @staticmethod
+    def _admission_error(error: AdmissionRejected) -> HTTPException:
+        """Convert an admission rejection into an HTTP error with a retry hint"""
+        return HTTPException(
+            status_code=error.status_code,
+            detail=str(error),
+            headers={"Retry-After": str(error.retry_after)}
+        )
+    
+    def _get_provider(self, request: AIRequest) -> AIProvider:
+        """Resolve and validate the provider and model for a request"""
+        provider = self.providers.get(request.provider)
+        if not provider:
+            raise HTTPException(status_code=400, detail=f"Unsupported provider: {request.provider}")
+        
+        # Validate model
+        if request.model not in AI_MODELS.get(request.provider, {}):
+            raise HTTPException(status_code=400, detail=f"Model {request.model} not available for provider {request.provider}")
+        
+        return provider
+    
     async def auto_select_model(self, request: AIRequest, strategy: str = "auto") -> AIRequest:
         """Automatically select the best model based on strategy"""
         selected_model = await self.strategies[strategy](request)
+        request.strategy = request.strategy or strategy
         
         if selected_model:
             request.model = selected_model["name"]
@@ -456,10 +1437,21 @@ class AIOrchestrator:
         
         return request
     
+    async def _routable_statuses(self, provider_name: str) -> List[ModelStatus]:
+        """Model statuses, leaving out local models that would force a swap while a resident one is available"""
+        statuses = await self.registry.get_statuses(provider_name)
+        if not self.scheduler or provider_name != "ollama":
+            return statuses
+        
+        no_swap = [status for status in statuses if not self.scheduler.would_swap(status.model)]
+        if any(status.available for status in no_swap):
+            return no_swap
+        return statuses
+    
     async def _select_fastest_model(self, request: AIRequest) -> Optional[Dict]:
         """Select the fastest available model"""
-        for provider_name, provider in self.providers.items():
-            statuses = await provider.get_status()
+        for provider_name in self.providers:
+            statuses = await self._routable_statuses(provider_name)
             for status in statuses:
                 if status.available:
                     model_config = AI_MODELS[provider_name].get(status.model)
@@ -477,9 +1469,9 @@ class AIOrchestrator:
         quality_priority = ["gemini-2-flash", "gemini-pro", "codellama", "llama2", "mistral", "phi3"]
         
         for model_name in quality_priority:
-            for provider_name, provider in self.providers.items():
+            for provider_name in self.providers:
                 if model_name in AI_MODELS.get(provider_name, {}):
-                    statuses = await provider.get_status()
+                    statuses = await self._routable_statuses(provider_name)
                     for status in statuses:
                         if status.available and status.model == model_name:
                             return {
@@ -492,9 +1484,9 @@ class AIOrchestrator:
     async def _select_cost_optimized_model(self, request: AIRequest) -> Optional[Dict]:
         """Select the most cost-effective model"""
         # Prefer local models (Ollama) over cloud models (Gemini)
-        for provider_name, provider in self.providers.items():
+        for provider_name in self.providers:
             if provider_name == "ollama":
-                statuses = await provider.get_status()
+                statuses = await self._routable_statuses(provider_name)
                 for status in statuses:
                     if status.available:
                         model_config = AI_MODELS["ollama"].get(status.model)
@@ -506,9 +1498,9 @@ class AIOrchestrator:
                             }
         
         # Fallback to cloud if no local models available
-        for provider_name, provider in self.providers.items():
+        for provider_name in self.providers:
             if provider_name == "gemini":
-                statuses = await provider.get_status()
+                statuses = await self._routable_statuses(provider_name)
                 for status in statuses:
                     if status.available:
                         model_config = AI_MODELS["gemini"].get(status.model)
@@ -520,13 +1512,40 @@ class AIOrchestrator:
                             }
         return None
     
+    async def _select_adaptive_model(self, request: AIRequest) -> Optional[Dict]:
+        """Select the model with the lowest expected completion time from live statistics"""
+        best = None
+        
+        for provider_name, provider in self.providers.items():
+            statuses = await self._routable_statuses(provider_name)
+            for status in statuses:
+                model_config = AI_MODELS[provider_name].get(status.model)
+                if not status.available or not model_config:
+                    continue
+                
+                output_tokens = request.max_tokens or min(model_config["max_tokens"], ESTIMATED_OUTPUT_TOKENS)
+                expected = self.stats.expected_completion_time(
+                    provider_name, status.model, output_tokens, provider.max_concurrent
+                )
+                
+                # Strict comparison keeps provider order as the tie-breaker
+                if best is None or expected < best["expected_seconds"]:
+                    best = {
+                        "name": status.model,
+                        "provider": provider_name,
+                        "priority": "latency",
+                        "expected_seconds": expected
+                    }
+        
+        return best
+    
     async def _select_auto_model(self, request: AIRequest) -> Optional[Dict]:
         """Intelligent auto-selection based on request characteristics"""
         prompt_length = len(request.prompt)
         
-        # Short prompts -> Fast models
+        # Short prompts -> Lowest expected latency, spilling over when a model is saturated
         if prompt_length < 500:
-            return await self._select_fastest_model(request)
+            return await self._select_adaptive_model(request)
         
         # Long prompts or complex tasks -> High quality models
         elif prompt_length > 5000 or "analyze" in request.prompt.lower() or "code" in request.prompt.lower():
@@ -559,24 +1578,28 @@ class AIOrchestrator:
             "available_models": 0
         }
         
-        for provider_name, provider in self.providers.items():
-            try:
-                statuses = await provider.get_status()
-                provider_health = {
-                    "status": "online" if statuses else "offline",
-                    "models": len(statuses),
-                    "available": len([s for s in statuses if s.available])
-                }
-                health_status["providers"][provider_name] = provider_health
-                health_status["total_models"] += len(statuses)
-                health_status["available_models"] += provider_health["available"]
-                
-            except Exception as e:
+        for provider_name in self.providers:
+            # The registry polls providers in the background, so probes read its snapshot instead of calling out
+            statuses = await self.registry.get_statuses(provider_name)
+            snapshot = self.registry.get_snapshot(provider_name)
+            if snapshot.error:
                 health_status["providers"][provider_name] = {
                     "status": "error",
-                    "error": str(e)
+                    "error": snapshot.error,
+                    "age_seconds": round(snapshot.age, 1)
                 }
                 health_status["status"] = "degraded"
+                continue
+            
+            provider_health = {
+                "status": "online" if statuses else "offline",
+                "models": len(statuses),
+                "available": len([s for s in statuses if s.available]),
+                "age_seconds": round(snapshot.age, 1)
+            }
+            health_status["providers"][provider_name] = provider_health
+            health_status["total_models"] += len(statuses)
+            health_status["available_models"] += provider_health["available"]
         
         return health_status
 
@@ -590,12 +1613,23 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Local AI Orchestrator service...")
     orchestrator = AIOrchestrator()
+    await orchestrator.start()
+    
+    # Validated edits to the config file are swapped in and applied without a restart
+    config_manager = get_config_manager()
+    unsubscribe = config_manager.subscribe(orchestrator.apply_config)
+    config_watcher = ConfigWatcher(config_manager, poll_interval=config_manager.service.config_reload_interval)
+    if config_manager.service.config_reload_enabled:
+        await config_watcher.start()
     logger.info("Local AI Orchestrator service ready")
     
     yield
     
     # Shutdown
     logger.info("Shutting down Local AI Orchestrator service...")
+    await config_watcher.stop()
+    unsubscribe()
+    await orchestrator.close()
 
 # Create FastAPI application
 app = FastAPI(
@@ -604,6 +1638,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -615,6 +1650,7 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
 )
+app.add_middleware(CorrelationIdMiddleware, header=LogConfig.correlation_id_header)
 
 @app.get("/health")
 async def health_check():
@@ -623,12 +1659,23 @@ async def health_check():
         raise HTTPException(status_code=503, detail="Service not ready")
     
     health = await orchestrator.health_check()
-    return health
+    # Returning the response directly skips FastAPI's jsonable_encoder walk over the payload
+    return ORJSONResponse(health)
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: ready once the priority models are warm"""
+    if not orchestrator:
+        raise HTTPException(status_code=503, detail="Service not ready")
+    
+    warmup = orchestrator.warmer.get_status() if orchestrator.warmer else None
+    ready = warmup is None or warmup["ready"]
+    return ORJSONResponse(status_code=200 if ready else 503, content={"ready": ready, "warmup": warmup})
 
 @app.get("/models")
 async def get_available_models():
     """Get all available AI models"""
-    return {"models": AI_MODELS}
+    return ORJSONResponse({"models": AI_MODELS})
 
 @app.get("/status")
 async def get_model_status():
@@ -637,10 +1684,41 @@ async def get_model_status():
         raise HTTPException(status_code=503, detail="Service not ready")
     
     statuses = await orchestrator.get_all_model_status()
-    return {"models": [status.dict() for status in statuses]}
+    return ORJSONResponse({"models": [status.model_dump(mode="json") for status in statuses]})
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+def trusted_networks(entries: List[str]) -> Tuple[IPNetwork, ...]:
+    """Parse trusted proxy addresses and CIDR ranges"""
+    return tuple(ipaddress.ip_network(entry, strict=False) for entry in entries)
+
+def _is_trusted(address: str, networks: Tuple[IPNetwork, ...]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+def client_identity(connection: Union[Request, WebSocket], trusted_proxies: Tuple[IPNetwork, ...] = ()) -> str:
+    """Rate limit key for the caller: the peer address, or the client a trusted proxy forwarded for"""
+    peer = connection.client.host if connection.client else "anonymous"
+    if not _is_trusted(peer, trusted_proxies):
+        # Headers from anyone else are caller-controlled; honouring them would let clients pick their own bucket
+        return peer
+    
+    client_id = connection.headers.get("x-client-id")
+    if client_id:
+        return client_id
+    
+    # The nearest hop that is not one of our proxies is the real client
+    hops = [hop.strip() for hop in connection.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted_proxies):
+            return hop
+    return hops[0] if hops else peer
 
 @app.post("/generate", response_model=AIResponse)
-async def generate_ai_response(request: AIRequest):
+async def generate_ai_response(request: AIRequest, http_request: Request):
     """Generate AI response using specified model"""
     if not orchestrator:
         raise HTTPException(status_code=503, detail="Service not ready")
@@ -650,8 +1728,9 @@ async def generate_ai_response(request: AIRequest):
         if request.model == "auto":
             request = await orchestrator.auto_select_model(request)
         
+        await orchestrator.check_rate_limit(client_identity(http_request, orchestrator.trusted_proxies), request)
         response = await orchestrator.generate_response(request)
-        return response
+        return model_response(response)
         
     except HTTPException:
         raise
@@ -660,8 +1739,8 @@ async def generate_ai_response(request: AIRequest):
         raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
 
 @app.post("/generate/stream")
-async def generate_ai_response_stream(request: AIRequest):
-    """Generate AI response with streaming"""
+async def generate_ai_response_stream(request: AIRequest, http_request: Request):
+    """Generate AI response as token-by-token Server-Sent Events"""
     if not orchestrator:
         raise HTTPException(status_code=503, detail="Service not ready")
     
@@ -672,25 +1751,75 @@ async def generate_ai_response_stream(request: AIRequest):
         if request.model == "auto":
             request = await orchestrator.auto_select_model(request)
         
-        response = await orchestrator.generate_response(request)
+        await orchestrator.check_rate_limit(client_identity(http_request, orchestrator.trusted_proxies), request)
+        chunks = orchestrator.generate_stream(request)
         
-        async def generate_stream():
-            yield f"data: {response.json()}\n\n"
-        
-        return StreamingResponse(
-            generate_stream(),
-            media_type="text/plain",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-            }
-        )
+        # Pull the first chunk before responding so setup failures keep their status code
+        try:
+            first_chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            first_chunk = None
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error("AI streaming generation failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"AI streaming generation failed: {str(e)}")
+    
+    async def event_stream():
+        # The response pulls one chunk at a time, so a slow client throttles the upstream read
+        try:
+            if first_chunk is None:
+                return
+            yield f"data: {first_chunk.model_dump_json()}\n\n"
+            async for chunk in chunks:
+                yield f"data: {chunk.model_dump_json()}\n\n"
+        except Exception as e:
+            logger.error("AI streaming generation failed", error=str(e))
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            yield f"event: error\ndata: {dumps_text({'detail': detail})}\n\n"
+        finally:
+            await chunks.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+@app.post("/generate/batch")
+async def generate_ai_response_batch(requests: List[AIRequest], http_request: Request):
+    """Generate many prompts concurrently, streaming NDJSON results as each completes"""
+    if not orchestrator:
+        raise HTTPException(status_code=503, detail="Service not ready")
+    
+    if not requests:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one request")
+    if len(requests) > orchestrator.max_batch_items:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {orchestrator.max_batch_items} requests")
+    
+    async def result_stream():
+        async for result in orchestrator.run_batch(requests, client_identity(http_request, orchestrator.trusted_proxies)):
+            yield result.model_dump_json() + "\n"
+    
+    return StreamingResponse(
+        result_stream(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/sessions/{session_id}")
+async def end_session(session_id: str):
+    """Forget a conversation's stored context tokens"""
+    if not orchestrator:
+        raise HTTPException(status_code=503, detail="Service not ready")
+    
+    removed = orchestrator.providers["ollama"].sessions.discard(session_id)
+    return {"session_id": session_id, "removed": removed}
 
 @app.websocket("/ws/generate")
 async def websocket_generate(websocket: WebSocket):
@@ -701,21 +1830,38 @@ async def websocket_generate(websocket: WebSocket):
     
     await websocket.accept()
     ACTIVE_CONNECTIONS.inc()
+    client_id = client_identity(websocket, orchestrator.trusted_proxies)
     
     try:
         while True:
             # Receive request
             data = await websocket.receive_text()
-            request_data = json.loads(data)
             
-            # Create request
-            request = AIRequest(**request_data)
+            # Parse and validate in one pass inside pydantic-core
+            request = AIRequest.model_validate_json(data)
+            
+            try:
+                await orchestrator.check_rate_limit(client_id, request)
+            except HTTPException as e:
+                # Keep the socket open; the client can retry after the hinted delay
+                await websocket.send_bytes(dumps({
+                    "error": e.detail,
+                    "status_code": e.status_code,
+                    "retry_after": int(e.headers["Retry-After"])
+                }))
+                continue
+            
+            if request.stream:
+                # Relay chunks as they arrive; awaiting each send applies backpressure upstream
+                async for chunk in orchestrator.generate_stream(request):
+                    await websocket.send_bytes(model_bytes(chunk))
+                continue
             
             # Generate response
             response = await orchestrator.generate_response(request)
             
-            # Send response
-            await websocket.send_text(json.dumps(response.dict()))
+            # Frames go out as the encoder's bytes, without an intermediate str
+            await websocket.send_bytes(model_bytes(response))
             
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
@@ -728,7 +1874,7 @@ async def websocket_generate(websocket: WebSocket):
 @app.get("/metrics")
 async def get_metrics():
     """Prometheus metrics endpoint"""
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,260 @@
+"""
+Model Placement for Local AI Orchestrator
+Memory-budget-aware residency tracking and traffic-weighted eviction for each Ollama node
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import structlog
+from prometheus_client import Counter, Gauge
+
+# Setup structured logging for placement module
+logger = structlog.get_logger(__name__)
+
+# Prometheus metrics
+MODEL_EVICTIONS = Counter('ai_model_evictions_total', 'Models unloaded to make room for another', ['model'])
+PLACEMENT_REJECTIONS = Counter('ai_model_placement_rejections_total', 'Requests refused because their model cannot fit in memory', ['model'])
+RESIDENT_MEMORY = Gauge('ai_resident_model_memory_gb', 'Memory held by models resident on an Ollama node', ['backend'])
+
+GB = 1024 ** 3
+
+class PlacementRejected(Exception):
+    """Raised when a model cannot be loaded without evicting models that are in use"""
+
+@dataclass
+class ModelUsage:
+    """Traffic for one model across the pool"""
+    score: float = 0.0
+    last_used: float = 0.0
+
+@dataclass
+class NodeResidency:
+    """Models held in one Ollama node's memory"""
+    capacity_gb: float
+    resident: Dict[str, float] = field(default_factory=dict)
+    in_flight: Dict[str, int] = field(default_factory=dict)
+    
+    def used_gb(self) -> float:
+        return sum(self.resident.values())
+    
+    def free_gb(self) -> float:
+        return self.capacity_gb - self.used_gb()
+
+class ResourceScheduler:
+    """Keeps resident models within each Ollama node's memory, evicting the least valuable idle ones"""
+    
+    def __init__(
+        self,
+        provider: Any,
+        requirements_gb: Dict[str, float],
+        host_memory_gb: float = 0.0,
+        node_memory_gb: Optional[Dict[str, float]] = None,
+        reserve_gb: float = 2.0,
+        half_life: float = 600,
+        refresh_interval: float = 30
+    ):
+        # The orchestrator rarely runs on the Ollama nodes, so its own memory says nothing about theirs
+        if host_memory_gb <= 0 and not node_memory_gb:
+            raise ValueError("ResourceScheduler needs host_memory_gb or node_memory_gb")
+        
+        self.provider = provider
+        self.requirements_gb = requirements_gb
+        self.host_memory_gb = host_memory_gb
+        self.node_memory_gb = {url.rstrip("/"): memory for url, memory in (node_memory_gb or {}).items()}
+        self.reserve_gb = reserve_gb
+        self.half_life = half_life
+        self.refresh_interval = refresh_interval
+        self.logger = logger.bind(component="resource_scheduler")
+        
+        self.usage: Dict[str, ModelUsage] = {}
+        self.nodes: Dict[str, NodeResidency] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+    
+    def _usage(self, model: str) -> ModelUsage:
+        usage = self.usage.get(model)
+        if usage is None:
+            usage = self.usage[model] = ModelUsage()
+        return usage
+    
+    def node(self, url: str) -> NodeResidency:
+        """Residency for one backend, sized from its configured memory"""
+        node = self.nodes.get(url)
+        if node is None:
+            memory_gb = self.node_memory_gb.get(url, self.host_memory_gb)
+            node = self.nodes[url] = NodeResidency(capacity_gb=max(0.0, memory_gb - self.reserve_gb))
+        return node
+    
+    def _urls(self) -> List[str]:
+        """Backends new requests can be routed to"""
+        pool = self.provider.pool
+        return [backend.url for backend in pool.available() or pool.backends]
+    
+    @property
+    def capacity_gb(self) -> float:
+        """Memory every node can give to models; a model preloaded everywhere must fit the smallest"""
+        return min(self.node(url).capacity_gb for url in self.provider.pool.urls)
+    
+    def score(self, model: str, now: Optional[float] = None) -> float:
+        """Request count decayed by age: frequent and recent models score highest"""
+        usage = self._usage(model)
+        now = now or time.monotonic()
+        return usage.score * 0.5 ** ((now - usage.last_used) / self.half_life)
+    
+    def record_use(self, model: str) -> None:
+        """Count a request toward a model's traffic score"""
+        now = time.monotonic()
+        usage = self._usage(model)
+        usage.score = self.score(model, now) + 1
+        usage.last_used = now
+    
+    def is_resident(self, model: str, url: Optional[str] = None) -> bool:
+        """Whether the model is loaded on the given backend, or on any backend"""
+        urls = [url] if url else list(self.nodes)
+        return any(model in self.node(node_url).resident for node_url in urls)
+    
+    def resident_gb(self, url: Optional[str] = None) -> float:
+        """Memory held by models on the given backend, or across the pool"""
+        urls = [url] if url else list(self.nodes)
+        return sum(self.node(node_url).used_gb() for node_url in urls)
+    
+    def free_gb(self, url: str) -> float:
+        return self.node(url).free_gb()
+    
+    def would_swap(self, model: str) -> bool:
+        """Whether serving this model now means unloading another one first on every routable backend"""
+        if model not in self.requirements_gb:
+            return False
+        return not any(
+            self.is_resident(model, url) or self.requirements_gb[model] <= self.free_gb(url)
+            for url in self._urls()
+        )
+    
+    def _eviction_order(self, url: str, exclude: str) -> List[str]:
+        """Idle models resident on a backend, least valuable first"""
+        now = time.monotonic()
+        node = self.node(url)
+        idle = [name for name in node.resident if node.in_flight.get(name, 0) == 0 and name != exclude]
+        return sorted(idle, key=lambda name: (self.score(name, now), self._usage(name).last_used))
+    
+    async def _make_room(self, url: str, model: str) -> None:
+        """Evict idle models from a backend until the requested one fits, or refuse without evicting anything"""
+        node = self.node(url)
+        # A model larger than the whole node cannot avoid swapping; give it as much room as possible
+        needed = min(self.requirements_gb.get(model, 0.0), node.capacity_gb)
+        victims = []
+        free = node.free_gb()
+        
+        for name in self._eviction_order(url, exclude=model):
+            if free >= needed:
+                break
+            victims.append(name)
+            free += node.resident[name]
+        
+        if free < needed:
+            PLACEMENT_REJECTIONS.labels(model=model).inc()
+            raise PlacementRejected(
+                f"{model} needs {needed:.1f} GB on {url} but only {free:.1f} GB of {node.capacity_gb:.1f} GB can be freed"
+            )
+        
+        for name in victims:
+            try:
+                await self.provider.unload(name, url)
+            except Exception as e:
+                # Ollama frees the model itself once keep_alive lapses; carry on rather than fail the request
+                self.logger.warning("Failed to unload model", model=name, backend=url, error=str(e))
+            node.resident.pop(name, None)
+            MODEL_EVICTIONS.labels(model=name).inc()
+            self.logger.info("Evicted model to make room", evicted=name, for_model=model, backend=url, score=self.score(name))
+    
+    @asynccontextmanager
+    async def placement(self, url: str, model: str):
+        """Hold a model resident on a backend for the duration of a request, making room for it first"""
+        self.record_use(model)
+        node = self.node(url)
+        
+        async with self._lock:
+            if model not in node.resident:
+                await self._make_room(url, model)
+                # Reserve the memory now so concurrent placements see it as taken
+                node.resident[model] = self.requirements_gb.get(model, 0.0)
+                RESIDENT_MEMORY.labels(backend=url).set(node.used_gb())
+            node.in_flight[model] = node.in_flight.get(model, 0) + 1
+        
+        try:
+            yield
+        finally:
+            node.in_flight[model] -= 1
+    
+    async def _refresh_node(self, url: str) -> None:
+        running = await self.provider.running_models(url)
+        loaded = {
+            self.provider.base_model_name(info["name"]): info.get("size", 0) / GB
+            for info in running
+        }
+        node = self.node(url)
+        
+        async with self._lock:
+            for name in list(node.resident):
+                if name not in loaded and node.in_flight.get(name, 0) == 0:
+                    del node.resident[name]
+            for name, size_gb in loaded.items():
+                # Prefer the measured size; fall back to the configured requirement
+                node.resident[name] = size_gb or self.requirements_gb.get(name, 0.0)
+        
+        RESIDENT_MEMORY.labels(backend=url).set(node.used_gb())
+    
+    async def refresh(self) -> None:
+        """Reconcile each backend's residency with the models its /api/ps reports as loaded"""
+        urls = self.provider.pool.urls
+        # Forget nodes that left the pool
+        for url in set(self.nodes) - set(urls):
+            del self.nodes[url]
+        
+        results = await asyncio.gather(*(self._refresh_node(url) for url in urls), return_exceptions=True)
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                self.logger.warning("Failed to refresh resident models", backend=url, error=str(result))
+    
+    async def start(self) -> None:
+        """Start background residency refresh"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+            self.logger.info("Resource scheduler started", host_memory_gb=self.host_memory_gb, node_memory_gb=self.node_memory_gb)
+    
+    async def stop(self) -> None:
+        """Cancel background residency refresh"""
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.logger.warning("Failed to refresh resident models", error=str(e))
+            await asyncio.sleep(self.refresh_interval)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get per-backend capacity and residency, and traffic scores"""
+        return {
+            "host_memory_gb": self.host_memory_gb,
+            "backends": {
+                url: {
+                    "capacity_gb": node.capacity_gb,
+                    "resident_gb": node.used_gb(),
+                    "models": {
+                        name: {"resident_gb": size_gb, "in_flight": node.in_flight.get(name, 0)}
+                        for name, size_gb in node.resident.items()
+                    }
+                }
+                for url, node in self.nodes.items()
+            },
+            "scores": {name: self.score(name) for name in self.usage}
+        }
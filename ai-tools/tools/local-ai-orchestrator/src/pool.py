@@ -0,0 +1,173 @@
+"""
+Ollama Backend Pool for Local AI Orchestrator
+Least-outstanding and consistent-hash routing across several Ollama nodes with per-node circuit breakers
+"""
+
+import bisect
+import hashlib
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import structlog
+from prometheus_client import Gauge
+
+try:
+    from .health import CircuitBreaker
+except ImportError:
+    # Fallback for direct execution
+    from health import CircuitBreaker
+
+# Setup structured logging for pool module
+logger = structlog.get_logger(__name__)
+
+# Prometheus metrics
+BACKEND_OUTSTANDING = Gauge('ai_backend_outstanding_requests', 'Requests in flight per Ollama backend', ['backend'])
+BACKEND_AVAILABLE = Gauge('ai_backend_available', 'Whether an Ollama backend accepts new requests', ['backend'])
+
+class NoBackendAvailable(Exception):
+    """Raised when every backend is unhealthy or has an open circuit"""
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Connection problems and 5xx responses count against a backend; 4xx are the request's fault"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, OSError))
+
+@dataclass
+class OllamaBackend:
+    """One Ollama node and its routing state"""
+    url: str
+    breaker: CircuitBreaker
+    outstanding: int = 0
+    healthy: bool = True
+    last_error: Optional[str] = None
+    models: List[str] = field(default_factory=list)
+    
+    @property
+    def available(self) -> bool:
+        """Accepts new requests; a backend that is not available drains its in-flight ones"""
+        return self.healthy and self.breaker.allows_request
+
+class BackendPool:
+    """Routes each request to one Ollama node: by session hash for locality, otherwise least outstanding"""
+    
+    def __init__(
+        self,
+        urls: List[str],
+        failure_threshold: int = 5,
+        breaker_timeout: float = 60.0,
+        virtual_nodes: int = 64
+    ):
+        if not urls:
+            raise ValueError("BackendPool needs at least one backend URL")
+        
+        self.failure_threshold = failure_threshold
+        self.breaker_timeout = breaker_timeout
+        self.virtual_nodes = virtual_nodes
+        self.logger = logger.bind(component="backend_pool")
+        self.set_urls(urls)
+    
+    def set_urls(self, urls: List[str]) -> None:
+        """Replace the backend list and rebuild the hash ring"""
+        self.backends: List[OllamaBackend] = [
+            OllamaBackend(url=url.rstrip("/"), breaker=CircuitBreaker(self.failure_threshold, self.breaker_timeout))
+            for url in dict.fromkeys(urls)
+        ]
+        
+        # Virtual nodes spread each backend around the ring so load stays even when one leaves
+        ring: List[Tuple[int, int]] = []
+        for index, backend in enumerate(self.backends):
+            ring.extend((_hash(f"{backend.url}#{replica}"), index) for replica in range(self.virtual_nodes))
+        ring.sort()
+        self._ring_hashes = [point for point, _ in ring]
+        self._ring_backends = [index for _, index in ring]
+        
+        for backend in self.backends:
+            BACKEND_AVAILABLE.labels(backend=backend.url).set(1)
+    
+    @property
+    def urls(self) -> List[str]:
+        return [backend.url for backend in self.backends]
+    
+    def available(self) -> List[OllamaBackend]:
+        return [backend for backend in self.backends if backend.available]
+    
+    def _by_hash(self, key: str) -> Optional[OllamaBackend]:
+        """First available backend clockwise from the key; only keys owned by a drained node move"""
+        start = bisect.bisect(self._ring_hashes, _hash(key))
+        for offset in range(len(self._ring_backends)):
+            backend = self.backends[self._ring_backends[(start + offset) % len(self._ring_backends)]]
+            if backend.available:
+                return backend
+        return None
+    
+    def select(self, session_id: Optional[str] = None) -> OllamaBackend:
+        """Pick the backend for a request"""
+        if session_id:
+            backend = self._by_hash(session_id)
+        else:
+            # Ties go to the earlier backend in the configured list
+            backend = min(self.available(), key=lambda candidate: candidate.outstanding, default=None)
+        
+        if backend is None:
+            raise NoBackendAvailable(f"No Ollama backend available ({len(self.backends)} configured)")
+        return backend
+    
+    @asynccontextmanager
+    async def acquire(self, session_id: Optional[str] = None):
+        """Reserve a backend for one request and record the outcome against its circuit"""
+        backend = self.select(session_id)
+        backend.outstanding += 1
+        BACKEND_OUTSTANDING.labels(backend=backend.url).set(backend.outstanding)
+        
+        try:
+            yield backend
+        except Exception as e:
+            if is_backend_failure(e):
+                self.record_failure(backend, e)
+            else:
+                backend.breaker.record_success()
+            raise
+        else:
+            backend.breaker.record_success()
+        finally:
+            backend.outstanding -= 1
+            BACKEND_OUTSTANDING.labels(backend=backend.url).set(backend.outstanding)
+    
+    def record_failure(self, backend: OllamaBackend, error: Exception) -> None:
+        """Count a failure; once the circuit opens the backend drains its in-flight requests"""
+        was_available = backend.available
+        backend.breaker.record_failure(error)
+        backend.last_error = str(error) or type(error).__name__
+        
+        if was_available and not backend.available:
+            BACKEND_AVAILABLE.labels(backend=backend.url).set(0)
+            self.logger.warning("Draining Ollama backend", backend=backend.url, in_flight=backend.outstanding, error=backend.last_error)
+    
+    def mark_health(self, backend: OllamaBackend, healthy: bool, error: Optional[str] = None) -> None:
+        """Apply the result of a health check"""
+        if healthy != backend.healthy:
+            self.logger.info("Ollama backend health changed", backend=backend.url, healthy=healthy, error=error)
+        backend.healthy = healthy
+        backend.last_error = error if not healthy else backend.last_error
+        BACKEND_AVAILABLE.labels(backend=backend.url).set(1 if backend.available else 0)
+    
+    def get_status(self) -> List[Dict[str, Any]]:
+        """Get per-backend routing state"""
+        return [
+            {
+                "url": backend.url,
+                "available": backend.available,
+                "healthy": backend.healthy,
+                "circuit": backend.breaker.state,
+                "outstanding": backend.outstanding,
+                "models": backend.models,
+                "last_error": backend.last_error
+            }
+            for backend in self.backends
+        ]
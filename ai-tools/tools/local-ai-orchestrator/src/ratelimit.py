@@ -0,0 +1,180 @@
+"""
+Rate Limiting for Local AI Orchestrator
+O(1) GCRA limits per (client, provider, model) with an in-process store or a shared Redis store
+"""
+
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter
+
+# Setup structured logging for ratelimit module
+logger = structlog.get_logger(__name__)
+
+# Prometheus metrics
+RATE_LIMIT_DECISIONS = Counter('ai_rate_limit_decisions_total', 'Rate limit checks', ['provider', 'result'])
+RATE_LIMIT_EVICTIONS = Counter('ai_rate_limit_key_evictions_total', 'Rate limit keys evicted to bound memory')
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of one rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+    reset_after: float = 0.0
+
+class LocalGCRAStore:
+    """In-process theoretical arrival times, LRU-bounded to max_keys"""
+    
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max(1, max_keys)
+        self.evictions = 0
+        # key -> theoretical arrival time (monotonic seconds)
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+    
+    def update_now(self, key: str, interval: float, capacity: float, cost: int) -> Tuple[bool, float, float]:
+        """Apply GCRA; returns (allowed, retry_after, reset_after) in seconds"""
+        now = time.monotonic()
+        tat = max(self._tats.get(key, now), now)
+        new_tat = tat + interval * cost
+        allow_at = new_tat - capacity
+        
+        if now < allow_at:
+            return False, allow_at - now, tat - now
+        
+        self._tats[key] = new_tat
+        self._tats.move_to_end(key)
+        while len(self._tats) > self.max_keys:
+            # An evicted key only forgets its debt, so the oldest is the cheapest to lose
+            self._tats.popitem(last=False)
+            self.evictions += 1
+            RATE_LIMIT_EVICTIONS.inc()
+        return True, 0.0, new_tat - now
+    
+    async def update(self, key: str, interval: float, capacity: float, cost: int) -> Tuple[bool, float, float]:
+        return self.update_now(key, interval, capacity, cost)
+    
+    def peek(self, key: str) -> float:
+        """Seconds until the key is back to a full burst"""
+        return max(0.0, self._tats.get(key, 0.0) - time.monotonic())
+    
+    def __len__(self) -> int:
+        return len(self._tats)
+
+class SharedGCRAStore:
+    """GCRA state in a SharedState backend so every worker process enforces one limit"""
+    
+    def __init__(self, state: Any, prefix: str = "ratelimit:"):
+        self.state = state
+        self.prefix = prefix
+    
+    async def update(self, key: str, interval: float, capacity: float, cost: int) -> Tuple[bool, float, float]:
+        def apply(stored: Optional[str]) -> Tuple[Optional[str], Tuple[bool, float, float]]:
+            # Wall clock, since monotonic clocks are not comparable across processes
+            now = time.time()
+            tat = max(float(stored) if stored else now, now)
+            new_tat = tat + interval * cost
+            allow_at = new_tat - capacity
+            if now < allow_at:
+                return None, (False, allow_at - now, tat - now)
+            return repr(new_tat), (True, 0.0, new_tat - now)
+        
+        # After an allowed update the debt never exceeds capacity, so the key can expire then
+        return await self.state.update(self.prefix + key, apply, ttl=capacity)
+
+# Atomic GCRA on the Redis server clock so every worker shares one view
+_REDIS_GCRA = """
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval * cost
+local allow_at = new_tat - capacity
+if now < allow_at then
+    return {0, allow_at - now, tat - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil((new_tat - now) / 1000))
+return {1, 0, new_tat - now}
+"""
+
+class RedisGCRAStore:
+    """GCRA state in Redis (or any server speaking its protocol); keys expire once their burst refills"""
+    
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        # Imported lazily so the in-process store works without the redis package
+        import redis.asyncio as redis
+        
+        self.url = url
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(_REDIS_GCRA)
+    
+    async def update(self, key: str, interval: float, capacity: float, cost: int) -> Tuple[bool, float, float]:
+        allowed, retry_after, reset_after = await self._script(
+            keys=[self.prefix + key],
+            args=[int(interval * 1e6), int(capacity * 1e6), cost]
+        )
+        return bool(allowed), int(retry_after) / 1e6, int(reset_after) / 1e6
+    
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+class GCRARateLimiter:
+    """Per-(client, provider, model) limits: rate_per_minute sustained, with bursts up to burst requests"""
+    
+    def __init__(self, rates_per_minute: Dict[str, int], burst: int = 10, store: Optional[Any] = None):
+        self.rates_per_minute = rates_per_minute
+        self.burst = max(1, burst)
+        self.store = store if store is not None else LocalGCRAStore()
+        self.logger = logger.bind(component="rate_limiter")
+    
+    async def check(self, client: str, provider: str, model: str, cost: int = 1) -> RateLimitDecision:
+        """Charge cost requests against the key, or report how long until they would fit"""
+        rate = self.rates_per_minute.get(provider)
+        if not rate:
+            return RateLimitDecision(allowed=True, limit=0, remaining=0)
+        
+        interval = 60.0 / rate
+        capacity = interval * self.burst
+        
+        try:
+            allowed, retry_after, reset_after = await self.store.update(f"{client}|{provider}|{model}", interval, capacity, cost)
+        except Exception as e:
+            # A shared store outage should not take generation down with it
+            self.logger.warning("Rate limit store unavailable, allowing request", error=str(e))
+            return RateLimitDecision(allowed=True, limit=self.burst, remaining=0)
+        
+        RATE_LIMIT_DECISIONS.labels(provider=provider, result="allowed" if allowed else "limited").inc()
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=self.burst,
+            remaining=max(0, math.floor((capacity - reset_after) / interval + 1e-9)),
+            retry_after=retry_after,
+            reset_after=reset_after
+        )
+    
+    def update_limits(self, rates_per_minute: Dict[str, int], burst: int) -> None:
+        """Apply new limits; existing keys keep their state and are charged at the new rate from now on"""
+        self.rates_per_minute = rates_per_minute
+        self.burst = max(1, burst)
+    
+    async def close(self) -> None:
+        if hasattr(self.store, "close"):
+            await self.store.close()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get limits and store occupancy"""
+        return {
+            "rates_per_minute": self.rates_per_minute,
+            "burst": self.burst,
+            "store": type(self.store).__name__,
+            "keys": len(self.store) if isinstance(self.store, LocalGCRAStore) else None
+        }
@@ -0,0 +1,203 @@
+"""
+Model Availability Registry for Local AI Orchestrator
+Background-refreshed model availability snapshots for lock-free routing decisions
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Tuple
+
+import structlog
+
+# Setup structured logging for registry module
+logger = structlog.get_logger(__name__)
+
+@dataclass(frozen=True)
+class ProviderSnapshot:
+    """Immutable view of one provider's model availability"""
+    provider: str
+    statuses: Tuple[Any, ...]
+    refreshed_at: float
+    refresh_interval: float
+    error: Optional[str] = None
+    
+    @property
+    def age(self) -> float:
+        """Seconds since this snapshot was taken"""
+        return time.monotonic() - self.refreshed_at
+    
+    @property
+    def is_stale(self) -> bool:
+        """A snapshot is stale once it has missed a full refresh cycle"""
+        return self.age > 2 * self.refresh_interval
+
+class ModelRegistry:
+    """Cached model availability refreshed in the background on each provider's health check interval"""
+    
+    def __init__(
+        self,
+        providers: Dict[str, Any],
+        refresh_intervals: Dict[str, float],
+        shared: Optional[Any] = None,
+        status_type: Optional[Any] = None
+    ):
+        self.providers = providers
+        self.refresh_intervals = refresh_intervals
+        # With shared state, one worker per interval polls a provider and the rest adopt its snapshot
+        self.shared = shared
+        self.status_type = status_type
+        self.logger = logger.bind(component="model_registry")
+        
+        # Replaced wholesale on refresh so readers never need a lock
+        self._snapshots: Dict[str, ProviderSnapshot] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+    
+    async def start(self) -> None:
+        """Load initial snapshots and start background refresh tasks"""
+        await self.refresh()
+        
+        for provider_name in self.providers:
+            if provider_name not in self._tasks:
+                self._tasks[provider_name] = asyncio.create_task(self._refresh_loop(provider_name))
+        
+        self.logger.info("Model registry started", providers=list(self.providers.keys()))
+    
+    async def stop(self) -> None:
+        """Cancel background refresh tasks"""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def refresh(self, provider_name: Optional[str] = None) -> None:
+        """Refresh one provider, or all providers concurrently"""
+        names = [provider_name] if provider_name else list(self.providers.keys())
+        await asyncio.gather(*(self._refresh_provider(name) for name in names))
+    
+    async def _load_shared(self, provider_name: str, interval: float) -> Optional[ProviderSnapshot]:
+        """Snapshot another worker published within the last interval, if any"""
+        try:
+            raw = await self.shared.get(f"registry:{provider_name}")
+        except Exception as e:
+            self.logger.warning("Shared registry read failed", provider=provider_name, error=str(e))
+            return None
+        if raw is None:
+            return None
+        
+        try:
+            data = json.loads(raw)
+            age = max(0.0, time.time() - float(data["published_at"]))
+            return ProviderSnapshot(
+                provider=provider_name,
+                statuses=tuple(self.status_type.model_validate(status) for status in data["statuses"]),
+                refreshed_at=time.monotonic() - age,
+                refresh_interval=interval,
+                error=data.get("error")
+            )
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            # A malformed or partial snapshot from another worker: poll the provider ourselves instead
+            # (pydantic's ValidationError is a ValueError)
+            self.logger.warning("Ignoring invalid shared registry snapshot", provider=provider_name, error=str(e))
+            return None
+    
+    async def _publish_shared(self, snapshot: ProviderSnapshot) -> None:
+        """Share a fresh snapshot with the other workers for one interval"""
+        payload = json.dumps({
+            "statuses": [status.model_dump(mode="json") for status in snapshot.statuses],
+            "published_at": time.time(),
+            "error": snapshot.error
+        })
+        try:
+            await self.shared.set(f"registry:{snapshot.provider}", payload, snapshot.refresh_interval)
+        except Exception as e:
+            self.logger.warning("Shared registry write failed", provider=snapshot.provider, error=str(e))
+    
+    async def _refresh_provider(self, provider_name: str) -> None:
+        """Query a provider and publish a new snapshot"""
+        interval = float(self.refresh_intervals.get(provider_name, 30))
+        
+        if self.shared:
+            snapshot = await self._load_shared(provider_name, interval)
+            if snapshot is not None:
+                self._swap(snapshot)
+                # Pool health and per-node models live in each worker, so the snapshot cannot replace the probe
+                try:
+                    await self.providers[provider_name].check_backends()
+                except Exception as e:
+                    self.logger.warning("Backend health check failed", provider=provider_name, error=str(e))
+                return
+        
+        try:
+            statuses = await self.providers[provider_name].get_status()
+            snapshot = ProviderSnapshot(
+                provider=provider_name,
+                statuses=tuple(statuses),
+                refreshed_at=time.monotonic(),
+                refresh_interval=interval
+            )
+        except Exception as e:
+            self.logger.error("Model registry refresh failed", provider=provider_name, error=str(e))
+            snapshot = ProviderSnapshot(
+                provider=provider_name,
+                statuses=(),
+                refreshed_at=time.monotonic(),
+                refresh_interval=interval,
+                error=str(e)
+            )
+        
+        self._swap(snapshot)
+        if self.shared:
+            await self._publish_shared(snapshot)
+    
+    def _swap(self, snapshot: ProviderSnapshot) -> None:
+        # Copy-on-write swap keeps concurrent readers consistent without locking
+        snapshots = dict(self._snapshots)
+        snapshots[snapshot.provider] = snapshot
+        self._snapshots = snapshots
+    
+    async def _refresh_loop(self, provider_name: str) -> None:
+        """Refresh a provider on its configured interval"""
+        interval = float(self.refresh_intervals.get(provider_name, 30))
+        
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._refresh_provider(provider_name)
+            except Exception as e:
+                # Never let one bad refresh stop the model list from updating
+                self.logger.error("Model registry refresh loop error", provider=provider_name, error=str(e))
+    
+    async def get_statuses(self, provider_name: str) -> List[Any]:
+        """Get cached statuses, loading the provider once if it has never been refreshed"""
+        snapshot = self._snapshots.get(provider_name)
+        if snapshot is None:
+            await self._refresh_provider(provider_name)
+            snapshot = self._snapshots[provider_name]
+        return list(snapshot.statuses)
+    
+    def get_snapshot(self, provider_name: str) -> Optional[ProviderSnapshot]:
+        """Get the latest snapshot for a provider without any I/O"""
+        return self._snapshots.get(provider_name)
+    
+    def is_available(self, provider_name: str, model_name: str) -> bool:
+        """Check cached availability of a single model"""
+        snapshot = self._snapshots.get(provider_name)
+        if snapshot is None:
+            return False
+        return any(status.model == model_name and status.available for status in snapshot.statuses)
+    
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        """Summarise snapshots with staleness metadata"""
+        return {
+            name: {
+                "models": [status.model for status in snapshot.statuses if status.available],
+                "age_seconds": round(snapshot.age, 3),
+                "stale": snapshot.is_stale,
+                "error": snapshot.error
+            }
+            for name, snapshot in self._snapshots.items()
+        }
@@ -0,0 +1,107 @@
+"""
+Latency-Aware Routing Statistics for Local AI Orchestrator
+Live per-model EWMA latency, throughput, error rate and in-flight tracking
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Deque, Dict, Optional, Any, Tuple
+
+@dataclass
+class ModelStats:
+    """Exponentially weighted statistics for one (provider, model) pair"""
+    latency_ewma: Optional[float] = None
+    tokens_per_second_ewma: Optional[float] = None
+    error_rate_ewma: float = 0.0
+    in_flight: int = 0
+    samples: int = 0
+    last_updated: Optional[float] = None
+    recent_latencies: Deque[float] = field(default_factory=deque)
+
+class ModelStatsTracker:
+    """Tracks live model performance and estimates expected completion times"""
+    
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        default_tokens_per_second: float = 20.0,
+        max_error_rate: float = 0.95,
+        latency_window: int = 200,
+        min_percentile_samples: int = 20
+    ):
+        self.alpha = alpha
+        self.default_tokens_per_second = default_tokens_per_second
+        self.max_error_rate = max_error_rate
+        self.latency_window = latency_window
+        self.min_percentile_samples = min_percentile_samples
+        self._stats: Dict[Tuple[str, str], ModelStats] = {}
+    
+    def _ewma(self, current: Optional[float], sample: float) -> float:
+        """Blend a new sample into an exponentially weighted average"""
+        if current is None:
+            return sample
+        return self.alpha * sample + (1 - self.alpha) * current
+    
+    def get(self, provider: str, model: str) -> ModelStats:
+        """Get statistics for a model, creating an empty entry on first use"""
+        key = (provider, model)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = ModelStats(recent_latencies=deque(maxlen=self.latency_window))
+        return stats
+    
+    def begin(self, provider: str, model: str) -> None:
+        """Record that a request has been dispatched to a model"""
+        self.get(provider, model).in_flight += 1
+    
+    def complete(self, provider: str, model: str, latency: float, tokens: int, success: bool) -> None:
+        """Record the outcome of a dispatched request"""
+        stats = self.get(provider, model)
+        stats.in_flight = max(0, stats.in_flight - 1)
+        stats.error_rate_ewma = self._ewma(stats.error_rate_ewma, 0.0 if success else 1.0)
+        
+        if success:
+            stats.latency_ewma = self._ewma(stats.latency_ewma, latency)
+            stats.recent_latencies.append(latency)
+            if tokens > 0 and latency > 0:
+                stats.tokens_per_second_ewma = self._ewma(stats.tokens_per_second_ewma, tokens / latency)
+        
+        stats.samples += 1
+        stats.last_updated = time.time()
+    
+    def abandon(self, provider: str, model: str) -> None:
+        """Record that a dispatched request was cancelled without an outcome"""
+        stats = self.get(provider, model)
+        stats.in_flight = max(0, stats.in_flight - 1)
+    
+    def expected_completion_time(self, provider: str, model: str, output_tokens: int, max_concurrent: int) -> float:
+        """Estimate seconds to complete a request of the given output length"""
+        stats = self.get(provider, model)
+        tokens_per_second = stats.tokens_per_second_ewma or self.default_tokens_per_second
+        service_time = output_tokens / tokens_per_second
+        
+        # Concurrent requests share the model, so saturation stretches every completion
+        load_factor = 1 + stats.in_flight / max(1, max_concurrent)
+        
+        # Failed attempts have to be retried elsewhere, inflating the expected cost
+        success_rate = 1 - min(stats.error_rate_ewma, self.max_error_rate)
+        
+        return service_time * load_factor / success_rate
+    
+    def latency_percentile(self, provider: str, model: str, quantile: float = 0.95) -> Optional[float]:
+        """Latency at the given quantile over recent successes, or None until enough samples exist"""
+        latencies = sorted(self.get(provider, model).recent_latencies)
+        if len(latencies) < self.min_percentile_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(quantile * len(latencies)))]
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Export statistics keyed by provider/model"""
+        snapshot = {}
+        for (provider, model), stats in self._stats.items():
+            entry = asdict(stats)
+            del entry["recent_latencies"]
+            entry["latency_p95"] = self.latency_percentile(provider, model)
+            snapshot[f"{provider}/{model}"] = entry
+        return snapshot
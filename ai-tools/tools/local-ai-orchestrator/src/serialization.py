@@ -0,0 +1,46 @@
+"""
+JSON Serialization for Local AI Orchestrator
+One orjson-backed encoding path for HTTP responses, WebSocket frames, SSE events and log records
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+# Non-string dict keys appear in status payloads (e.g. per-priority counts)
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def _default(value: Any) -> Any:
+    """Encode types orjson does not handle natively"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    # Matches the json.dumps(default=str) fallback used for log records
+    return str(value)
+
+def dumps(value: Any) -> bytes:
+    """Encode to UTF-8 JSON bytes"""
+    return orjson.dumps(value, default=_default, option=_OPTIONS)
+
+def dumps_text(value: Any) -> str:
+    """Encode to a JSON string, for text WebSocket frames and SSE lines"""
+    return orjson.dumps(value, default=_default, option=_OPTIONS).decode()
+
+loads = orjson.loads
+
+def model_bytes(model: BaseModel) -> bytes:
+    """Serialize a Pydantic model straight to UTF-8 JSON bytes in pydantic-core"""
+    return model.__pydantic_serializer__.to_json(model)
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson; FastAPI's own class is deprecated in newer releases"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def model_response(model: BaseModel, status_code: int = 200) -> Response:
+    """Serialize a Pydantic model once in pydantic-core, skipping FastAPI's validate-then-encode pass"""
+    return Response(content=model.model_dump_json(), status_code=status_code, media_type="application/json")
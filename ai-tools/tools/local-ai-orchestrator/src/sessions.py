@@ -0,0 +1,86 @@
+"""
+Session Context Store for Local AI Orchestrator
+Bounded LRU of Ollama context tokens so follow-up turns skip re-evaluating the shared prefix
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge
+
+# Setup structured logging for sessions module
+logger = structlog.get_logger(__name__)
+
+# Prometheus metrics
+SESSION_CONTEXT_LOOKUPS = Counter('ai_session_context_lookups_total', 'Session context lookups', ['result'])
+SESSION_CONTEXT_ENTRIES = Gauge('ai_session_context_entries', 'Sessions holding reusable context tokens')
+
+class SessionContextStore:
+    """LRU of context token arrays keyed by (session_id, model), bounded by count and idle time"""
+    
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 1800):
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds
+        self.logger = logger.bind(component="session_context_store")
+        
+        # (session_id, model) -> (context tokens, expires_at)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[List[int], float]]" = OrderedDict()
+    
+    def get(self, session_id: str, model: str) -> Optional[List[int]]:
+        """Context tokens from the session's last turn with this model, if still held"""
+        key = (session_id, model)
+        entry = self._entries.get(key)
+        
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+                SESSION_CONTEXT_ENTRIES.set(len(self._entries))
+            SESSION_CONTEXT_LOOKUPS.labels(result="miss").inc()
+            return None
+        
+        self._entries.move_to_end(key)
+        SESSION_CONTEXT_LOOKUPS.labels(result="hit").inc()
+        return entry[0]
+    
+    def set(self, session_id: str, model: str, context: List[int]) -> None:
+        """Remember the context returned by the latest turn"""
+        key = (session_id, model)
+        self._entries.pop(key, None)
+        self._entries[key] = (context, time.monotonic() + self.ttl_seconds)
+        
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+        
+        SESSION_CONTEXT_ENTRIES.set(len(self._entries))
+    
+    def token_count(self, session_id: str, model: str) -> int:
+        """Length of the live stored context for budgeting; 0 if none, without counting as a lookup"""
+        entry = self._entries.get((session_id, model))
+        if entry is None or entry[1] <= time.monotonic():
+            return 0
+        return len(entry[0])
+    
+    def reset(self, session_id: str, model: str) -> bool:
+        """Forget one model's context for a session so its next turn starts afresh"""
+        removed = self._entries.pop((session_id, model), None) is not None
+        SESSION_CONTEXT_ENTRIES.set(len(self._entries))
+        return removed
+    
+    def discard(self, session_id: str) -> int:
+        """Forget a session for every model; returns the number of entries removed"""
+        keys = [key for key in self._entries if key[0] == session_id]
+        for key in keys:
+            del self._entries[key]
+        
+        SESSION_CONTEXT_ENTRIES.set(len(self._entries))
+        return len(keys)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get store occupancy"""
+        return {
+            "sessions": len(self._entries),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds
+        }
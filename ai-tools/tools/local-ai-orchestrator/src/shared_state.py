@@ -0,0 +1,177 @@
+"""
+Shared State for Local AI Orchestrator
+Key/value backends (SQLite WAL file or Redis protocol) that let worker processes share caches, limits and registry snapshots
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+import structlog
+
+# Setup structured logging for shared state module
+logger = structlog.get_logger(__name__)
+
+# Read-modify-write callback: current value -> (new value or None to leave it, result for the caller)
+Updater = Callable[[Optional[str]], Tuple[Optional[str], Any]]
+
+class SharedState:
+    """Expiring string key/value store visible to every worker process"""
+    
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+    
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        raise NotImplementedError
+    
+    async def update(self, key: str, updater: Updater, ttl: float) -> Any:
+        """Atomically apply updater to the current value"""
+        raise NotImplementedError
+    
+    async def close(self) -> None:
+        pass
+
+class SQLiteSharedState(SharedState):
+    """State in a WAL-mode SQLite file; suits workers on one host without extra infrastructure"""
+    
+    def __init__(self, path: str, sweep_every: int = 1000, sweep_interval: float = 60.0):
+        self.path = path
+        # Expired rows are deleted every sweep_every writes or sweep_interval seconds, whichever comes first,
+        # so rate-limit and cache keys written by every worker cannot pile up for the life of the process
+        self.sweep_every = max(1, sweep_every)
+        self.sweep_interval = sweep_interval
+        self.swept = 0
+        self.logger = logger.bind(component="sqlite_shared_state")
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._last_sweep = time.monotonic()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit mode so update() controls its own IMMEDIATE transaction
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS shared_state (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._sweep(self._db)
+        return self._db
+    
+    def _sweep(self, db: sqlite3.Connection) -> None:
+        """Delete expired rows; called with the lock held and outside any transaction"""
+        self.swept += db.execute("DELETE FROM shared_state WHERE expires_at <= ?", (time.time(),)).rowcount
+        self._writes = 0
+        self._last_sweep = time.monotonic()
+    
+    def _after_write(self, db: sqlite3.Connection) -> None:
+        self._writes += 1
+        if self._writes >= self.sweep_every or time.monotonic() - self._last_sweep >= self.sweep_interval:
+            self._sweep(db)
+    
+    def _get(self, db: sqlite3.Connection, key: str) -> Optional[str]:
+        row = db.execute("SELECT value, expires_at FROM shared_state WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row[0]
+    
+    def _set(self, db: sqlite3.Connection, key: str, value: str, ttl: float) -> None:
+        db.execute(
+            "INSERT OR REPLACE INTO shared_state (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl)
+        )
+    
+    def _get_sync(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(self._connect(), key)
+    
+    def _set_sync(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            db = self._connect()
+            self._set(db, key, value, ttl)
+            self._after_write(db)
+    
+    def _update_sync(self, key: str, updater: Updater, ttl: float) -> Any:
+        with self._lock:
+            db = self._connect()
+            # IMMEDIATE takes the write lock up front, serialising updates across processes
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                value, result = updater(self._get(db, key))
+                if value is not None:
+                    self._set(db, key, value, ttl)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            if value is not None:
+                self._after_write(db)
+            return result
+    
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get_sync, key)
+    
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await asyncio.to_thread(self._set_sync, key, value, ttl)
+    
+    async def update(self, key: str, updater: Updater, ttl: float) -> Any:
+        return await asyncio.to_thread(self._update_sync, key, updater, ttl)
+    
+    async def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+class RedisSharedState(SharedState):
+    """State in Redis or any server speaking its protocol; suits workers spread over several hosts"""
+    
+    def __init__(self, url: str, prefix: str = "orchestrator:"):
+        # Imported lazily so the SQLite backend works without the redis package
+        import redis.asyncio as redis
+        
+        self.url = url
+        self.prefix = prefix
+        self._redis = redis.from_url(url, decode_responses=True)
+    
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(self.prefix + key)
+    
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._redis.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+    
+    async def update(self, key: str, updater: Updater, ttl: float) -> Any:
+        from redis.exceptions import WatchError
+        
+        full_key = self.prefix + key
+        async with self._redis.pipeline() as pipe:
+            # Optimistic locking: retry if another worker wrote the key in between
+            while True:
+                try:
+                    await pipe.watch(full_key)
+                    value, result = updater(await pipe.get(full_key))
+                    pipe.multi()
+                    if value is not None:
+                        pipe.set(full_key, value, px=max(1, int(ttl * 1000)))
+                    await pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+    
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+def open_shared_state(url: str) -> Optional[SharedState]:
+    """Open the backend named by a URL: sqlite:///path/to/file.db or redis://host:port/db; empty means none"""
+    if not url:
+        return None
+    if url.startswith("sqlite://"):
+        return SQLiteSharedState(url[len("sqlite://"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSharedState(url)
+    raise ValueError(f"Unsupported shared state URL: {url}")
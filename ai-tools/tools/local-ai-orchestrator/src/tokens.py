@@ -0,0 +1,179 @@
+"""
+Token Budgeting for Local AI Orchestrator
+Per-family token estimates and context trimming so prompts fit each model's context window
+"""
+
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+import structlog
+
+# Setup structured logging for tokens module
+logger = structlog.get_logger(__name__)
+
+# Average characters per token for English text, by tokenizer family
+CHARS_PER_TOKEN = {
+    "llama": 3.6,
+    "mistral": 3.7,
+    "phi": 3.8,
+    "gemini": 4.0
+}
+
+# Conservative fallback for unknown families: overestimating tokens is safer than underestimating
+DEFAULT_CHARS_PER_TOKEN = 3.3
+
+# Tokens added by the prompt templates around system prompt, context and prompt
+TEMPLATE_OVERHEAD_TOKENS = 16
+
+def model_family(model: str) -> str:
+    """Map a model name to its tokenizer family"""
+    for family in CHARS_PER_TOKEN:
+        if family in model:
+            return family
+    return model
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a prompt cannot fit the model's context window even without context"""
+    
+    def __init__(self, message: str, required_tokens: int, available_tokens: int):
+        super().__init__(message)
+        self.required_tokens = required_tokens
+        self.available_tokens = available_tokens
+
+@dataclass
+class TokenBudget:
+    """Outcome of fitting a request into a model's context window"""
+    prompt_tokens: int
+    output_tokens: int
+    context_length: int
+    context: Optional[str] = None
+    context_tokens_dropped: int = 0
+    session_tokens: int = 0
+    session_reset: bool = False
+    
+    @property
+    def truncated(self) -> bool:
+        return self.context_tokens_dropped > 0
+
+class TokenBudgeter:
+    """Estimates prompt tokens and trims context to fit context_length - max_tokens"""
+    
+    def __init__(
+        self,
+        models: Dict[str, Dict[str, Dict[str, Any]]],
+        tokenizers: Optional[Dict[str, Callable[[str], int]]] = None,
+        system_prompt_cache_size: int = 256
+    ):
+        self.models = models
+        self.tokenizers: Dict[str, Callable[[str], int]] = dict(tokenizers or {})
+        self.logger = logger.bind(component="token_budgeter")
+        
+        # System prompts repeat across requests, so their counts are memoised
+        self._count_system_prompt = lru_cache(maxsize=system_prompt_cache_size)(self._count_family)
+    
+    def register_tokenizer(self, family: str, count_tokens: Callable[[str], int]) -> None:
+        """Use an exact tokenizer for a family instead of the character heuristic"""
+        self.tokenizers[family] = count_tokens
+        self._count_system_prompt.cache_clear()
+    
+    def _count_family(self, family: str, text: str) -> int:
+        tokenizer = self.tokenizers.get(family)
+        if tokenizer:
+            return tokenizer(text)
+        return math.ceil(len(text) / CHARS_PER_TOKEN.get(family, DEFAULT_CHARS_PER_TOKEN))
+    
+    def count(self, model: str, text: Optional[str]) -> int:
+        """Estimate the token count of text for a model"""
+        if not text:
+            return 0
+        return self._count_family(model_family(model), text)
+    
+    def _trim_context(self, model: str, context: str, available: int) -> str:
+        """Keep the most recent part of the context that fits in the available tokens"""
+        if available <= 0:
+            return ""
+        
+        family = model_family(model)
+        chars = int(available * CHARS_PER_TOKEN.get(family, DEFAULT_CHARS_PER_TOKEN))
+        trimmed = context[-chars:]
+        
+        # Exact tokenizers can disagree with the heuristic; shrink until it fits
+        while trimmed and self._count_family(family, trimmed) > available:
+            trimmed = trimmed[max(1, len(trimmed) // 10):]
+        
+        # Start on a word boundary rather than mid-token
+        boundary = trimmed.find(" ")
+        if 0 <= boundary < len(trimmed) - 1 and len(trimmed) < len(context):
+            trimmed = trimmed[boundary + 1:]
+        return trimmed
+    
+    def fit(
+        self,
+        provider: str,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        context: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        session_tokens: int = 0
+    ) -> TokenBudget:
+        """Fit a request into the model's window, trimming context and reserving output tokens"""
+        model_config = self.models[provider][model]
+        context_length = model_config["context_length"]
+        output_tokens = max_tokens or model_config["max_tokens"]
+        prompt_tokens = TEMPLATE_OVERHEAD_TOKENS + self.count(model, prompt)
+        
+        # A continuing session's stored context already holds the system prompt; if it no longer
+        # leaves room for this turn, budget for a fresh session that resends the system prompt
+        session_reset = False
+        if session_tokens:
+            required = prompt_tokens + session_tokens
+            available = context_length - output_tokens - required
+            if available < 0:
+                session_reset, session_tokens = True, 0
+        
+        if not session_tokens:
+            system_tokens = self._count_system_prompt(model_family(model), system_prompt) if system_prompt else 0
+            required = prompt_tokens + system_tokens
+            available = context_length - output_tokens - required
+        
+        if available < 0:
+            raise TokenBudgetExceeded(
+                f"Prompt needs ~{required} tokens but {model} has {context_length - output_tokens} "
+                f"after reserving {output_tokens} output tokens",
+                required_tokens=required,
+                available_tokens=context_length - output_tokens
+            )
+        
+        context_tokens = self.count(model, context)
+        dropped = 0
+        if context_tokens > available:
+            context = self._trim_context(model, context, available)
+            trimmed_tokens = self.count(model, context)
+            dropped = context_tokens - trimmed_tokens
+            context_tokens = trimmed_tokens
+        
+        return TokenBudget(
+            prompt_tokens=required + context_tokens,
+            output_tokens=output_tokens,
+            context_length=context_length,
+            context=context,
+            context_tokens_dropped=dropped,
+            session_tokens=session_tokens,
+            session_reset=session_reset
+        )
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get tokenizer configuration and system prompt cache statistics"""
+        info = self._count_system_prompt.cache_info()
+        return {
+            "exact_tokenizers": sorted(self.tokenizers),
+            "system_prompt_cache": {
+                "hits": info.hits,
+                "misses": info.misses,
+                "size": info.currsize,
+                "max_size": info.maxsize
+            }
+        }
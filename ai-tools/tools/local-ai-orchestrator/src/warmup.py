@@ -0,0 +1,124 @@
+"""
+Model Warm-up for Local AI Orchestrator
+Preloads Ollama models by priority within a memory budget and tracks which are resident
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import structlog
+from prometheus_client import Counter, Gauge
+
+# Setup structured logging for warmup module
+logger = structlog.get_logger(__name__)
+
+# Prometheus metrics
+MODEL_WARMUPS = Counter('ai_model_warmups_total', 'Model preload attempts', ['model', 'result'])
+MODEL_RESIDENT = Gauge('ai_model_resident', 'Whether a model is loaded in backend memory', ['model'])
+
+class ModelWarmer:
+    """Keeps the highest-priority models that fit the memory budget loaded in Ollama"""
+    
+    def __init__(
+        self,
+        provider: Any,
+        model_configs: Dict[str, Any],
+        memory_budget_gb: float,
+        interval: float = 300,
+        timeout: float = 30,
+        ready_priority: int = 1
+    ):
+        self.provider = provider
+        self.model_configs = model_configs
+        self.memory_budget_gb = memory_budget_gb
+        self.interval = interval
+        self.timeout = timeout
+        self.ready_priority = ready_priority
+        self.logger = logger.bind(component="model_warmer")
+        
+        self.resident: Set[str] = set()
+        self.errors: Dict[str, str] = {}
+        self.last_run: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def plan(self) -> List[Any]:
+        """Enabled models for this provider in priority order, skipping any that would exceed the budget"""
+        candidates = sorted(
+            (config for config in self.model_configs.values() if config.enabled and config.provider == self.provider.name),
+            key=lambda config: (config.priority, config.memory_requirement_gb, config.name)
+        )
+        
+        planned = []
+        used_gb = 0.0
+        for config in candidates:
+            if used_gb + config.memory_requirement_gb > self.memory_budget_gb:
+                continue
+            planned.append(config)
+            used_gb += config.memory_requirement_gb
+        return planned
+    
+    @property
+    def required(self) -> List[str]:
+        """Planned models that must be warm before the service reports ready"""
+        return [config.name for config in self.plan() if config.priority <= self.ready_priority]
+    
+    @property
+    def ready(self) -> bool:
+        return all(name in self.resident for name in self.required)
+    
+    async def start(self) -> None:
+        """Start warming in the background; readiness flips once priority models are loaded"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._warm_loop())
+            self.logger.info("Model warmer started", budget_gb=self.memory_budget_gb, interval=self.interval)
+    
+    async def stop(self) -> None:
+        """Cancel the background warm-up task"""
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    
+    async def _warm_loop(self) -> None:
+        while True:
+            await self.warm_once()
+            await asyncio.sleep(self.interval)
+    
+    async def warm_once(self) -> None:
+        """Preload planned models one at a time, then reconcile with what the backend holds"""
+        # Sequential loads avoid several models competing for memory bandwidth at once
+        for config in self.plan():
+            start_time = time.time()
+            try:
+                await asyncio.wait_for(self.provider.preload(config.name), timeout=self.timeout)
+                self.resident.add(config.name)
+                self.errors.pop(config.name, None)
+                MODEL_WARMUPS.labels(model=config.name, result="success").inc()
+                self.logger.info("Model warm", model=config.name, load_seconds=time.time() - start_time)
+            except Exception as e:
+                self.resident.discard(config.name)
+                self.errors[config.name] = str(e) or type(e).__name__
+                MODEL_WARMUPS.labels(model=config.name, result="failed").inc()
+                self.logger.warning("Model warm-up failed", model=config.name, error=self.errors[config.name])
+        
+        try:
+            self.resident = {self.provider.base_model_name(info["name"]) for info in await self.provider.running_models()}
+        except Exception as e:
+            self.logger.warning("Failed to list resident models", error=str(e))
+        
+        for name in self.model_configs:
+            MODEL_RESIDENT.labels(model=name).set(1 if name in self.resident else 0)
+        self.last_run = time.time()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get warm-up plan, resident models and readiness"""
+        return {
+            "ready": self.ready,
+            "memory_budget_gb": self.memory_budget_gb,
+            "planned": [config.name for config in self.plan()],
+            "required": self.required,
+            "resident": sorted(self.resident),
+            "errors": self.errors,
+            "last_run": self.last_run
+        }
@@ -0,0 +1,45 @@
+"""
+Multi-Worker Support for Local AI Orchestrator
+Prometheus multiprocess collection and worker lifecycle hooks for gunicorn/uvicorn worker pools
+"""
+
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import structlog
+from prometheus_client import CollectorRegistry, generate_latest, multiprocess
+
+# Setup structured logging for workers module
+logger = structlog.get_logger(__name__)
+
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+def prepare_multiprocess_metrics(workers: int, directory: Optional[str] = None) -> Optional[str]:
+    """Point worker processes at a clean metrics directory; must run before workers import any metrics"""
+    if workers <= 1:
+        return None
+    
+    path = Path(directory or os.environ.get(MULTIPROC_ENV) or "/tmp/local-ai-orchestrator-metrics")
+    # Files left by a previous run would be summed into the new one
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True, exist_ok=True)
+    os.environ[MULTIPROC_ENV] = str(path)
+    
+    logger.info("Prometheus multiprocess collection enabled", directory=str(path), workers=workers)
+    return str(path)
+
+def render_metrics() -> bytes:
+    """Metrics for this process, or aggregated over every worker in multiprocess mode"""
+    if not os.environ.get(MULTIPROC_ENV):
+        return generate_latest()
+    
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop a dead worker's live gauges so they stop being reported"""
+    if os.environ.get(MULTIPROC_ENV):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,194 @@
+"""
+Logging Configuration Test Suite
+Tests for the buffered log pipeline and record formatting
+"""
+
+import asyncio
+import logging
+import random
+import threading
+
+import orjson
+import pytest
+import structlog
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.logging_config import (
+    BufferedQueueHandler, CorrelationIdFilter, CorrelationIdMiddleware, LogConfig, LogSampler,
+    RequestContextFilter, ResilientLogHandler, RingBuffer, correlation_context, get_correlation_id,
+    get_request_context, request_context
+)
+
+def make_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    """Create an isolated logger that only writes to handler"""
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+class TestLogPipeline:
+    """Test the queue-backed writer thread and file rotation"""
+    
+    def test_ring_buffer_drops_oldest_when_full(self):
+        """Test a full buffer keeps the newest entries and counts what it dropped"""
+        buffer = RingBuffer(maxsize=3, batch_size=10)
+        for item in range(5):
+            buffer.put_nowait(item)
+        
+        assert buffer.dropped == 2
+        assert buffer.get_batch(timeout=0) == [2, 3, 4]
+    
+    def test_writer_batches_to_rotating_file(self, tmp_path):
+        """Test records reach the kept-open file in order and rotate by size within backup_count"""
+        path = tmp_path / "app.log"
+        config = LogConfig(file_path=str(path), enable_console=False, max_file_size=2000,
+                           backup_count=2, batch_size=16, flush_interval=0.05)
+        handler = BufferedQueueHandler(config)
+        logger = make_logger("pipeline-rotation", handler)
+        
+        for index in range(100):
+            logger.info("record %d", index)
+        handler.flush()
+        
+        files = sorted(tmp_path.iterdir())
+        assert [file.name for file in files] == ["app.log", "app.log.1", "app.log.2"]
+        newest = [orjson.loads(line)["message"] for line in path.read_text().splitlines()]
+        assert newest[-1] == "record 99"
+        assert handler.get_status()["dropped_records"] == 0
+        handler.close()
+    
+    def test_slow_disk_never_blocks_callers(self, tmp_path):
+        """Test logging returns immediately while the writer is stuck, shedding the oldest records"""
+        release = threading.Event()
+        
+        class StuckHandler(ResilientLogHandler):
+            def write_records(self, records):
+                release.wait()
+                super().write_records(records)
+        
+        config = LogConfig(file_path=str(tmp_path / "app.log"), enable_console=False,
+                           queue_size=100, batch_size=10, flush_interval=0.01)
+        handler = BufferedQueueHandler(config, StuckHandler(config))
+        logger = make_logger("pipeline-stuck", handler)
+        
+        for index in range(1000):
+            logger.info("record %d", index)
+        
+        # Every call returned while the writer was stuck, so the buffer must have shed the oldest records
+        assert handler.get_status()["dropped_records"] >= 800
+        
+        release.set()
+        handler.flush()
+        written = [int(orjson.loads(line)["message"].split()[1]) for line in (tmp_path / "app.log").read_text().splitlines()]
+        assert written == sorted(written) and written[-1] == 999
+        assert len(written) + handler.get_status()["dropped_records"] == 1000
+        handler.close()
+
+class TestRecordFormatting:
+    """Test the precompiled record formatter"""
+    
+    @staticmethod
+    def request_record(created: float = 1714555800.1234) -> logging.LogRecord:
+        record = logging.LogRecord("src.orchestrator", logging.INFO, __file__, 42, "AI response generated for %s",
+                                   ("llama2",), None, func="generate_response")
+        record.created = created
+        record.__dict__.update(request_id="r-1", user_id="u-1", endpoint="/generate", method="POST",
+                               correlation_id="c-1", API_Key="sk-live", processing_time=1.25)
+        return record
+    
+    def test_extras_are_kept_and_sensitive_keys_redacted(self):
+        """Test only extra attributes are copied, sensitive ones matched case-insensitively"""
+        handler = ResilientLogHandler(LogConfig(enable_console=False))
+        entry = handler._format_record(self.request_record())
+        
+        assert entry["timestamp"] == "2024-05-01T09:30:00.123Z"
+        assert entry["message"] == "AI response generated for llama2"
+        assert entry["API_Key"] == "***REDACTED***"
+        assert entry["request_id"] == "r-1" and entry["processing_time"] == 1.25
+        assert not {"msg", "args", "levelno", "pathname", "created", "taskName"} & entry.keys()
+
+class TestLogSampling:
+    """Test the structlog sampling processor"""
+    
+    @staticmethod
+    def run(sampler: LogSampler, count: int, method_name: str = "info", **fields) -> list:
+        kept = []
+        for _ in range(count):
+            try:
+                kept.append(sampler(None, method_name, {"event": "AI response generated", **fields}))
+            except structlog.DropEvent:
+                pass
+        return kept
+    
+    def test_sampled_totals_stay_exact(self):
+        """Test a sampled event keeps about its rate and kept records account for every dropped one"""
+        random.seed(7)
+        sampler = LogSampler({"AI response generated": 0.1})
+        
+        kept = self.run(sampler, 1000, processing_time=0.2)
+        
+        assert 50 < len(kept) < 150
+        assert all(entry["sample_rate"] == 0.1 for entry in kept)
+        assert len(kept) + sum(entry.get("sampled_out", 0) for entry in kept) + sampler._pending.get("AI response generated", 0) == 1000
+        assert sampler.get_status()["sampled_out"]["AI response generated"] == 1000 - len(kept)
+    
+    def test_errors_and_slow_requests_bypass_sampling(self):
+        """Test tail sampling keeps failures and slow requests even at a zero rate"""
+        sampler = LogSampler({"AI response generated": 0.0}, slow_threshold_seconds=2.0, min_sample_rate=0.0)
+        
+        assert len(self.run(sampler, 50, processing_time=0.1)) == 0
+        assert len(self.run(sampler, 50, processing_time=2.5)) == 50
+        assert len(self.run(sampler, 50, method_name="error")) == 50
+        assert len(self.run(sampler, 50, error="boom")) == 50
+    
+    def test_backed_up_queue_throttles_unsampled_events(self):
+        """Test events without a configured rate are shed once the handler queue passes throttle_start"""
+        random.seed(7)
+        fill = {"value": 0.2}
+        sampler = LogSampler({}, pressure=lambda: fill["value"], throttle_start=0.5, min_sample_rate=0.05)
+        
+        assert len(self.run(sampler, 200)) == 200
+        fill["value"] = 1.0
+        assert sampler.rate_for("AI response generated") == 0.05
+        assert len(self.run(sampler, 1000)) < 100
+
+class TestRequestContext:
+    """Test per-request correlation and context propagation"""
+    
+    async def test_concurrent_tasks_keep_their_own_context(self):
+        """Test interleaved requests never see each other's correlation ID or context"""
+        async def handle(correlation_id: str) -> tuple:
+            with correlation_context(correlation_id), request_context(f"req-{correlation_id}", endpoint="/generate"):
+                await asyncio.sleep(0.01)
+                record = logging.LogRecord("test", logging.INFO, __file__, 1, "msg", (), None)
+                CorrelationIdFilter(LogConfig()).filter(record)
+                RequestContextFilter(LogConfig()).filter(record)
+                return get_correlation_id(), record.correlation_id, record.request_id, structlog.contextvars.get_contextvars()
+        
+        results = await asyncio.gather(*(handle(f"c-{index}") for index in range(20)))
+        
+        for index, (current, on_record, request_id, bound) in enumerate(results):
+            assert current == on_record == bound["correlation_id"] == f"c-{index}"
+            assert request_id == bound["request_id"] == f"req-c-{index}"
+        assert get_correlation_id() is None and get_request_context() == {}
+        assert structlog.contextvars.get_contextvars() == {}
+    
+    def test_middleware_propagates_or_generates_correlation_id(self):
+        """Test the middleware echoes an incoming X-Correlation-ID and mints one when it is missing or unsafe"""
+        app = FastAPI()
+        app.add_middleware(CorrelationIdMiddleware)
+        
+        @app.get("/context")
+        async def context():
+            return {"correlation_id": get_correlation_id(), **get_request_context()}
+        
+        client = TestClient(app)
+        propagated = client.get("/context", headers={"X-Correlation-ID": "booking-42"})
+        minted = client.get("/context", headers={"X-Correlation-ID": "x" * 500})
+        
+        assert propagated.headers["x-correlation-id"] == propagated.json()["correlation_id"] == "booking-42"
+        assert propagated.json()["endpoint"] == "/context" and propagated.json()["method"] == "GET"
+        assert minted.headers["x-correlation-id"] == minted.json()["correlation_id"] == minted.json()["request_id"]
+        assert len(minted.json()["correlation_id"]) == 32
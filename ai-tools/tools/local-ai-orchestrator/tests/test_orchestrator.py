@@ -5,12 +5,32 @@ Comprehensive testing with robust error handling and resilient state management
 
 import asyncio
 import json
+import math
+import sqlite3
+import time
+from datetime import datetime
 import pytest
 import pytest_asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
+import httpx
 from httpx import AsyncClient
 
+from src.admission import AdmissionController, AdmissionRejected
+from src.cache import ResponseCache, make_cache_key
+from src.coalescing import SingleFlight, SlowSubscriberError, StreamFanout
+from src.placement import PlacementRejected, ResourceScheduler
+from src.pool import BackendPool
+from src.health import CheckType, HealthChecker, HealthStatus, RateLimiter
+from src.ratelimit import GCRARateLimiter, LocalGCRAStore, SharedGCRAStore
+from src.shared_state import SQLiteSharedState, open_shared_state
+from src.config import (
+    AIProviderConfig, CacheConfig, ConfigManager, ConfigWatcher, ModelConfig, ServiceConfig, resolve_worker_count
+)
+from src.routing import ModelStatsTracker
+from src.tokens import TokenBudgeter
+from src.warmup import ModelWarmer
 from src.orchestrator import (
     app,
     AIOrchestrator,
@@ -18,9 +38,17 @@ from src.orchestrator import (
     GeminiProvider,
     AIRequest,
     AIResponse,
-    ModelStatus
+    AIStreamChunk,
+    AI_MODELS,
+    ModelStatus,
+    client_identity,
+    trusted_networks
 )
 
+def mock_client(handler) -> httpx.AsyncClient:
+    """Create an httpx client that routes requests to a local handler"""
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
 class TestAIProviders:
     """Test AI provider implementations with error handling"""
     
@@ -28,7 +56,7 @@ class TestAIProviders:
     async def ollama_provider(self):
         """Create mock Ollama provider"""
         provider = OllamaProvider()
-        provider.base_url = "http://mock-ollama:11434"
+        provider.pool.set_urls(["http://mock-ollama:11434"])
         return provider
     
     @pytest_asyncio.fixture
@@ -48,9 +76,9 @@ class TestAIProviders:
             provider="ollama"
         )
         
-        with patch.object(ollama_provider, 'base_url', 'http://invalid-url:11434'):
-            with pytest.raises(Exception):
-                await ollama_provider.generate(request)
+        ollama_provider.pool.set_urls(['http://invalid-url:11434'])
+        with pytest.raises(Exception):
+            await ollama_provider.generate(request)
     
     @pytest.mark.asyncio
     async def test_gemini_provider_error_handling(self, gemini_provider):
@@ -65,6 +93,140 @@ class TestAIProviders:
         with pytest.raises(Exception) as exc_info:
             await gemini_provider.generate(request)
         assert "Google API key not configured" in str(exc_info.value)
+    
+    @pytest.mark.asyncio
+    async def test_provider_reuses_pooled_client(self):
+        """Test providers keep one pooled client sized from configuration"""
+        config = AIProviderConfig(name="gemini", endpoint="http://mock", timeout=15, max_concurrent=7)
+        provider = GeminiProvider(config)
+        
+        await provider.start()
+        client = provider.client
+        assert provider.client is client
+        assert client.timeout.read == 15.0
+        assert client._transport._pool._max_connections == 7
+        assert client._transport._pool._http2 is True
+        
+        await provider.close()
+        assert client.is_closed
+        assert provider._client is None
+    
+    @pytest.mark.asyncio
+    async def test_ollama_stream_relays_ndjson_chunks(self, ollama_provider):
+        """Test Ollama streaming yields one chunk per NDJSON line"""
+        lines = [
+            {"response": "Hel", "done": False},
+            {"response": "lo", "done": False},
+            {"response": "", "done": True, "eval_count": 2},
+        ]
+        body = "\n".join(json.dumps(line) for line in lines)
+        ollama_provider._client = mock_client(lambda req: httpx.Response(200, text=body))
+        
+        request = AIRequest(prompt="hi", model="llama2", provider="ollama", stream=True)
+        chunks = [chunk async for chunk in ollama_provider.generate_stream(request)]
+        
+        assert [chunk.delta for chunk in chunks] == ["Hel", "lo", ""]
+        assert chunks[-1].done and chunks[-1].tokens_used == 2
+        assert len({chunk.request_id for chunk in chunks}) == 1
+    
+    @pytest.mark.asyncio
+    async def test_ollama_session_reuses_context_tokens(self, ollama_provider):
+        """Test follow-up turns send the stored context and only the new turn"""
+        payloads = []
+        
+        def handler(req):
+            payloads.append(json.loads(req.content))
+            return httpx.Response(200, json={
+                "response": "ok", "done": True, "eval_count": 1, "context": [len(payloads)] * 3
+            })
+        
+        ollama_provider._client = mock_client(handler)
+        first = AIRequest(prompt="Book a cut", model="phi3", provider="ollama",
+                          system_prompt="You are a salon booking assistant.", session_id="s1")
+        await ollama_provider.generate(first)
+        await ollama_provider.generate(first.model_copy(update={"prompt": "Friday at 3pm"}))
+        
+        assert "salon booking assistant" in payloads[0]["prompt"] and "context" not in payloads[0]
+        assert payloads[1]["context"] == [1, 1, 1]
+        assert "salon" not in payloads[1]["prompt"] and "Friday at 3pm" in payloads[1]["prompt"]
+        assert payloads[1]["keep_alive"] == ollama_provider.config.keep_alive
+        assert ollama_provider.sessions.get("s1", "phi3") == [2, 2, 2]
+        
+        assert ollama_provider.sessions.discard("s1") == 1
+        assert ollama_provider.sessions.get("s1", "phi3") is None
+    
+    @pytest.mark.asyncio
+    async def test_backend_pool_routes_by_load_and_session(self):
+        """Test least-outstanding routing, sticky sessions, and draining only the failed node's sessions"""
+        pool = BackendPool(["http://a:11434", "http://b:11434", "http://c:11434"], failure_threshold=1)
+        
+        async with pool.acquire() as first, pool.acquire() as second, pool.acquire() as third:
+            assert {first.url, second.url, third.url} == set(pool.urls)
+        
+        sessions = [f"session-{i}" for i in range(60)]
+        owners = {session: pool.select(session).url for session in sessions}
+        assert len(set(owners.values())) == 3
+        assert all(pool.select(session).url == owners[session] for session in sessions)
+        
+        drained = pool.backends[0]
+        request = httpx.Request("POST", f"{drained.url}/api/generate")
+        with pytest.raises(httpx.ConnectError):
+            async with pool.acquire(next(s for s in sessions if owners[s] == drained.url)):
+                raise httpx.ConnectError("refused", request=request)
+        
+        assert not drained.available
+        for session in sessions:
+            moved = pool.select(session).url
+            assert moved != drained.url
+            if owners[session] != drained.url:
+                assert moved == owners[session]
+    
+    @pytest.mark.asyncio
+    async def test_ollama_health_checks_each_backend(self):
+        """Test an unreachable node is taken out of routing while the others keep serving"""
+        provider = OllamaProvider(AIProviderConfig(
+            name="ollama", endpoint="http://ollama:11434",
+            endpoints=["http://node-a:11434", "http://node-b:11434"]
+        ))
+        hosts = []
+        
+        def handler(req):
+            if req.url.host == "node-a":
+                raise httpx.ConnectError("refused", request=req)
+            hosts.append(req.url.host)
+            if req.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": [{"name": "phi3:latest"}]})
+            return httpx.Response(200, json={"response": "ok", "done": True, "eval_count": 1})
+        
+        provider._client = mock_client(handler)
+        statuses = await provider.get_status()
+        
+        assert [status.model for status in statuses] == ["phi3"]
+        assert [backend["healthy"] for backend in provider.pool.get_status()] == [False, True]
+        assert provider.max_concurrent == 2 * provider.config.max_concurrent
+        
+        response = await provider.generate(AIRequest(prompt="hi", model="phi3", provider="ollama"))
+        assert response.response == "ok"
+        assert hosts == ["node-b", "node-b"]
+    
+    @pytest.mark.asyncio
+    async def test_gemini_stream_relays_sse_chunks(self, gemini_provider):
+        """Test Gemini streaming parses streamGenerateContent SSE frames"""
+        def handler(req):
+            assert "streamGenerateContent" in str(req.url)
+            frames = [
+                {"candidates": [{"content": {"parts": [{"text": "Good"}]}}]},
+                {"candidates": [{"content": {"parts": [{"text": " day"}]}}],
+                 "usageMetadata": {"totalTokenCount": 9}},
+            ]
+            return httpx.Response(200, text="".join(f"data: {json.dumps(f)}\r\n\r\n" for f in frames))
+        
+        gemini_provider._client = mock_client(handler)
+        request = AIRequest(prompt="hi", model="gemini-pro", provider="gemini", stream=True)
+        chunks = [chunk async for chunk in gemini_provider.generate_stream(request)]
+        
+        assert [chunk.delta for chunk in chunks] == ["Good", " day", ""]
+        assert chunks[-1].done and chunks[-1].tokens_used == 9
 
 class TestAIOrchestrator:
     """Test AI orchestrator with comprehensive error scenarios"""
@@ -80,7 +242,8 @@ class TestAIOrchestrator:
         assert orchestrator is not None
         assert "ollama" in orchestrator.providers
         assert "gemini" in orchestrator.providers
-        assert len(orchestrator.strategies) == 4
+        assert len(orchestrator.strategies) == 5
+        assert "adaptive" in orchestrator.strategies
     
     @pytest.mark.asyncio
     async def test_invalid_provider_handling(self, orchestrator):
@@ -120,6 +283,1089 @@ class TestAIOrchestrator:
                 assert health["status"] == "degraded"
                 assert "ollama" in health["providers"]
 
+class TestModelRegistry:
+    """Test cached model availability used for auto-selection"""
+    
+    @pytest.mark.asyncio
+    async def test_selection_reuses_cached_statuses(self):
+        """Test repeated auto-selection does not re-query providers"""
+        orchestrator = AIOrchestrator()
+        statuses = [ModelStatus(model="phi3", provider="ollama", status="online", available=True)]
+        
+        with patch.object(orchestrator.providers['ollama'], 'get_status', return_value=statuses) as ollama_status:
+            with patch.object(orchestrator.providers['gemini'], 'get_status', return_value=[]) as gemini_status:
+                for prompt in ["short", "analyze " + "x" * 6000, "y" * 1000]:
+                    request = AIRequest(prompt=prompt, model="auto", provider="auto")
+                    result = await orchestrator.auto_select_model(request)
+                    assert result.model == "phi3"
+        
+        assert ollama_status.await_count == 1
+        assert gemini_status.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_refresh_failure_publishes_empty_snapshot(self):
+        """Test failed refreshes mark models unavailable with the error recorded"""
+        orchestrator = AIOrchestrator()
+        registry = orchestrator.registry
+        
+        with patch.object(orchestrator.providers['ollama'], 'get_status', side_effect=Exception("down")):
+            await registry.refresh("ollama")
+        
+        snapshot = registry.get_snapshot("ollama")
+        assert snapshot.statuses == ()
+        assert snapshot.error == "down"
+        assert not snapshot.is_stale
+        assert not registry.is_available("ollama", "phi3")
+        assert registry.describe()["ollama"]["error"] == "down"
+
+class TestAdaptiveRouting:
+    """Test latency-aware routing from live model statistics"""
+    
+    def test_stats_track_ewma_and_in_flight(self):
+        """Test statistics blend samples and release in-flight slots"""
+        tracker = ModelStatsTracker(alpha=0.5)
+        tracker.begin("ollama", "phi3")
+        assert tracker.get("ollama", "phi3").in_flight == 1
+        
+        tracker.complete("ollama", "phi3", latency=2.0, tokens=100, success=True)
+        tracker.begin("ollama", "phi3")
+        tracker.complete("ollama", "phi3", latency=1.0, tokens=100, success=True)
+        tracker.begin("ollama", "phi3")
+        tracker.complete("ollama", "phi3", latency=5.0, tokens=0, success=False)
+        
+        stats = tracker.get("ollama", "phi3")
+        assert stats.in_flight == 0
+        assert stats.latency_ewma == pytest.approx(1.5)
+        assert stats.tokens_per_second_ewma == pytest.approx(75.0)
+        assert stats.error_rate_ewma == pytest.approx(0.5)
+        assert stats.samples == 3
+    
+    @pytest.mark.asyncio
+    async def test_adaptive_spills_over_when_local_model_saturated(self):
+        """Test adaptive strategy moves traffic off a saturated Ollama model"""
+        orchestrator = AIOrchestrator()
+        ollama = [ModelStatus(model="phi3", provider="ollama", status="online", available=True)]
+        gemini = [ModelStatus(model="gemini-2-flash", provider="gemini", status="online", available=True)]
+        request = AIRequest(prompt="hi", model="auto", provider="auto", max_tokens=100)
+        
+        with patch.object(orchestrator.providers['ollama'], 'get_status', return_value=ollama):
+            with patch.object(orchestrator.providers['gemini'], 'get_status', return_value=gemini):
+                selected = await orchestrator._select_adaptive_model(request)
+                assert selected["name"] == "phi3"
+                
+                for _ in range(orchestrator.providers['ollama'].config.max_concurrent * 2):
+                    orchestrator.stats.begin("ollama", "phi3")
+                orchestrator.stats.complete("gemini", "gemini-2-flash", latency=1.0, tokens=40, success=True)
+                
+                selected = await orchestrator._select_adaptive_model(request)
+                assert selected["name"] == "gemini-2-flash"
+                assert selected["provider"] == "gemini"
+
+class TestAdmissionControl:
+    """Test per-model concurrency limits and priority queueing"""
+    
+    @pytest.mark.asyncio
+    async def test_high_priority_jumps_queue(self):
+        """Test queued high-priority requests are admitted before earlier low-priority ones"""
+        controller = AdmissionController(global_limit=10, max_queue_depth=10, queue_timeout=5)
+        release = asyncio.Event()
+        order = []
+        
+        async def hold():
+            async with controller.admit("ollama", "codellama", "normal", limit=1):
+                await release.wait()
+        
+        async def job(name, priority):
+            async with controller.admit("ollama", "codellama", priority, limit=1):
+                order.append(name)
+        
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(job("low", "low")), asyncio.create_task(job("high", "high"))]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        
+        assert order == ["high", "low"]
+        assert controller.get_status()["models"]["ollama/codellama"] == {"active": 0, "queued": 0, "limit": 1}
+    
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_fast(self):
+        """Test bounded queues reject with 429 and time out with 503"""
+        controller = AdmissionController(global_limit=10, max_queue_depth=1, queue_timeout=0.2)
+        release = asyncio.Event()
+        
+        async def hold():
+            async with controller.admit("ollama", "mistral", "normal", limit=1):
+                await release.wait()
+        
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        
+        async def wait_for_slot():
+            async with controller.admit("ollama", "mistral", "normal", limit=1):
+                pass
+        
+        queued = asyncio.create_task(wait_for_slot())
+        await asyncio.sleep(0.01)
+        
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await wait_for_slot()
+        assert exc_info.value.status_code == 429
+        
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await queued
+        assert exc_info.value.status_code == 503
+        
+        release.set()
+        await holder
+        assert controller.get_status()["models"]["ollama/mistral"]["queued"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_orchestrator_surfaces_rejection_as_http_error(self):
+        """Test orchestrator converts admission rejections into HTTP errors with Retry-After"""
+        orchestrator = AIOrchestrator(service_config=ServiceConfig(max_concurrent_requests=1, max_queue_depth=0))
+        request = AIRequest(prompt="hi", model="phi3", provider="ollama")
+        
+        async with orchestrator.admission.admit("ollama", "phi3", "normal", limit=1):
+            with pytest.raises(HTTPException) as exc_info:
+                await orchestrator.generate_response(request)
+        
+        assert exc_info.value.status_code == 429
+        assert "Retry-After" in exc_info.value.headers
+
+class TestRateLimiting:
+    """Test GCRA limits per client, provider and model"""
+    
+    @pytest.mark.asyncio
+    async def test_gcra_allows_burst_then_sustained_rate(self):
+        """Test a burst is admitted, the next request waits one interval, and keys are independent"""
+        limiter = GCRARateLimiter({"ollama": 60}, burst=3, store=LocalGCRAStore(max_keys=2))
+        
+        decisions = [await limiter.check("alice", "ollama", "phi3") for _ in range(4)]
+        assert [decision.allowed for decision in decisions] == [True, True, True, False]
+        assert [decision.remaining for decision in decisions[:3]] == [2, 1, 0]
+        assert decisions[3].retry_after == pytest.approx(1.0, abs=0.05)
+        
+        assert (await limiter.check("alice", "ollama", "llama2")).allowed
+        assert (await limiter.check("bob", "ollama", "phi3")).allowed
+        assert len(limiter.store) == 2 and limiter.store.evictions == 1
+        
+        legacy = RateLimiter(max_requests=2, time_window=60)
+        assert [await legacy.acquire() for _ in range(3)] == [True, True, False]
+        assert legacy.get_remaining_requests() == 0
+    
+    def test_generate_returns_429_with_retry_after(self):
+        """Test the endpoint rejects a client over its limit with Retry-After while others still pass"""
+        orchestrator = AIOrchestrator(
+            service_config=ServiceConfig(rate_limit_burst=1),
+            cache_config=CacheConfig(enabled=False)
+        )
+        client = TestClient(app)
+        body = {"prompt": "hi", "model": "phi3", "provider": "ollama"}
+        
+        async def fake_generate(request):
+            return AIResponse(response="ok", model=request.model, provider=request.provider, tokens_used=1,
+                              processing_time=0.1, timestamp=datetime.now(), request_id="r1")
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate', side_effect=fake_generate):
+            with patch('src.orchestrator.orchestrator', orchestrator):
+                assert client.post("/generate", json=body, headers={"X-Client-ID": "alice"}).status_code == 200
+                limited = client.post("/generate", json=body, headers={"X-Client-ID": "alice"})
+                # Untrusted peers cannot escape their bucket by rotating the header
+                rotated = client.post("/generate", json=body, headers={"X-Client-ID": "bob"})
+                other = TestClient(app, client=("203.0.113.9", 50000)).post("/generate", json=body)
+        
+        assert limited.status_code == 429
+        assert int(limited.headers["Retry-After"]) >= 1
+        assert rotated.status_code == 429
+        assert other.status_code == 200
+    
+    def test_client_identity_only_trusts_configured_proxies(self):
+        """Test X-Client-ID and X-Forwarded-For are honoured only from trusted proxy addresses"""
+        trusted = trusted_networks(["10.0.0.0/8"])
+        
+        def identity(peer: str, headers: dict) -> str:
+            return client_identity(MagicMock(client=MagicMock(host=peer), headers=headers), trusted)
+        
+        assert identity("203.0.113.9", {"x-client-id": "alice", "x-forwarded-for": "198.51.100.1"}) == "203.0.113.9"
+        assert identity("10.1.2.3", {"x-client-id": "alice"}) == "alice"
+        assert identity("10.1.2.3", {"x-forwarded-for": "198.51.100.1, 10.4.5.6"}) == "198.51.100.1"
+        assert identity("10.1.2.3", {}) == "10.1.2.3"
+
+class TestResponseCache:
+    """Test exact-match response caching for deterministic requests"""
+    
+    @pytest.mark.asyncio
+    async def test_lru_eviction_by_bytes_and_ttl(self):
+        """Test memory tier evicts least recently used entries and expired entries"""
+        cache = ResponseCache(max_bytes=3 * (64 + 10), ttl_seconds=60)
+        keys = [make_cache_key(prompt=str(i)) for i in range(4)]
+        
+        for key in keys[:3]:
+            await cache.set(key, "x" * 10)
+        await cache.get(keys[0])
+        await cache.set(keys[3], "x" * 10)
+        
+        assert await cache.get(keys[1]) is None
+        assert await cache.get(keys[0]) == "x" * 10
+        
+        cache._set_memory(keys[2], "y", ttl=-1)
+        assert await cache.get(keys[2]) is None
+        assert cache.get_status()["evictions"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_sqlite_tier_survives_restart(self, tmp_path):
+        """Test entries written to SQLite are served by a new cache instance"""
+        path = str(tmp_path / "cache.db")
+        cache = ResponseCache(max_bytes=1024, ttl_seconds=60, sqlite_path=path)
+        await cache.set("key", "value")
+        cache.close()
+        
+        restarted = ResponseCache(max_bytes=1024, ttl_seconds=60, sqlite_path=path)
+        assert await restarted.get("key") == "value"
+        assert restarted.get_status()["entries"] == 1
+        restarted.close()
+    
+    @pytest.mark.asyncio
+    async def test_sqlite_tier_is_bounded_by_bytes(self, tmp_path):
+        """Test the disk tier evicts least recently used rows past its byte cap and sweeps expired ones"""
+        path = str(tmp_path / "cache.db")
+        # Each entry is 4 + 96 = 100 bytes on disk
+        # A memory tier too small to hold anything sends every lookup to disk
+        cache = ResponseCache(max_bytes=1, ttl_seconds=60, sqlite_path=path, sqlite_max_bytes=350)
+        for index in range(3):
+            await cache.set(f"key{index}", "v" * 96)
+        assert await cache.get("key0") is not None
+        await cache.set("key3", "v" * 96)
+        
+        db = sqlite3.connect(path)
+        keys = {row[0] for row in db.execute("SELECT key FROM responses")}
+        assert keys == {"key0", "key2", "key3"}
+        assert db.execute("SELECT SUM(size) FROM responses").fetchone()[0] <= 350
+        
+        # An expired row is swept by the next write once the sweep interval has passed
+        cache.ttl_seconds = 0
+        await cache.set("stale", "v")
+        cache.ttl_seconds = 60
+        cache.sweep_interval = 0
+        await cache.set("key0", "v" * 96)
+        assert db.execute("SELECT COUNT(*) FROM responses WHERE key = 'stale'").fetchone()[0] == 0
+        db.close()
+        cache.close()
+    
+    @pytest.mark.asyncio
+    async def test_deterministic_requests_hit_cache(self):
+        """Test zero-temperature requests are generated once and then served from cache"""
+        orchestrator = AIOrchestrator(cache_config=CacheConfig(max_bytes=1024 * 1024))
+        upstream = AIResponse(response="cached answer", model="phi3", provider="ollama", tokens_used=3,
+                              processing_time=1.0, timestamp=datetime.now(), request_id="upstream")
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate', return_value=upstream) as generate:
+            request = AIRequest(prompt="FAQ", model="phi3", provider="ollama", temperature=0.0)
+            first = await orchestrator.generate_response(request)
+            second = await orchestrator.generate_response(request)
+            
+            warm = AIRequest(prompt="FAQ", model="phi3", provider="ollama", temperature=0.7)
+            await orchestrator.generate_response(warm)
+        
+        assert generate.await_count == 2
+        assert not first.cached
+        assert second.cached and second.response == "cached answer"
+        assert second.request_id != first.request_id
+
+class TestRequestCoalescing:
+    """Test single-flight sharing of identical in-flight generations"""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_one_call(self):
+        """Test concurrent identical requests trigger a single provider call"""
+        orchestrator = AIOrchestrator(cache_config=CacheConfig(enabled=False))
+        release = asyncio.Event()
+        
+        async def slow_generate(request):
+            await release.wait()
+            return AIResponse(response="shared", model="phi3", provider="ollama", tokens_used=1,
+                              processing_time=1.0, timestamp=datetime.now(), request_id="upstream")
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate', side_effect=slow_generate) as generate:
+            request = AIRequest(prompt="Refresh", model="phi3", provider="ollama")
+            tasks = [asyncio.create_task(orchestrator.generate_response(request)) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            release.set()
+            responses = await asyncio.gather(*tasks)
+        
+        assert generate.await_count == 1
+        assert all(response.response == "shared" for response in responses)
+        assert len({response.request_id for response in responses}) == 3
+        assert orchestrator.inflight.get_status()["responses"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        """Test the shared call keeps running while any waiter remains"""
+        flight = SingleFlight()
+        release = asyncio.Event()
+        
+        async def work():
+            await release.wait()
+            return "done"
+        
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        
+        assert await second == ("done", True)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+    
+    @pytest.mark.asyncio
+    async def test_identical_streams_fan_out_from_one_upstream(self):
+        """Test every subscriber receives the full stream from a single upstream stream"""
+        orchestrator = AIOrchestrator()
+        calls = []
+        
+        async def fake_stream(request):
+            calls.append(request)
+            for delta in ["Hel", "lo"]:
+                await asyncio.sleep(0.01)
+                yield AIStreamChunk(request_id="r", model="phi3", provider="ollama", delta=delta)
+            yield AIStreamChunk(request_id="r", model="phi3", provider="ollama", delta="", done=True, tokens_used=2)
+        
+        async def collect(request):
+            return [chunk.delta async for chunk in orchestrator.generate_stream(request)]
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate_stream', side_effect=fake_stream):
+            request = AIRequest(prompt="Hi", model="phi3", provider="ollama", stream=True)
+            results = await asyncio.gather(collect(request), collect(request))
+        
+        assert len(calls) == 1
+        assert results == [["Hel", "lo", ""], ["Hel", "lo", ""]]
+    
+    @pytest.mark.asyncio
+    async def test_stream_reads_upstream_only_on_demand(self):
+        """Test a lone subscriber pulls the upstream one item at a time and late joiners need the history"""
+        reads = []
+        
+        async def source():
+            for item in range(5):
+                reads.append(item)
+                yield item
+        
+        flight = SingleFlight()
+        stream = flight.stream("key", source)
+        fanout = flight._streams["key"]
+        fanout._history_size = 2
+        
+        assert await stream.__anext__() == 0
+        await asyncio.sleep(0.01)
+        assert reads == [0]
+        
+        assert [await stream.__anext__() for _ in range(2)] == [1, 2]
+        assert not fanout.joinable
+        late = flight.stream("key", source)
+        assert flight._streams["key"] is not fanout
+        assert [item async for item in stream] == [3, 4]
+        assert [item async for item in late] == [0, 1, 2, 3, 4]
+        assert fanout._items == []
+    
+    @pytest.mark.asyncio
+    async def test_stream_drops_subscriber_that_stops_reading(self):
+        """Test the upstream waits for a stalled subscriber only up to the lag timeout, then drops it"""
+        async def source():
+            for item in range(10):
+                yield item
+        
+        fanout = StreamFanout(source(), buffer_size=2, history_size=2, lag_timeout=0.05)
+        slow = fanout.subscribe()
+        fast = fanout.subscribe()
+        
+        assert await slow.__anext__() == 0
+        assert [item async for item in fast] == list(range(10))
+        assert len(fanout._items) <= 2
+        with pytest.raises(SlowSubscriberError):
+            await slow.__anext__()
+
+class TestMicroBatching:
+    """Test window-based micro-batching between admission and the providers"""
+    
+    @pytest.mark.asyncio
+    async def test_requests_within_window_dispatch_together(self):
+        """Test same-model requests arriving inside the window share one batch dispatch"""
+        orchestrator = AIOrchestrator(
+            service_config=ServiceConfig(batch_window_ms=20, max_batch_size=8),
+            cache_config=CacheConfig(enabled=False)
+        )
+        batches = []
+        
+        async def fake_batch(requests):
+            batches.append([request.prompt for request in requests])
+            return [
+                AIResponse(response=request.prompt.upper(), model="phi3", provider="ollama", tokens_used=1,
+                           processing_time=0.1, timestamp=datetime.now(), request_id=request.prompt)
+                for request in requests
+            ]
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate_batch', side_effect=fake_batch):
+            requests = [AIRequest(prompt=f"p{i}", model="phi3", provider="ollama") for i in range(3)]
+            responses = await asyncio.gather(*(orchestrator.generate_response(request) for request in requests))
+        
+        assert batches == [["p0", "p1", "p2"]]
+        assert [response.response for response in responses] == ["P0", "P1", "P2"]
+        assert orchestrator.batcher.get_status()["average_batch_size"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_batch_failures_are_isolated_per_request(self):
+        """Test one failing prompt does not fail the rest of its batch"""
+        provider = OllamaProvider(AIProviderConfig(name="ollama", endpoint="http://ollama:11434", num_parallel=2))
+        
+        async def fake_generate(request):
+            if request.prompt == "bad":
+                raise HTTPException(status_code=500, detail="boom")
+            return AIResponse(response="ok", model="phi3", provider="ollama", tokens_used=1,
+                              processing_time=0.1, timestamp=datetime.now(), request_id=request.prompt)
+        
+        with patch.object(provider, 'generate', side_effect=fake_generate):
+            results = await provider.generate_batch([
+                AIRequest(prompt=prompt, model="phi3", provider="ollama") for prompt in ["a", "bad", "c"]
+            ])
+        
+        assert [result.response for result in (results[0], results[2])] == ["ok", "ok"]
+        assert isinstance(results[1], HTTPException)
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_batches_share_parallel_slots(self):
+        """Test num_parallel limits the provider as a whole, not each batch"""
+        provider = OllamaProvider(AIProviderConfig(name="ollama", endpoint="http://ollama:11434", num_parallel=2))
+        in_flight = 0
+        peak = 0
+        
+        async def fake_generate(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return AIResponse(response="ok", model="phi3", provider="ollama", tokens_used=1,
+                              processing_time=0.01, timestamp=datetime.now(), request_id=request.prompt)
+        
+        batch = [AIRequest(prompt=f"p{i}", model="phi3", provider="ollama") for i in range(3)]
+        with patch.object(provider, 'generate', side_effect=fake_generate):
+            await asyncio.gather(provider.generate_batch(batch), provider.generate_batch(batch))
+        
+        assert peak == 2
+
+class TestFailoverAndHedging:
+    """Test failover chains, circuit breakers and hedged requests"""
+    
+    @staticmethod
+    def make_response(request, text="ok"):
+        return AIResponse(response=text, model=request.model, provider=request.provider, tokens_used=1,
+                          processing_time=0.1, timestamp=datetime.now(), request_id=request.model)
+    
+    @pytest.mark.asyncio
+    async def test_failover_chain_moves_to_next_model(self):
+        """Test a failing model falls through to the next model in the chain"""
+        orchestrator = AIOrchestrator(
+            service_config=ServiceConfig(failover_chains={"default": ["mistral", "phi3", "gemini-2-flash"]}),
+            cache_config=CacheConfig(enabled=False)
+        )
+        
+        async def fake_generate(request):
+            if request.model == "mistral":
+                raise HTTPException(status_code=500, detail="model crashed")
+            return self.make_response(request)
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate', side_effect=fake_generate) as generate:
+            response = await orchestrator.generate_response(
+                AIRequest(prompt="Hi", model="mistral", provider="ollama")
+            )
+        
+        assert response.model == "phi3"
+        assert [call.args[0].model for call in generate.await_args_list] == ["mistral", "phi3"]
+    
+    @pytest.mark.asyncio
+    async def test_open_circuit_is_skipped_without_a_call(self):
+        """Test models with an open circuit breaker are skipped instantly"""
+        orchestrator = AIOrchestrator(
+            service_config=ServiceConfig(failover_chains={"default": ["phi3"]}),
+            cache_config=CacheConfig(enabled=False)
+        )
+        breaker = orchestrator._breaker("ollama", "mistral")
+        breaker.state = "open"
+        breaker.last_failure_time = time.time()
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate', side_effect=self.make_response) as generate:
+            response = await orchestrator.generate_response(
+                AIRequest(prompt="Hi", model="mistral", provider="ollama")
+            )
+        
+        assert response.model == "phi3"
+        assert generate.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        """Test a primary slower than its p95 is hedged and the loser is cancelled"""
+        orchestrator = AIOrchestrator(
+            service_config=ServiceConfig(
+                failover_chains={"default": ["gemini-2-flash"]},
+                hedge_requests=True,
+                hedge_min_delay_ms=10
+            ),
+            cache_config=CacheConfig(enabled=False)
+        )
+        for _ in range(orchestrator.stats.min_percentile_samples):
+            orchestrator.stats.complete("ollama", "mistral", 0.01, 1, success=True)
+        primary_cancelled = asyncio.Event()
+        
+        async def slow_generate(request):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                primary_cancelled.set()
+                raise
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate', side_effect=slow_generate):
+            with patch.object(orchestrator.providers['gemini'], 'generate', side_effect=self.make_response):
+                response = await asyncio.wait_for(orchestrator.generate_response(
+                    AIRequest(prompt="Hi", model="mistral", provider="ollama")
+                ), timeout=2)
+                await asyncio.wait_for(primary_cancelled.wait(), timeout=1)
+        
+        assert response.model == "gemini-2-flash"
+        assert orchestrator.stats.get("ollama", "mistral").in_flight == 0
+
+class TestTokenBudget:
+    """Test prompt token estimation and context trimming"""
+    
+    @pytest.mark.asyncio
+    async def test_oversized_context_is_trimmed_to_window(self):
+        """Test context is trimmed to context_length - max_tokens, keeping the most recent text"""
+        orchestrator = AIOrchestrator(cache_config=CacheConfig(enabled=False))
+        context = " ".join(f"turn{i}" for i in range(5000))
+        sent = []
+        
+        async def fake_generate(request):
+            sent.append(request)
+            return AIResponse(response="ok", model="llama2", provider="ollama", tokens_used=1,
+                              processing_time=0.1, timestamp=datetime.now(), request_id="r")
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate', side_effect=fake_generate):
+            response = await orchestrator.generate_response(
+                AIRequest(prompt="Summarise", model="llama2", provider="ollama", context=context, max_tokens=1024)
+            )
+        
+        assert response.context_tokens_dropped > 0
+        assert response.prompt_tokens <= 4096 - 1024
+        assert sent[0].context.endswith("turn4999")
+        assert len(sent[0].context) < len(context)
+    
+    @pytest.mark.asyncio
+    async def test_prompt_that_cannot_fit_is_rejected_before_network(self):
+        """Test a prompt larger than the window fails with 413 without calling the provider"""
+        orchestrator = AIOrchestrator(cache_config=CacheConfig(enabled=False))
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate') as generate:
+            with pytest.raises(HTTPException) as error:
+                await orchestrator.generate_response(
+                    AIRequest(prompt="word " * 10000, model="llama2", provider="ollama")
+                )
+        
+        assert error.value.status_code == 413
+        generate.assert_not_awaited()
+    
+    def test_session_context_counts_against_window(self):
+        """Test stored session tokens are budgeted, and a session that would overflow starts over with its system prompt"""
+        orchestrator = AIOrchestrator(cache_config=CacheConfig(enabled=False))
+        ollama = orchestrator.providers['ollama']
+        request = AIRequest(prompt="And on Friday?", model="llama2", provider="ollama", session_id="s1",
+                            system_prompt="You are a salon booking assistant.", max_tokens=1024)
+        
+        ollama.sessions.set("s1", "llama2", [7] * 500)
+        _, budget = orchestrator._fit_to_context(request)
+        assert budget.session_tokens == 500 and not budget.session_reset
+        assert ollama._build_payload(request, stream=False)["context"] == [7] * 500
+        
+        ollama.sessions.set("s1", "llama2", [7] * 3500)
+        _, budget = orchestrator._fit_to_context(request)
+        assert budget.session_reset and budget.prompt_tokens <= 4096 - 1024
+        payload = ollama._build_payload(request, stream=False)
+        assert "context" not in payload
+        assert payload["prompt"].startswith("System: You are a salon booking assistant.")
+    
+    def test_system_prompt_counts_are_cached(self):
+        """Test repeated system prompts are tokenized once and exact tokenizers override estimates"""
+        budgeter = TokenBudgeter(AI_MODELS)
+        for _ in range(3):
+            budgeter.fit("ollama", "phi3", "hello", system_prompt="You are a booking assistant.")
+        assert budgeter.get_status()["system_prompt_cache"]["hits"] == 2
+        
+        budgeter.register_tokenizer("phi", lambda text: len(text.split()))
+        assert budgeter.count("phi3", "one two three") == 3
+
+class TestModelWarmup:
+    """Test priority preloading within a memory budget"""
+    
+    @staticmethod
+    def model_configs():
+        return {
+            "phi3": ModelConfig(name="phi3", provider="ollama", context_length=128000, max_tokens=4096,
+                                memory_requirement_gb=2.0, cpu_requirement=2, priority=1),
+            "llama2": ModelConfig(name="llama2", provider="ollama", context_length=4096, max_tokens=2048,
+                                  memory_requirement_gb=4.0, cpu_requirement=4, priority=1),
+            "codellama": ModelConfig(name="codellama", provider="ollama", context_length=16384, max_tokens=4096,
+                                     memory_requirement_gb=8.0, cpu_requirement=6, priority=2),
+            "gemini-2-flash": ModelConfig(name="gemini-2-flash", provider="gemini", context_length=1048576,
+                                          max_tokens=8192, memory_requirement_gb=0.0, cpu_requirement=0, priority=1)
+        }
+    
+    @pytest.mark.asyncio
+    async def test_warms_priority_models_within_budget(self):
+        """Test models load in priority order, over-budget models are skipped, and readiness follows"""
+        provider = OllamaProvider()
+        warmer = ModelWarmer(provider, self.model_configs(), memory_budget_gb=7.0)
+        
+        assert [config.name for config in warmer.plan()] == ["phi3", "llama2"]
+        assert warmer.required == ["phi3", "llama2"] and not warmer.ready
+        
+        loaded = []
+        
+        async def fake_preload(model):
+            loaded.append(model)
+        
+        with patch.object(provider, 'preload', side_effect=fake_preload):
+            with patch.object(provider, 'running_models', return_value=[{"name": "phi3:latest"}, {"name": "llama2:latest"}]):
+                await warmer.warm_once()
+        
+        assert loaded == ["phi3", "llama2"]
+        assert warmer.ready and warmer.get_status()["resident"] == ["llama2", "phi3"]
+    
+    def test_default_budget_follows_node_memory(self):
+        """Test an unset budget preloads nothing, or only what fits the configured node memory"""
+        unset = AIOrchestrator(model_configs=self.model_configs())
+        assert unset.warmer.memory_budget_gb == 0 and unset.warmer.plan() == []
+        assert unset.warmer.ready
+        
+        sized = AIOrchestrator(
+            service_config=ServiceConfig(host_memory_gb=9.0, host_memory_reserve_gb=2.0),
+            model_configs=self.model_configs()
+        )
+        assert sized.warmer.memory_budget_gb == 7.0
+        assert [config.name for config in sized.warmer.plan()] == ["phi3", "llama2"]
+    
+    def test_ready_endpoint_waits_for_warm_models(self):
+        """Test /ready reports 503 until the priority models are resident"""
+        orchestrator = AIOrchestrator(
+            service_config=ServiceConfig(warmup_memory_budget_gb=7.0),
+            model_configs=self.model_configs()
+        )
+        client = TestClient(app)
+        
+        with patch('src.orchestrator.orchestrator', orchestrator):
+            assert client.get("/ready").status_code == 503
+            orchestrator.warmer.resident = {"phi3", "llama2"}
+            assert client.get("/ready").status_code == 200
+
+class TestModelPlacement:
+    """Test memory-budgeted residency and traffic-weighted eviction on each Ollama node"""
+    
+    GB = 1024 ** 3
+    NODE = "http://ollama:11434"
+    
+    @staticmethod
+    def scheduler(provider):
+        return ResourceScheduler(
+            provider,
+            {"phi3": 2.0, "llama2": 8.0, "codellama": 8.0},
+            host_memory_gb=16.0,
+            reserve_gb=2.0
+        )
+    
+    @pytest.mark.asyncio
+    async def test_evicts_least_used_idle_model(self):
+        """Test loading a model that does not fit unloads the lowest-traffic resident model only"""
+        provider = OllamaProvider()
+        scheduler = self.scheduler(provider)
+        running = [{"name": "llama2:latest", "size": 8 * self.GB}, {"name": "phi3:latest", "size": 2 * self.GB}]
+        
+        with patch.object(provider, 'running_models', return_value=running):
+            await scheduler.refresh()
+        for model in ["phi3", "phi3", "phi3", "llama2"]:
+            scheduler.record_use(model)
+        
+        assert scheduler.would_swap("codellama") and not scheduler.would_swap("phi3")
+        
+        with patch.object(provider, 'unload', new_callable=AsyncMock) as unload:
+            async with scheduler.placement(self.NODE, "codellama"):
+                assert scheduler.node(self.NODE).in_flight["codellama"] == 1
+        
+        unload.assert_awaited_once_with("llama2", self.NODE)
+        assert scheduler.is_resident("codellama") and scheduler.is_resident("phi3")
+        assert not scheduler.is_resident("llama2")
+        assert scheduler.resident_gb() == pytest.approx(10.0)
+    
+    @pytest.mark.asyncio
+    async def test_tracks_residency_per_backend(self):
+        """Test each node is sized from config, reconciled from its own /api/ps and evicted from on its own"""
+        provider = OllamaProvider()
+        provider.pool.set_urls(["http://node-a:11434", "http://node-b:11434"])
+        scheduler = ResourceScheduler(
+            provider,
+            {"phi3": 2.0, "llama2": 8.0, "codellama": 8.0},
+            host_memory_gb=16.0,
+            node_memory_gb={"http://node-b:11434/": 32.0},
+            reserve_gb=2.0
+        )
+        running = {
+            "http://node-a:11434": [{"name": "llama2:latest", "size": 8 * self.GB}, {"name": "phi3:latest", "size": 2 * self.GB}],
+            "http://node-b:11434": [{"name": "llama2:latest", "size": 8 * self.GB}]
+        }
+        
+        with patch.object(provider, 'running_models', side_effect=lambda url: running[url]):
+            await scheduler.refresh()
+        
+        assert scheduler.node("http://node-a:11434").capacity_gb == 14.0
+        assert scheduler.node("http://node-b:11434").capacity_gb == 30.0
+        assert scheduler.capacity_gb == 14.0
+        # node-b still has room, so codellama can be served without a swap
+        assert not scheduler.would_swap("codellama")
+        
+        with patch.object(provider, 'unload', new_callable=AsyncMock) as unload:
+            async with scheduler.placement("http://node-b:11434", "codellama"):
+                pass
+            unload.assert_not_awaited()
+            
+            async with scheduler.placement("http://node-a:11434", "codellama"):
+                pass
+            unload.assert_awaited_once_with("llama2", "http://node-a:11434")
+        
+        assert scheduler.is_resident("llama2", "http://node-b:11434")
+        assert not scheduler.is_resident("llama2", "http://node-a:11434")
+    
+    def test_placement_needs_configured_node_memory(self):
+        """Test placement is disabled rather than sized from the orchestrator's own memory"""
+        orchestrator = AIOrchestrator(service_config=ServiceConfig(host_memory_gb=0.0))
+        
+        assert orchestrator.scheduler is None
+        assert orchestrator.providers['ollama'].scheduler is None
+        with pytest.raises(ValueError):
+            ResourceScheduler(OllamaProvider(), {"phi3": 2.0})
+    
+    @pytest.mark.asyncio
+    async def test_busy_models_are_not_evicted(self):
+        """Test a placement that needs an in-flight model's memory is refused as a 503"""
+        orchestrator = AIOrchestrator(service_config=ServiceConfig(host_memory_gb=16.0, host_memory_reserve_gb=2.0))
+        orchestrator.scheduler.requirements_gb.update({"llama2": 8.0, "codellama": 8.0})
+        ollama = orchestrator.providers['ollama']
+        
+        with patch.object(ollama, 'unload', new_callable=AsyncMock) as unload:
+            async with orchestrator.scheduler.placement(self.NODE, "llama2"):
+                with pytest.raises(PlacementRejected):
+                    async with orchestrator.scheduler.placement(self.NODE, "codellama"):
+                        pass
+                
+                request = AIRequest(prompt="hi", model="codellama", provider="ollama")
+                with pytest.raises(HTTPException) as exc_info:
+                    async with ollama._backend(request):
+                        pass
+                assert exc_info.value.status_code == 503
+        
+        unload.assert_not_awaited()
+        assert orchestrator.scheduler.node(self.NODE).in_flight["llama2"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_selection_avoids_models_that_would_swap(self):
+        """Test auto-selection prefers a resident model over one that needs an eviction"""
+        orchestrator = AIOrchestrator(service_config=ServiceConfig(host_memory_gb=16.0, host_memory_reserve_gb=2.0))
+        orchestrator.scheduler.requirements_gb.update({"llama2": 8.0, "codellama": 8.0, "mistral": 4.0})
+        statuses = [
+            ModelStatus(model=model, provider="ollama", status="online", available=True)
+            for model in ["codellama", "mistral"]
+        ]
+        
+        with patch.object(orchestrator.providers['ollama'], 'running_models',
+                          return_value=[{"name": "llama2:latest", "size": 8 * self.GB},
+                                        {"name": "mistral:latest", "size": 4 * self.GB}]):
+            await orchestrator.scheduler.refresh()
+        
+        with patch.object(orchestrator.providers['ollama'], 'get_status', return_value=statuses):
+            with patch.object(orchestrator.providers['gemini'], 'get_status', return_value=[]):
+                selected = await orchestrator._select_highest_quality_model(AIRequest(prompt="x", model="auto", provider="auto"))
+        
+        assert selected["name"] == "mistral"
+
+class TestSharedState:
+    """Test state shared between worker processes"""
+    
+    @pytest.mark.asyncio
+    async def test_workers_share_one_rate_limit(self, tmp_path):
+        """Test two limiters on the same SQLite file draw from one budget"""
+        url = f"sqlite://{tmp_path / 'state.db'}"
+        first, second = open_shared_state(url), open_shared_state(url)
+        limiters = [GCRARateLimiter({"ollama": 60}, burst=2, store=SharedGCRAStore(state)) for state in (first, second)]
+        
+        decisions = [await limiters[i % 2].check("alice", "ollama", "phi3") for i in range(3)]
+        assert [decision.allowed for decision in decisions] == [True, True, False]
+        assert decisions[2].retry_after == pytest.approx(1.0, abs=0.1)
+        
+        await first.close()
+        await second.close()
+        assert open_shared_state("") is None
+        with pytest.raises(ValueError):
+            open_shared_state("memcached://localhost")
+    
+    @pytest.mark.asyncio
+    async def test_sqlite_state_sweeps_expired_rows(self, tmp_path):
+        """Test expired keys are deleted as writes go on, so the table stays bounded"""
+        state = SQLiteSharedState(str(tmp_path / "state.db"), sweep_every=50)
+        for index in range(1000):
+            await state.set(f"ratelimit:client-{index}", "1", ttl=0)
+        await state.update("ratelimit:live", lambda current: ("1", None), ttl=60)
+        
+        rows = state._db.execute("SELECT COUNT(*) FROM shared_state").fetchone()[0]
+        assert rows <= 50
+        assert state.swept >= 950
+        assert await state.get("ratelimit:live") == "1"
+        await state.close()
+    
+    @pytest.mark.asyncio
+    async def test_registry_adopts_snapshot_from_another_worker(self, tmp_path):
+        """Test only the first worker polls a provider within an interval"""
+        config = ServiceConfig(shared_state_url=f"sqlite://{tmp_path / 'state.db'}")
+        publisher, follower = AIOrchestrator(service_config=config), AIOrchestrator(service_config=config)
+        statuses = [ModelStatus(model="phi3", provider="ollama", status="online", available=True)]
+        
+        with patch.object(publisher.providers['ollama'], 'get_status', return_value=statuses):
+            await publisher.registry.refresh("ollama")
+        with patch.object(follower.providers['ollama'], 'get_status', return_value=[]) as polled, \
+                patch.object(follower.providers['ollama'], 'check_backends', new_callable=AsyncMock) as probed:
+            await follower.registry.refresh("ollama")
+        
+        assert polled.await_count == 0
+        assert probed.await_count == 1
+        assert follower.registry.is_available("ollama", "phi3")
+        assert not follower.registry.get_snapshot("ollama").is_stale
+        
+        await publisher.close()
+        await follower.close()
+    
+    @pytest.mark.asyncio
+    async def test_adopting_snapshot_still_probes_backend_health(self, tmp_path):
+        """Test a worker that adopts a shared snapshot keeps its own pool health and node models current"""
+        config = ServiceConfig(shared_state_url=f"sqlite://{tmp_path / 'state.db'}")
+        follower = AIOrchestrator(service_config=config)
+        ollama = follower.providers['ollama']
+        ollama.pool.set_urls(["http://node-a:11434", "http://node-b:11434"])
+        await follower.shared_state.set("registry:ollama", json.dumps({
+            "statuses": [{"model": "phi3", "provider": "ollama", "status": "online", "available": True}],
+            "published_at": time.time()
+        }), 30)
+        
+        async def fake_get(url, timeout=None):
+            request = httpx.Request("GET", url)
+            if url.startswith("http://node-b"):
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(200, json={"models": [{"name": "phi3:latest"}]}, request=request)
+        
+        with patch.object(ollama.client, 'get', side_effect=fake_get):
+            await follower.registry.refresh("ollama")
+        
+        node_a, node_b = ollama.pool.backends
+        assert follower.registry.is_available("ollama", "phi3")
+        assert node_a.healthy and node_a.models == ["phi3"]
+        assert not node_b.healthy
+        await follower.close()
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("published", ['{"statuses": [{"model": "phi3"}]', '{"statuses": []}', '{"statuses": [{"model": 1}], "published_at": 0}'])
+    async def test_registry_polls_provider_when_shared_snapshot_is_invalid(self, tmp_path, published):
+        """Test a malformed or partial snapshot from another worker falls back to polling"""
+        config = ServiceConfig(shared_state_url=f"sqlite://{tmp_path / 'state.db'}")
+        follower = AIOrchestrator(service_config=config)
+        await follower.shared_state.set("registry:ollama", published, 30)
+        statuses = [ModelStatus(model="phi3", provider="ollama", status="online", available=True)]
+        
+        with patch.object(follower.providers['ollama'], 'get_status', return_value=statuses) as polled:
+            await follower.registry.refresh("ollama")
+        
+        assert polled.await_count == 1
+        assert follower.registry.is_available("ollama", "phi3")
+        await follower.close()
+    
+    def test_worker_count_follows_cpus_when_auto(self):
+        """Test WORKERS=auto resolves to the usable CPU count"""
+        assert resolve_worker_count("3") == 3
+        assert resolve_worker_count("auto") == resolve_worker_count("0") >= 1
+
+class TestConfigReload:
+    """Test hot-reloading the configuration file"""
+    
+    @staticmethod
+    def write_config(manager: ConfigManager, data: dict) -> None:
+        # Replace rather than rewrite in place, as editors and save_configuration do
+        staging = manager.config_file.with_suffix(".json.new")
+        staging.write_text(json.dumps(data))
+        staging.replace(manager.config_file)
+    
+    def test_reload_validates_then_swaps_snapshot(self, tmp_path):
+        """Test a valid edit is swapped in whole and announced, while invalid ones leave the running config alone"""
+        manager = ConfigManager(str(tmp_path))
+        notified = []
+        manager.subscribe(lambda previous, current: notified.append((previous, current)))
+        original = manager.snapshot
+        
+        self.write_config(manager, {"service": {"max_concurrent_requests": 32}, "providers": {"ollama": {"timeout": 90}}})
+        result = manager.reload()
+        
+        assert result["applied"] and set(result["changed"]) == {"service", "providers"}
+        assert manager.service.max_concurrent_requests == 32 and manager.service.max_queue_depth == original.service.max_queue_depth
+        assert manager.providers["ollama"].timeout == 90 and manager.providers["ollama"].endpoint == original.providers["ollama"].endpoint
+        assert notified == [(original, manager.snapshot)] and manager.snapshot.version == 1
+        assert original.service.max_concurrent_requests != 32
+        
+        for broken in ('{"service": {"max_concurrent_requests": 0}}', '{"service": {"unknown_limit": 1}}', '{"service": '):
+            manager.config_file.write_text(broken)
+            assert not manager.reload()["applied"]
+        assert manager.service.max_concurrent_requests == 32 and len(notified) == 1
+        
+        # Saving writes the running config back out; reading it again is not a change
+        assert manager.save_configuration()
+        assert manager.reload() == {**manager.reload(), "applied": False, "changed": []}
+        assert len(notified) == 1
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_inotify", [False, True])
+    async def test_watcher_applies_file_changes(self, tmp_path, use_inotify):
+        """Test the watcher reloads on change, by polling or through watchfiles"""
+        manager = ConfigManager(str(tmp_path))
+        watcher = ConfigWatcher(manager, poll_interval=0.05, use_inotify=use_inotify)
+        await watcher.start()
+        await asyncio.sleep(0.2)
+        
+        self.write_config(manager, {"service": {"queue_timeout": 7}})
+        for _ in range(100):
+            if manager.service.queue_timeout == 7:
+                break
+            await asyncio.sleep(0.05)
+        await watcher.stop()
+        
+        assert manager.service.queue_timeout == 7
+        assert watcher.reloads >= 1
+    
+    @pytest.mark.asyncio
+    async def test_orchestrator_resizes_in_place(self, tmp_path):
+        """Test limits, provider pools and rate limits follow a reload without replacing warm components"""
+        manager = ConfigManager(str(tmp_path))
+        orchestrator = AIOrchestrator(
+            provider_configs=manager.providers,
+            service_config=manager.service,
+            cache_config=CacheConfig(enabled=False)
+        )
+        manager.subscribe(orchestrator.apply_config)
+        ollama = orchestrator.providers["ollama"]
+        admission, client, pool = orchestrator.admission, ollama.client, ollama.pool
+        async with admission.admit("ollama", "phi3", "normal", ollama.max_concurrent):
+            pass
+        
+        self.write_config(manager, {
+            "service": {"max_concurrent_requests": 3, "queue_timeout": 5, "rate_limit_burst": 4},
+            "providers": {"ollama": {"max_concurrent": 2, "rate_limit_per_minute": 30}}
+        })
+        assert manager.reload()["applied"]
+        
+        assert orchestrator.admission is admission and admission.global_semaphore.limit == 3 and admission.queue_timeout == 5
+        assert admission.model_semaphores[("ollama", "phi3")].limit == ollama.max_concurrent == 2
+        assert ollama.pool is pool and ollama.client is not client and not client.is_closed
+        assert orchestrator.rate_limiter.rates_per_minute["ollama"] == 30 and orchestrator.rate_limiter.burst == 4
+        
+        await orchestrator.close()
+        await client.aclose()
+
+class TestHealthScheduler:
+    """Test background health checks and cached probe responses"""
+    
+    @staticmethod
+    def checker():
+        checker = HealthChecker({"check_timeout": 0.05})
+        calls = []
+        
+        async def _check_fast():
+            calls.append("fast")
+            return {"status": HealthStatus.HEALTHY}
+        
+        async def _check_hung():
+            calls.append("hung")
+            await asyncio.sleep(10)
+        
+        checker.check_functions = {CheckType.LIVENESS: [_check_fast], CheckType.READINESS: [_check_hung]}
+        checker.auto_recovery_enabled = False
+        return checker, calls
+    
+    @pytest.mark.asyncio
+    async def test_tier_runs_checks_with_timeouts_and_publishes_snapshot(self):
+        """Test a hung check is cut off at the timeout without holding back the rest of the snapshot"""
+        checker, _ = self.checker()
+        assert checker.snapshot() is None
+        
+        start = time.monotonic()
+        await asyncio.gather(checker.run_tier(CheckType.LIVENESS), checker.run_tier(CheckType.READINESS))
+        assert time.monotonic() - start < 1.0
+        
+        health = checker.snapshot()
+        statuses = {check.name: check.status for check in health.checks}
+        assert statuses == {"_check_fast": HealthStatus.HEALTHY, "_check_hung": HealthStatus.UNKNOWN}
+        assert health.status == HealthStatus.DEGRADED
+        assert checker.snapshot_age(CheckType.LIVENESS) < 1.0
+        assert checker.snapshot_age(CheckType.HEALTH) == math.inf
+    
+    @pytest.mark.asyncio
+    async def test_check_all_runs_graph_concurrently_within_deadlines(self):
+        """Test independent checks overlap, hung checks become UNKNOWN and dependents of failures are skipped"""
+        checker = HealthChecker({"check_timeout": 0.3})
+        checker.auto_recovery_enabled = False
+        
+        def slow(name, status=HealthStatus.HEALTHY, delay=0.2):
+            async def check():
+                await asyncio.sleep(delay)
+                return {"status": status}
+            check.__name__ = name
+            return check
+        
+        checker.check_functions = {
+            CheckType.LIVENESS: [slow("_check_a"), slow("_check_b"), slow("_check_c")],
+            CheckType.READINESS: [slow("_check_down", HealthStatus.UNHEALTHY), slow("_check_hung", delay=10)],
+            CheckType.HEALTH: [slow("_check_summary", delay=0)]
+        }
+        checker.check_dependencies = {"_check_summary": ["_check_a", "_check_down"]}
+        
+        health = await checker.check_all()
+        statuses = {check.name: check.status for check in health.checks}
+        
+        assert statuses["_check_hung"] == HealthStatus.UNKNOWN
+        assert statuses["_check_summary"] == HealthStatus.UNKNOWN
+        assert health.status == HealthStatus.UNHEALTHY
+        # Bounded by the 0.3s deadline rather than the 0.8s the healthy checks would take in sequence
+        assert 250 <= health.duration_ms < 600
+    
+    def test_probes_serve_snapshot_without_running_checks(self):
+        """Test /health and /live answer from the last snapshot instead of re-running checks"""
+        from src import main
+        
+        checker, calls = self.checker()
+        asyncio.run(checker.run_tier(CheckType.LIVENESS))
+        calls.clear()
+        
+        client = TestClient(main.app)
+        with patch.dict(main.app_state, {"initialized": True, "health_checker": checker}):
+            with patch('src.health.health_checker', checker):
+                responses = [client.get("/health") for _ in range(3)] + [client.get("/live")]
+        
+        assert [response.status_code for response in responses] == [200, 200, 200, 200]
+        assert responses[0].json()["checks"][0]["name"] == "_check_fast"
+        assert calls == []
+
 class TestFastAPIEndpoints:
     """Test FastAPI endpoints with comprehensive error scenarios"""
     
@@ -143,6 +1389,88 @@ class TestFastAPIEndpoints:
         assert "ollama" in data["models"]
         assert "gemini" in data["models"]
     
+    def test_stream_endpoint_emits_sse_per_chunk(self, client):
+        """Test streaming endpoint relays each chunk as its own SSE frame"""
+        orchestrator = AIOrchestrator()
+        
+        async def fake_stream(request):
+            for delta, done in [("a", False), ("b", True)]:
+                yield AIStreamChunk(request_id="r1", model=request.model,
+                                    provider=request.provider, delta=delta, done=done)
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate_stream', fake_stream):
+            with patch('src.orchestrator.orchestrator', orchestrator):
+                response = client.post("/generate/stream", json={
+                    "prompt": "hi", "model": "llama2", "provider": "ollama"
+                })
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        frames = [json.loads(line[len("data: "):]) for line in response.text.split("\n\n") if line]
+        assert [frame["delta"] for frame in frames] == ["a", "b"]
+    
+    def test_websocket_sends_responses_with_timestamps(self, client):
+        """Test WebSocket frames carry the encoded response, datetime fields included"""
+        orchestrator = AIOrchestrator(cache_config=CacheConfig(enabled=False))
+        
+        async def fake_generate(request):
+            return AIResponse(response="ok", model=request.model, provider=request.provider, tokens_used=1,
+                              processing_time=0.1, timestamp=datetime(2024, 5, 1, 9, 30), request_id="r1")
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate', side_effect=fake_generate):
+            with patch('src.orchestrator.orchestrator', orchestrator):
+                with client.websocket_connect("/ws/generate") as websocket:
+                    websocket.send_text(json.dumps({"prompt": "hi", "model": "phi3", "provider": "ollama"}))
+                    frame = websocket.receive_json(mode="binary")
+        
+        assert frame["response"] == "ok"
+        assert frame["timestamp"] == "2024-05-01T09:30:00"
+    
+    def test_websocket_streams_chunks_as_binary_frames(self, client):
+        """Test streamed WebSocket chunks are sent as pre-encoded JSON bytes"""
+        orchestrator = AIOrchestrator(cache_config=CacheConfig(enabled=False))
+        
+        async def fake_stream(request):
+            for delta, done in [("a", False), ("b", True)]:
+                yield AIStreamChunk(request_id="r", model=request.model, provider=request.provider, delta=delta, done=done)
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate_stream', side_effect=fake_stream):
+            with patch('src.orchestrator.orchestrator', orchestrator):
+                with client.websocket_connect("/ws/generate") as websocket:
+                    websocket.send_text(json.dumps({"prompt": "hi", "model": "phi3", "provider": "ollama", "stream": True}))
+                    frames = [websocket.receive_bytes() for _ in range(2)]
+        
+        assert [json.loads(frame)["delta"] for frame in frames] == ["a", "b"]
+    
+    def test_batch_endpoint_streams_ndjson_with_per_item_errors(self, client):
+        """Test batch endpoint returns one NDJSON line per request, including failures"""
+        orchestrator = AIOrchestrator(cache_config=CacheConfig(enabled=False))
+        
+        async def fake_generate(request):
+            return AIResponse(response=request.prompt, model=request.model, provider=request.provider, tokens_used=1,
+                              processing_time=0.1, timestamp=datetime.now(), request_id=f"id-{request.prompt}")
+        
+        with patch.object(orchestrator.providers['ollama'], 'generate', side_effect=fake_generate):
+            with patch('src.orchestrator.orchestrator', orchestrator):
+                response = client.post("/generate/batch", json=[
+                    {"prompt": "one", "model": "llama2", "provider": "ollama"},
+                    {"prompt": "two", "model": "missing", "provider": "ollama"},
+                    {"prompt": "three", "model": "phi3", "provider": "ollama"}
+                ])
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        items = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda item: item["index"])
+        assert [item["response"]["response"] if item["response"] else None for item in items] == ["one", None, "three"]
+        assert items[0]["request_id"] == "id-one"
+        assert items[1]["status_code"] == 400 and items[1]["request_id"]
+    
+    def test_batch_endpoint_rejects_empty_batch(self, client):
+        """Test batch endpoint rejects an empty request list"""
+        with patch('src.orchestrator.orchestrator', AIOrchestrator()):
+            response = client.post("/generate/batch", json=[])
+        assert response.status_code == 400
+    
     def test_status_endpoint_error_handling(self, client):
         """Test status endpoint with service not ready"""
         with patch('src.orchestrator.orchestrator', None):
@@ -156,7 +1484,7 @@ class TestResilientStateManagement:
     async def test_provider_state_recovery(self):
         """Test provider state recovery after failures"""
         provider = OllamaProvider()
-        provider.base_url = "http://mock-ollama:11434"
+        provider.pool.set_urls(["http://mock-ollama:11434"])
         
         for i in range(3):
             try:
@@ -228,7 +1556,7 @@ class TestProductionReadiness:
     async def test_circuit_breaker_pattern(self):
         """Test circuit breaker pattern implementation"""
         provider = OllamaProvider()
-        provider.base_url = "http://mock-ollama:11434"
+        provider.pool.set_urls(["http://mock-ollama:11434"])
         
         failure_count = 0
         for _ in range(5):